@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.core.algorithms import DEFAULT_ALGORITHM
+from app.services.atomic_writer import AtomicWriter
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.key_import_service import KeyImportService
+from app.services.key_pool import KeyPool
+from app.services.key_service import PEM_KEY_FORMAT, KeyService
+from app.services.key_store import open_key_store
+from app.services.public_key_service import PublicKeyService
+from app.services.verification_cache import VerificationCache
+
+if TYPE_CHECKING:
+    from app.services.instrumentation import MetricsRegistry
+
+
+@dataclass(slots=True)
+class Services:
+    crypto: CryptoService
+    keys: KeyService
+    public_keys: PublicKeyService
+    documents: DocumentService
+    key_import: KeyImportService
+    writer: AtomicWriter
+
+
+def data_dirs(base_dir: Path) -> tuple[Path, Path]:
+    data_dir = base_dir / "data"
+    return data_dir / "keys", data_dir / "pk"
+
+
+def keyring_path(base_dir: Path) -> Path:
+    return base_dir / "data" / "keyring.sqlite3"
+
+
+def catalog_path(base_dir: Path) -> Path:
+    return base_dir / "data" / "catalog.sqlite3"
+
+
+def verification_cache_path(base_dir: Path) -> Path:
+    return base_dir / "data" / "verification_cache.sqlite3"
+
+
+def daemon_socket_path(base_dir: Path) -> Path:
+    return base_dir / "data" / "daemon.sock"
+
+
+def key_store_path(base_dir: Path) -> Path:
+    keyring = keyring_path(base_dir)
+    if keyring.exists():
+        return keyring
+    _, pk_dir = data_dirs(base_dir)
+    return pk_dir
+
+
+def build_services(
+    base_dir: Path,
+    algorithm: str = DEFAULT_ALGORITHM,
+    use_verification_cache: bool = False,
+    key_pool_size: int = 0,
+    document_chunk_size: int = 0,
+    document_compression: str | None = None,
+    private_key_format: str = PEM_KEY_FORMAT,
+    private_key_cache_size: int = 128,
+    private_key_cache_ttl: float | None = 300.0,
+    durable_writes: bool = True,
+    metrics: MetricsRegistry | None = None,
+) -> Services:
+    keys_dir, _ = data_dirs(base_dir)
+    cache = VerificationCache(verification_cache_path(base_dir)) if use_verification_cache else None
+
+    writer = AtomicWriter(durable=durable_writes)
+    crypto_service = CryptoService(default_algorithm=algorithm)
+    key_pool = KeyPool(crypto_service, size=key_pool_size) if key_pool_size > 0 else None
+    key_service = KeyService(
+        keys_dir=keys_dir,
+        crypto=crypto_service,
+        key_pool=key_pool,
+        key_format=private_key_format,
+        cache_size=private_key_cache_size,
+        cache_ttl=private_key_cache_ttl,
+        writer=writer,
+    )
+    store = open_key_store(key_store_path(base_dir), writer)
+    public_key_service = PublicKeyService(
+        store=store,
+        crypto=crypto_service,
+        verification_cache=cache,
+        writer=writer,
+    )
+    document_service = DocumentService(
+        crypto=crypto_service,
+        cache=cache,
+        chunk_size=document_chunk_size,
+        compression=document_compression,
+        writer=writer,
+    )
+    if metrics is not None:
+        from app.services.instrumentation import instrument_services
+
+        instrument_services(
+            metrics,
+            crypto=crypto_service,
+            keys=key_service,
+            store=store,
+            public_keys=public_key_service,
+            documents=document_service,
+        )
+    return Services(
+        crypto=crypto_service,
+        keys=key_service,
+        public_keys=public_key_service,
+        documents=document_service,
+        key_import=KeyImportService(public_keys=public_key_service, crypto=crypto_service),
+        writer=writer,
+    )
@@ -0,0 +1,492 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict
+from pathlib import Path, PurePosixPath
+
+from app.bootstrap import (
+    Services,
+    build_services,
+    catalog_path,
+    daemon_socket_path,
+    data_dirs,
+    key_store_path,
+    keyring_path,
+    verification_cache_path,
+)
+from app.core.compression import CODECS
+from app.core.exceptions import AppError, ValidationError
+from app.core.models import EXPORT_FORMATS, PROFILE_MODES, VerificationStatus
+from app.services.batch_verify_service import DOCUMENT_SUFFIX, BatchVerifyService
+from app.services.bundle_service import BundleService
+from app.services.catalog_service import CatalogService
+from app.services.crypto_service import CryptoService
+from app.services.key_import_service import KeyImportService
+from app.services.key_service import KEY_FORMATS, PEM_KEY_FORMAT, KeyService
+from app.services.key_store import DirectoryKeyStore, SqliteKeyStore, migrate_directory_store, open_key_store
+from app.services.provisioning_service import ProvisioningService
+
+
+DEFAULT_BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _build_services(args: argparse.Namespace) -> Services:
+    return build_services(
+        args.base_dir,
+        document_compression=getattr(args, "compress", None),
+        private_key_format=getattr(args, "key_format", PEM_KEY_FORMAT),
+        metrics=args.metrics_registry,
+    )
+
+
+def _batch_service(args: argparse.Namespace, crypto: CryptoService) -> BatchVerifyService:
+    return BatchVerifyService(
+        store_path=key_store_path(args.base_dir),
+        crypto=crypto,
+        workers=args.workers,
+        cache_path=verification_cache_path(args.base_dir) if args.cache else None,
+        metrics=args.metrics_registry,
+    )
+
+
+def _bundle_service(args: argparse.Namespace) -> BundleService:
+    services = _build_services(args)
+    return BundleService(documents=services.documents, public_keys=services.public_keys, writer=services.writer)
+
+
+def _sign(args: argparse.Namespace) -> int:
+    if args.output is not None and len(args.sources) > 1:
+        raise ValidationError("--output можно указать только для одного файла")
+    services = _build_services(args)
+    author = KeyService.validate_username(args.user)
+    private_key = services.keys.load_private_key(author)
+    with services.documents.batch() as batch:
+        for source in args.sources:
+            destination = args.output or source.with_suffix(DOCUMENT_SUFFIX)
+            services.documents.sign_text_file(source, destination, author, private_key)
+    for destination in batch.written:
+        sys.stdout.write(f"{destination}\n")
+    return 0
+
+
+def _verify(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    verifier_public_key = services.keys.load_private_key(args.user).public_key()
+    batch = _batch_service(args, services.crypto)
+    failed = 0
+    for result in batch.verify(batch.discover(args.paths), verifier_public_key):
+        failed += result.status != VerificationStatus.OK
+        sys.stdout.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    return 0 if not failed else 1
+
+
+def _export_key(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    owner = KeyService.validate_username(args.user)
+    destination = args.output or Path(f"{owner}.pub")
+    services.public_keys.export_public_key(owner, services.keys.load_private_key(owner), destination)
+    sys.stdout.write(f"{destination}\n")
+    return 0
+
+
+def _import_key(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    owners = services.public_keys.import_public_keys(args.sources, services.keys.load_private_key(args.user))
+    for owner in owners:
+        sys.stdout.write(f"{owner}\n")
+    return 0
+
+
+def _list_keys(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    owners = services.keys.usernames() if args.local else services.public_keys.owners()
+    for owner in owners:
+        sys.stdout.write(f"{owner}\n")
+    return 0
+
+
+def _compress(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    codec = None if args.codec == "none" else args.codec
+    for source in args.paths:
+        size = source.stat().st_size
+        services.documents.transcode_document(source, source, codec)
+        report = {"path": str(source), "codec": args.codec, "size": size, "new_size": source.stat().st_size}
+        sys.stdout.write(json.dumps(report, ensure_ascii=False) + "\n")
+    return 0
+
+
+def _convert_keys(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    for username in args.usernames or services.keys.usernames():
+        if services.keys.convert_private_key(username, args.format):
+            sys.stdout.write(f"{username}\n")
+    return 0
+
+
+def _verify_batch(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    verifier_public_key = services.keys.load_private_key(args.user).public_key()
+    batch = _batch_service(args, services.crypto)
+
+    counts: Counter[str] = Counter()
+    total_bytes = 0
+    started = time.perf_counter()
+    for result in batch.verify(batch.discover(args.paths), verifier_public_key):
+        counts[result.status] += 1
+        total_bytes += result.size
+        sys.stdout.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    elapsed = time.perf_counter() - started
+
+    total = sum(counts.values())
+    summary = {
+        "documents": total,
+        "bytes": total_bytes,
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(total / elapsed, 1) if elapsed else None,
+        "megabytes_per_second": round(total_bytes / elapsed / 1e6, 1) if elapsed else None,
+        "statuses": dict(counts),
+    }
+    sys.stderr.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    return 0 if counts[VerificationStatus.OK] == total else 1
+
+
+def _catalog_scan(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    verifier_public_key = services.keys.load_private_key(args.user).public_key()
+    batch = _batch_service(args, services.crypto)
+    catalog = CatalogService(catalog_path(args.base_dir), batch, services.public_keys, services.crypto)
+    try:
+        summary = catalog.rescan(args.paths, verifier_public_key, force=args.force)
+        statuses = catalog.status_counts()
+    finally:
+        catalog.close()
+    report = asdict(summary) | {"seconds": round(summary.seconds, 3), "statuses": statuses}
+    sys.stdout.write(json.dumps(report, ensure_ascii=False) + "\n")
+    return 0
+
+
+def _catalog_query(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    batch = BatchVerifyService(store_path=key_store_path(args.base_dir), crypto=services.crypto)
+    catalog = CatalogService(catalog_path(args.base_dir), batch, services.public_keys, services.crypto)
+    try:
+        if args.author is not None:
+            entries = catalog.by_author(args.author)
+            if args.status is not None:
+                entries = [entry for entry in entries if entry.status == args.status]
+        else:
+            entries = catalog.by_status(VerificationStatus(args.status))
+    finally:
+        catalog.close()
+    for entry in entries:
+        sys.stdout.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+    return 0
+
+
+def _bundle_pack(args: argparse.Namespace) -> int:
+    entries = _bundle_service(args).pack(BatchVerifyService.discover(args.paths), args.bundle)
+    sys.stdout.write(f"Упаковано документов: {len(entries)}\n")
+    return 0
+
+
+def _bundle_list(args: argparse.Namespace) -> int:
+    for entry in _bundle_service(args).entries(args.bundle):
+        sys.stdout.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+    return 0
+
+
+def _bundle_extract(args: argparse.Namespace) -> int:
+    bundles = _bundle_service(args)
+    names = args.names or [entry.name for entry in bundles.entries(args.bundle)]
+    args.output.mkdir(parents=True, exist_ok=True)
+    with bundles.batch():
+        for name in names:
+            relative = PurePosixPath(name)
+            if relative.is_absolute() or ".." in relative.parts:
+                raise ValidationError(f"Недопустимое имя документа в пакете: {name}")
+            destination = args.output.joinpath(*relative.parts)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            bundles.extract(args.bundle, name, destination)
+    return 0
+
+
+def _bundle_verify(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    verifier_public_key = services.keys.load_private_key(args.user).public_key()
+    bundles = BundleService(documents=services.documents, public_keys=services.public_keys, writer=services.writer)
+    counts: Counter[str] = Counter()
+    for result in bundles.verify_all(args.bundle, verifier_public_key):
+        counts[result.status] += 1
+        sys.stdout.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    sys.stderr.write(json.dumps({"documents": sum(counts.values()), "statuses": dict(counts)}, ensure_ascii=False) + "\n")
+    return 0 if counts[VerificationStatus.OK] == sum(counts.values()) else 1
+
+
+def _bundle_verify_document(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    verifier_public_key = services.keys.load_private_key(args.user).public_key()
+    bundles = BundleService(documents=services.documents, public_keys=services.public_keys, writer=services.writer)
+    failed = 0
+    for name in args.names:
+        result = bundles.verify(args.bundle, name, verifier_public_key)
+        failed += result.status != VerificationStatus.OK
+        sys.stdout.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    return 0 if not failed else 1
+
+
+def _read_usernames(source: Path) -> list[str]:
+    with source.open(newline="", encoding="utf-8") as stream:
+        rows = [row for row in csv.reader(stream) if row and row[0].strip()]
+    if rows and rows[0][0].strip().lower() == "username":
+        rows = rows[1:]
+    return [row[0] for row in rows]
+
+
+def _provision(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    usernames = list(args.usernames)
+    if args.csv is not None:
+        usernames.extend(_read_usernames(args.csv))
+    provisioning = ProvisioningService(
+        keys=services.keys,
+        public_keys=services.public_keys,
+        crypto=services.crypto,
+        workers=args.workers,
+    )
+    export_dir = args.export_dir or args.base_dir / "data" / "export"
+    report = provisioning.provision(usernames, export_dir)
+    summary = {
+        "created": len(report.created),
+        "skipped": len(report.skipped),
+        "seconds": round(report.seconds, 3),
+        "users_per_second": round(len(report.created) / report.seconds, 1) if report.seconds else None,
+        "export_dir": str(export_dir),
+    }
+    sys.stdout.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    return 0
+
+
+def _import_keys(args: argparse.Namespace) -> int:
+    services = _build_services(args)
+    signer_private_key = services.keys.load_private_key(args.user)
+    key_import = KeyImportService(
+        public_keys=services.public_keys,
+        crypto=services.crypto,
+        workers=args.workers,
+    )
+    report = key_import.import_keys(args.source, signer_private_key)
+    sys.stdout.write(json.dumps(asdict(report) | {"seconds": round(report.seconds, 3)}, ensure_ascii=False) + "\n")
+    return 0 if not report.owner_mismatches and not report.malformed else 1
+
+
+def _serve(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from app.services.signing_daemon import DEFAULT_BATCH_SIZE, SigningDaemon
+
+    services = _build_services(args)
+    daemon = SigningDaemon(
+        keys=services.keys,
+        public_keys=services.public_keys,
+        documents=services.documents,
+        crypto=services.crypto,
+        socket_path=args.socket or daemon_socket_path(args.base_dir),
+        workers=args.workers,
+        batch_size=args.batch_size or DEFAULT_BATCH_SIZE,
+        metrics=args.metrics_registry,
+    )
+    sys.stderr.write(f"Демон слушает {daemon.socket_path}\n")
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _migrate_keyring(args: argparse.Namespace) -> int:
+    _, pk_dir = data_dirs(args.base_dir)
+    keyring = SqliteKeyStore(keyring_path(args.base_dir))
+    try:
+        count = migrate_directory_store(DirectoryKeyStore(pk_dir), keyring)
+        keyring.compact()
+    finally:
+        keyring.close()
+    sys.stdout.write(f"Перенесено ключей: {count}\n")
+    return 0
+
+
+def _compact_keyring(args: argparse.Namespace) -> int:
+    open_key_store(key_store_path(args.base_dir)).compact()
+    return 0
+
+
+def _write_metrics(args: argparse.Namespace) -> None:
+    registry = args.metrics_registry
+    if args.metrics is not None:
+        args.metrics.write_text(registry.export(args.metrics_format), encoding="utf-8")
+    for operation in registry.pending_captures():
+        sys.stderr.write(f"Операция {operation} не выполнялась, профиль не записан\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="app", description="Подписанные документы без графического интерфейса")
+    parser.add_argument("--base-dir", type=Path, default=DEFAULT_BASE_DIR, help="Каталог с data/keys и data/pk")
+    parser.add_argument("--metrics", type=Path, help="Записать метрики операций в файл после выполнения команды")
+    parser.add_argument("--metrics-format", choices=EXPORT_FORMATS, default="prometheus", help="Формат файла метрик")
+    parser.add_argument("--profile", metavar="OPERATION", help="Профилировать первый вызов операции, например crypto.verify_digest")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default="cprofile", help="Режим профилирования")
+    parser.add_argument("--profile-output", type=Path, default=Path("profile.out"), help="Файл отчёта профилирования")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sign = commands.add_parser("sign", help="Подписать текстовые файлы в кодировке UTF-8")
+    sign.add_argument("--user", required=True, help="Автор документа")
+    sign.add_argument("--output", type=Path, help="Файл подписанного документа (по умолчанию рядом с исходным, .sd)")
+    sign.add_argument("--compress", choices=CODECS, help="Сжать текст документа")
+    sign.add_argument("sources", nargs="+", type=Path, help="Текстовые файлы")
+    sign.set_defaults(handler=_sign)
+
+    verify = commands.add_parser("verify", help="Проверить подписи документов в одном процессе")
+    verify.add_argument("--user", required=True, help="Пользователь, которым подписаны импортированные ключи")
+    verify.add_argument("paths", nargs="+", type=Path, help="Файлы .sd или каталоги с ними")
+    verify.set_defaults(handler=_verify, workers=1, cache=False)
+
+    export_key = commands.add_parser("export-key", help="Экспортировать открытый ключ пользователя")
+    export_key.add_argument("--user", required=True, help="Владелец ключа")
+    export_key.add_argument("--output", type=Path, help="Файл открытого ключа (по умолчанию <user>.pub)")
+    export_key.set_defaults(handler=_export_key)
+
+    import_key = commands.add_parser("import-key", help="Импортировать открытые ключи в хранилище")
+    import_key.add_argument("--user", required=True, help="Пользователь, которым подписываются ключи")
+    import_key.add_argument("sources", nargs="+", type=Path, help="Файлы .pub или .spub")
+    import_key.set_defaults(handler=_import_key)
+
+    list_keys = commands.add_parser("list-keys", help="Показать владельцев импортированных открытых ключей")
+    list_keys.add_argument("--local", action="store_true", help="Показать пользователей с закрытыми ключами")
+    list_keys.set_defaults(handler=_list_keys)
+
+    compress = commands.add_parser("compress", help="Сжать или распаковать подписанные документы без переподписи")
+    compress.add_argument("--codec", choices=[*CODECS, "none"], default="zlib", help="Алгоритм сжатия (none - без сжатия)")
+    compress.add_argument("paths", nargs="+", type=Path, help="Файлы .sd")
+    compress.set_defaults(handler=_compress)
+
+    convert_keys = commands.add_parser("convert-keys", help="Перевести закрытые ключи в другой формат хранения")
+    convert_keys.add_argument("--format", choices=KEY_FORMATS, default="binary", help="Формат закрытых ключей")
+    convert_keys.add_argument("usernames", nargs="*", help="Имена пользователей (по умолчанию все)")
+    convert_keys.set_defaults(handler=_convert_keys)
+
+    verify_batch = commands.add_parser("verify-batch", help="Проверить подписи документов в каталогах")
+    verify_batch.add_argument("--user", required=True, help="Пользователь, которым подписаны импортированные ключи")
+    verify_batch.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию все ядра)")
+    verify_batch.add_argument("--cache", action="store_true", help="Использовать кэш результатов проверки")
+    verify_batch.add_argument("paths", nargs="+", type=Path, help="Файлы .sd или каталоги с ними")
+    verify_batch.set_defaults(handler=_verify_batch)
+
+    catalog_scan = commands.add_parser("catalog-scan", help="Обновить каталог документов")
+    catalog_scan.add_argument("--user", required=True, help="Пользователь, которым подписаны импортированные ключи")
+    catalog_scan.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию все ядра)")
+    catalog_scan.add_argument("--cache", action="store_true", help="Использовать кэш результатов проверки")
+    catalog_scan.add_argument("--force", action="store_true", help="Перепроверить все документы")
+    catalog_scan.add_argument("paths", nargs="+", type=Path, help="Файлы .sd или каталоги с ними")
+    catalog_scan.set_defaults(handler=_catalog_scan)
+
+    catalog_query = commands.add_parser("catalog-query", help="Найти документы в каталоге")
+    catalog_query.add_argument("--author", help="Автор документа")
+    catalog_query.add_argument("--status", choices=[str(status) for status in VerificationStatus], help="Результат проверки")
+    catalog_query.set_defaults(handler=_catalog_query)
+
+    bundle_pack = commands.add_parser("bundle-pack", help="Упаковать документы в один файл")
+    bundle_pack.add_argument("bundle", type=Path, help="Файл пакета (.sdb)")
+    bundle_pack.add_argument("paths", nargs="+", type=Path, help="Файлы .sd или каталоги с ними")
+    bundle_pack.set_defaults(handler=_bundle_pack)
+
+    bundle_list = commands.add_parser("bundle-list", help="Показать содержимое пакета документов")
+    bundle_list.add_argument("bundle", type=Path, help="Файл пакета (.sdb)")
+    bundle_list.set_defaults(handler=_bundle_list)
+
+    bundle_extract = commands.add_parser("bundle-extract", help="Извлечь документы из пакета")
+    bundle_extract.add_argument("--output", type=Path, default=Path("."), help="Каталог для извлечённых файлов")
+    bundle_extract.add_argument("bundle", type=Path, help="Файл пакета (.sdb)")
+    bundle_extract.add_argument("names", nargs="*", help="Имена документов (по умолчанию все)")
+    bundle_extract.set_defaults(handler=_bundle_extract)
+
+    bundle_verify = commands.add_parser("bundle-verify", help="Проверить подписи всех документов пакета")
+    bundle_verify.add_argument("--user", required=True, help="Пользователь, которым подписаны импортированные ключи")
+    bundle_verify.add_argument("bundle", type=Path, help="Файл пакета (.sdb)")
+    bundle_verify.set_defaults(handler=_bundle_verify)
+
+    bundle_verify_document = commands.add_parser("bundle-verify-document", help="Проверить подписи отдельных документов пакета")
+    bundle_verify_document.add_argument("--user", required=True, help="Пользователь, которым подписаны импортированные ключи")
+    bundle_verify_document.add_argument("bundle", type=Path, help="Файл пакета (.sdb)")
+    bundle_verify_document.add_argument("names", nargs="+", help="Имена документов")
+    bundle_verify_document.set_defaults(handler=_bundle_verify_document)
+
+    provision = commands.add_parser("provision", help="Создать ключи для списка пользователей")
+    provision.add_argument("--csv", type=Path, help="CSV-файл, имя пользователя в первом столбце")
+    provision.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию все ядра)")
+    provision.add_argument("--export-dir", type=Path, help="Куда сохранить открытые ключи (по умолчанию data/export)")
+    provision.add_argument("--key-format", choices=KEY_FORMATS, default=PEM_KEY_FORMAT, help="Формат новых закрытых ключей")
+    provision.add_argument("usernames", nargs="*", help="Имена пользователей")
+    provision.set_defaults(handler=_provision)
+
+    import_keys = commands.add_parser("import-keys", help="Импортировать открытые ключи из каталога или zip-архива")
+    import_keys.add_argument("--user", required=True, help="Пользователь, которым подписываются ключи")
+    import_keys.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию все ядра)")
+    import_keys.add_argument("source", type=Path, help="Каталог или zip-архив с файлами .pub/.spub")
+    import_keys.set_defaults(handler=_import_keys)
+
+    serve = commands.add_parser("serve", help="Запустить демон подписи и проверки на Unix-сокете")
+    serve.add_argument("--socket", type=Path, help="Путь к сокету (по умолчанию data/daemon.sock)")
+    serve.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию все ядра)")
+    serve.add_argument("--batch-size", type=int, help="Наибольший размер пакета запросов (по умолчанию 64)")
+    serve.add_argument("--compress", choices=CODECS, help="Сжимать текст подписанных документов")
+    serve.set_defaults(handler=_serve)
+
+    migrate_keyring = commands.add_parser("migrate-keyring", help="Перенести ключи из data/pk в data/keyring.sqlite3")
+    migrate_keyring.set_defaults(handler=_migrate_keyring)
+
+    compact_keyring = commands.add_parser("compact-keyring", help="Сжать файл хранилища открытых ключей")
+    compact_keyring.set_defaults(handler=_compact_keyring)
+
+    return parser
+
+
+def _run(args: argparse.Namespace) -> int:
+    try:
+        return args.handler(args)
+    except (AppError, OSError) as error:
+        sys.stderr.write(f"Ошибка: {error}\n")
+        return 2
+
+
+def _run_instrumented(args: argparse.Namespace) -> int:
+    from app.services.instrumentation import MetricsRegistry, instrument_formats
+
+    args.metrics_registry = MetricsRegistry()
+    if args.profile is not None:
+        args.metrics_registry.capture(args.profile, args.profile_mode, args.profile_output)
+    try:
+        with instrument_formats(args.metrics_registry):
+            return _run(args)
+    finally:
+        _write_metrics(args)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "catalog-query" and args.author is None and args.status is None:
+        parser.error("catalog-query: укажите --author или --status")
+    if args.command == "provision" and args.csv is None and not args.usernames:
+        parser.error("provision: укажите --csv или имена пользователей")
+    args.metrics_registry = None
+    if args.metrics is not None or args.profile is not None:
+        return _run_instrumented(args)
+    return _run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+ECDSA_P256_SHA256 = "ecdsa-p256-sha256"
+ED25519PH = "ed25519ph"
+
+DEFAULT_ALGORITHM = ECDSA_P256_SHA256
+LEGACY_ALGORITHM = ECDSA_P256_SHA256
+
+ALGORITHMS = (ECDSA_P256_SHA256, ED25519PH)
+
+ALGORITHM_CODES = {ECDSA_P256_SHA256: 1, ED25519PH: 2}
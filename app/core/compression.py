@@ -0,0 +1,99 @@
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from app.core.exceptions import FormatError
+
+
+ZLIB = "zlib"
+LZMA = "lzma"
+BZ2 = "bz2"
+
+CODECS = (ZLIB, LZMA, BZ2)
+CODEC_CODES = {ZLIB: 1, LZMA: 2, BZ2: 3}
+
+DECOMPRESSED_CHUNK_SIZE = 1 << 20
+
+_CORRUPTED = "Поврежденные сжатые данные документа"
+
+
+def _check_codec(codec: str) -> None:
+    if codec not in CODEC_CODES:
+        raise FormatError(f"Неподдерживаемый алгоритм сжатия: {codec}")
+
+
+def new_compressor(codec: str) -> Any:
+    _check_codec(codec)
+    if codec == ZLIB:
+        return zlib.compressobj(6)
+    if codec == LZMA:
+        import lzma
+
+        return lzma.LZMACompressor(preset=6)
+    import bz2
+
+    return bz2.BZ2Compressor(9)
+
+
+def iter_compressed(codec: str, chunks: Iterable[bytes | memoryview]) -> Iterator[bytes]:
+    compressor = new_compressor(codec)
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    if data := compressor.flush():
+        yield data
+
+
+def iter_decompressed(
+    codec: str,
+    chunks: Iterable[bytes | memoryview],
+    chunk_size: int = DECOMPRESSED_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    _check_codec(codec)
+    if codec == ZLIB:
+        try:
+            yield from _iter_zlib(chunks, chunk_size)
+        except zlib.error as error:
+            raise FormatError(_CORRUPTED) from error
+        return
+    if codec == LZMA:
+        import lzma
+
+        decompressor, errors = lzma.LZMADecompressor(), (lzma.LZMAError, EOFError)
+    else:
+        import bz2
+
+        decompressor, errors = bz2.BZ2Decompressor(), (OSError, EOFError)
+    try:
+        yield from _iter_stream(decompressor, chunks, chunk_size)
+    except errors as error:
+        raise FormatError(_CORRUPTED) from error
+
+
+def _iter_zlib(chunks: Iterable[bytes | memoryview], chunk_size: int) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj()
+    for chunk in chunks:
+        if decompressor.eof:
+            raise FormatError(_CORRUPTED)
+        data: bytes | memoryview = chunk
+        while data:
+            if output := decompressor.decompress(data, chunk_size):
+                yield output
+            data = decompressor.unconsumed_tail
+    if not decompressor.eof or decompressor.unused_data:
+        raise FormatError(_CORRUPTED)
+
+
+def _iter_stream(decompressor: Any, chunks: Iterable[bytes | memoryview], chunk_size: int) -> Iterator[bytes]:
+    for chunk in chunks:
+        if decompressor.eof:
+            raise FormatError(_CORRUPTED)
+        output = decompressor.decompress(chunk, chunk_size)
+        while True:
+            if output:
+                yield output
+            if decompressor.eof or decompressor.needs_input:
+                break
+            output = decompressor.decompress(b"", chunk_size)
+    if not decompressor.eof or decompressor.unused_data:
+        raise FormatError(_CORRUPTED)
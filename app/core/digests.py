@@ -0,0 +1,14 @@
+import hashlib
+from pathlib import Path
+
+
+CONTENT_DIGEST_SIZE = 32
+
+
+def new_content_digest() -> hashlib.blake2b:
+    return hashlib.blake2b(digest_size=CONTENT_DIGEST_SIZE)
+
+
+def content_digest(path: Path) -> bytes:
+    with path.open("rb") as stream:
+        return hashlib.file_digest(stream, new_content_digest).digest()
@@ -16,3 +16,7 @@ class FormatError(AppError):
 
 class StorageError(AppError):
     pass
+
+
+class OperationCancelledError(AppError):
+    pass
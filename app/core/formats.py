@@ -1,81 +1,568 @@
+import codecs
 import struct
+from collections.abc import Callable, Iterable, Iterator
+from typing import BinaryIO, TypeVar
 
+from app.core.algorithms import ALGORITHM_CODES, LEGACY_ALGORITHM
+from app.core.compression import CODEC_CODES, iter_compressed, iter_decompressed
 from app.core.exceptions import FormatError
-from app.core.models import PublicKeyBlob, SignedDocument, SignedPublicKeyBlob
+from app.core.merkle import build_tree, encode_tree, iter_fixed_chunks, leaf_count, leaf_hash, tree_size
+from app.core.models import (
+    BundleEntry,
+    ContainerHeader,
+    FileKind,
+    PublicKeyBlob,
+    SignedDocument,
+    SignedDocumentHeader,
+    SignedPublicKeyBlob,
+)
 
 
+T = TypeVar("T")
+
 _LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">4sBBHHQ")
+_CHUNKING = struct.Struct(">IQ")
+_COMPRESSION = struct.Struct(">BQ")
+_BUNDLE_PREFIX = struct.Struct(">4sB")
+_BUNDLE_ENTRY = struct.Struct(">QQH")
+_BUNDLE_FOOTER = struct.Struct(">QQ4s")
+_PRIVATE_KEY = struct.Struct(">4sBBH")
+
+DOCUMENT_MAGIC = b"SDOC"
+PUBLIC_KEY_MAGIC = b"PUBK"
+SIGNED_PUBLIC_KEY_MAGIC = b"SPUB"
+CHUNKED_DOCUMENT_MAGIC = b"MDOC"
+COMPRESSED_DOCUMENT_MAGIC = b"ZDOC"
+BUNDLE_MAGIC = b"SBDL"
+_BUNDLE_INDEX_MAGIC = b"SBDI"
+PRIVATE_KEY_MAGIC = b"SKEY"
+FORMAT_VERSION = 2
+
+HEADER_PEEK_SIZE = 512
+TEXT_CHUNK_SIZE = 1 << 20
+
+_MAGICS = {
+    DOCUMENT_MAGIC: FileKind.DOCUMENT,
+    PUBLIC_KEY_MAGIC: FileKind.PUBLIC_KEY,
+    SIGNED_PUBLIC_KEY_MAGIC: FileKind.SIGNED_PUBLIC_KEY,
+    CHUNKED_DOCUMENT_MAGIC: FileKind.CHUNKED_DOCUMENT,
+    COMPRESSED_DOCUMENT_MAGIC: FileKind.COMPRESSED_DOCUMENT,
+    BUNDLE_MAGIC: FileKind.BUNDLE,
+}
+_NAME_ERRORS = {
+    FileKind.DOCUMENT: "Некорректная кодировка документа",
+    FileKind.PUBLIC_KEY: "Некорректная кодировка имени владельца ключа",
+    FileKind.SIGNED_PUBLIC_KEY: "Некорректная кодировка имени владельца ключа",
+    FileKind.CHUNKED_DOCUMENT: "Некорректная кодировка документа",
+    FileKind.COMPRESSED_DOCUMENT: "Некорректная кодировка документа",
+    FileKind.BUNDLE: "Некорректная кодировка имени документа в пакете",
+}
+_ALGORITHMS_BY_CODE = {code: name for name, code in ALGORITHM_CODES.items()}
+_CODECS_BY_CODE = {code: name for name, code in CODEC_CODES.items()}
+
+
+class _TruncatedError(FormatError):
+    def __init__(self, needed: int) -> None:
+        super().__init__("Поврежденный формат файла")
+        self.needed = needed
 
 
 def _pack_part(data: bytes) -> bytes:
     return _LENGTH.pack(len(data)) + data
 
 
-def _read_part(buffer: bytes, offset: int) -> tuple[bytes, int]:
+def _read_part(buffer: bytes | memoryview, offset: int) -> tuple[bytes, int]:
     if offset + _LENGTH.size > len(buffer):
-        raise FormatError("Поврежденный формат файла")
+        raise _TruncatedError(offset + _LENGTH.size)
     size = _LENGTH.unpack(buffer[offset : offset + _LENGTH.size])[0]
     offset += _LENGTH.size
     end = offset + size
     if end > len(buffer):
+        raise _TruncatedError(end)
+    return bytes(buffer[offset:end]), end
+
+
+def _decode_text(raw: bytes, message: str) -> str:
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError as error:
+        raise FormatError(message) from error
+
+
+def _encode_header(magic: bytes, algorithm: str | None, name: str, signature: bytes, body_length: int) -> bytes:
+    name_raw = name.encode("utf-8")
+    if len(name_raw) > 0xFFFF or len(signature) > 0xFFFF:
+        raise FormatError("Слишком длинный заголовок файла")
+    if algorithm is None:
+        code = 0
+    elif algorithm in ALGORITHM_CODES:
+        code = ALGORITHM_CODES[algorithm]
+    else:
+        raise FormatError(f"Неподдерживаемый алгоритм подписи: {algorithm}")
+    header = _HEADER.pack(magic, FORMAT_VERSION, code, len(name_raw), len(signature), body_length)
+    return header + name_raw + signature
+
+
+def _decode_header(buffer: bytes | memoryview, total_size: int) -> ContainerHeader:
+    if len(buffer) < _HEADER.size:
+        raise _TruncatedError(_HEADER.size)
+    magic, version, code, name_length, signature_length, body_length = _HEADER.unpack_from(buffer)
+    kind = _MAGICS.get(magic)
+    if kind is None:
+        raise FormatError("Неизвестный формат файла")
+    if version != FORMAT_VERSION:
+        raise FormatError(f"Неподдерживаемая версия формата: {version}")
+    if code and code not in _ALGORITHMS_BY_CODE:
+        raise FormatError(f"Неподдерживаемый алгоритм подписи: {code}")
+    name_end = _HEADER.size + name_length
+    body_offset = name_end + signature_length
+    if body_offset > len(buffer):
+        raise _TruncatedError(body_offset)
+    if body_offset + body_length != total_size:
         raise FormatError("Поврежденный формат файла")
-    return buffer[offset:end], end
+    return ContainerHeader(
+        kind=kind,
+        version=version,
+        algorithm=_ALGORITHMS_BY_CODE.get(code),
+        name=_decode_text(bytes(buffer[_HEADER.size : name_end]), _NAME_ERRORS[kind]),
+        signature=bytes(buffer[name_end:body_offset]),
+        body_offset=body_offset,
+        body_length=body_length,
+    )
 
 
-def encode_signed_document(document: SignedDocument) -> bytes:
-    author_raw = document.author.encode("utf-8")
-    text_raw = document.text.encode("utf-8")
-    return b"".join(
-        [
-            _pack_part(author_raw),
-            _pack_part(document.signature),
-            text_raw,
-        ]
+def _version(buffer: bytes | memoryview) -> int:
+    if len(buffer) <= len(DOCUMENT_MAGIC):
+        raise _TruncatedError(len(DOCUMENT_MAGIC) + 1)
+    return buffer[len(DOCUMENT_MAGIC)]
+
+
+def _read_with_peek(stream: BinaryIO, total_size: int, decode: Callable[[bytes, int], T]) -> T:
+    buffer = stream.read(HEADER_PEEK_SIZE)
+    while True:
+        try:
+            return decode(buffer, total_size)
+        except _TruncatedError as error:
+            missing = error.needed - len(buffer)
+            if error.needed > total_size or missing <= 0:
+                raise FormatError("Поврежденный формат файла") from None
+            more = stream.read(missing)
+            if len(more) != missing:
+                raise FormatError("Поврежденный формат файла") from None
+            buffer += more
+
+
+def detect_format(prefix: bytes | memoryview) -> FileKind | None:
+    return _MAGICS.get(bytes(prefix[: len(DOCUMENT_MAGIC)]))
+
+
+def decode_container_header(prefix: bytes | memoryview, total_size: int) -> ContainerHeader:
+    return _decode_header(prefix, total_size)
+
+
+def read_container_header(stream: BinaryIO, total_size: int) -> ContainerHeader:
+    return _read_with_peek(stream, total_size, _decode_header)
+
+
+def iter_encoded_text(text: str, chunk_size: int = TEXT_CHUNK_SIZE) -> Iterator[bytes]:
+    for start in range(0, len(text), chunk_size):
+        yield text[start : start + chunk_size].encode("utf-8")
+
+
+def iter_buffer_chunks(buffer: memoryview, chunk_size: int = TEXT_CHUNK_SIZE) -> Iterator[memoryview]:
+    for start in range(0, len(buffer), chunk_size):
+        with buffer[start : start + chunk_size] as chunk:
+            yield chunk
+
+
+def encode_signed_document_header(author: str, signature: bytes, algorithm: str, text_length: int) -> bytes:
+    return _encode_header(DOCUMENT_MAGIC, algorithm, author, signature, text_length)
+
+
+def encode_chunked_document_header(
+    author: str,
+    signature: bytes,
+    algorithm: str,
+    chunk_size: int,
+    text_length: int,
+    tree: bytes,
+) -> bytes:
+    if not 0 < chunk_size <= 0xFFFFFFFF:
+        raise FormatError("Некорректный размер блока документа")
+    if len(tree) != tree_size(leaf_count(text_length, chunk_size)):
+        raise FormatError("Некорректное дерево хешей документа")
+    body_length = _CHUNKING.size + len(tree) + text_length
+    header = _encode_header(CHUNKED_DOCUMENT_MAGIC, algorithm, author, signature, body_length)
+    return header + _CHUNKING.pack(chunk_size, text_length) + tree
+
+
+def encode_chunked_signing_payload(chunk_size: int, text_length: int, root: bytes) -> bytes:
+    return CHUNKED_DOCUMENT_MAGIC + _CHUNKING.pack(chunk_size, text_length) + root
+
+
+def encode_compressed_document_header(
+    author: str,
+    signature: bytes,
+    algorithm: str,
+    codec: str,
+    text_length: int,
+    compressed_length: int,
+) -> bytes:
+    code = CODEC_CODES.get(codec)
+    if code is None:
+        raise FormatError(f"Неподдерживаемый алгоритм сжатия: {codec}")
+    body_length = _COMPRESSION.size + compressed_length
+    header = _encode_header(COMPRESSED_DOCUMENT_MAGIC, algorithm, author, signature, body_length)
+    return header + _COMPRESSION.pack(code, text_length)
+
+
+def write_document(stream: BinaryIO, header: bytes, text_length: int, text_chunks: Iterable[bytes]) -> None:
+    stream.write(header)
+    written = 0
+    for chunk in text_chunks:
+        stream.write(chunk)
+        written += len(chunk)
+    if written != text_length:
+        raise FormatError("Размер текста документа изменился во время записи")
+
+
+def write_signed_document(
+    stream: BinaryIO,
+    author: str,
+    signature: bytes,
+    algorithm: str,
+    text_length: int,
+    text_chunks: Iterable[bytes],
+) -> None:
+    header = encode_signed_document_header(author, signature, algorithm, text_length)
+    write_document(stream, header, text_length, text_chunks)
+
+
+def write_compressed_document(
+    stream: BinaryIO,
+    author: str,
+    signature: bytes,
+    algorithm: str,
+    codec: str,
+    text_length: int,
+    text_chunks: Iterable[bytes],
+) -> None:
+    start = stream.tell()
+    header = encode_compressed_document_header(author, signature, algorithm, codec, text_length, 0)
+    stream.write(header)
+    written = 0
+    compressed_length = 0
+
+    def counted() -> Iterator[bytes]:
+        nonlocal written
+        for chunk in text_chunks:
+            written += len(chunk)
+            yield chunk
+
+    for data in iter_compressed(codec, counted()):
+        stream.write(data)
+        compressed_length += len(data)
+    if written != text_length:
+        raise FormatError("Размер текста документа изменился во время записи")
+    end = stream.tell()
+    stream.seek(start)
+    stream.write(encode_compressed_document_header(author, signature, algorithm, codec, text_length, compressed_length))
+    stream.seek(end)
+
+
+def read_signed_document_header(stream: BinaryIO, total_size: int) -> SignedDocumentHeader:
+    return _read_with_peek(stream, total_size, decode_signed_document_header)
+
+
+def decode_signed_document_header(payload: bytes | memoryview, total_size: int | None = None) -> SignedDocumentHeader:
+    if total_size is None:
+        total_size = len(payload)
+    kind = detect_format(payload)
+    if kind is None:
+        return _decode_legacy_document_header(payload, total_size)
+    if kind is FileKind.CHUNKED_DOCUMENT:
+        return _decode_chunked_document_header(payload, total_size)
+    if kind is FileKind.COMPRESSED_DOCUMENT:
+        return _decode_compressed_document_header(payload, total_size)
+    if kind is not FileKind.DOCUMENT:
+        raise FormatError("Файл не является подписанным документом")
+    header = _decode_header(payload, total_size)
+    if header.algorithm is None:
+        raise FormatError("Не указан алгоритм подписи документа")
+    return SignedDocumentHeader(
+        author=header.name,
+        signature=header.signature,
+        text_offset=header.body_offset,
+        text_length=header.body_length,
+        algorithm=header.algorithm,
+    )
+
+
+def _decode_chunked_document_header(payload: bytes | memoryview, total_size: int) -> SignedDocumentHeader:
+    header = _decode_header(payload, total_size)
+    if header.algorithm is None:
+        raise FormatError("Не указан алгоритм подписи документа")
+    tree_offset = header.body_offset + _CHUNKING.size
+    if tree_offset > len(payload):
+        raise _TruncatedError(tree_offset)
+    chunk_size, text_length = _CHUNKING.unpack_from(payload, header.body_offset)
+    if chunk_size == 0:
+        raise FormatError("Некорректный размер блока документа")
+    text_offset = tree_offset + tree_size(leaf_count(text_length, chunk_size))
+    if text_offset + text_length != total_size:
+        raise FormatError("Поврежденный формат файла")
+    return SignedDocumentHeader(
+        author=header.name,
+        signature=header.signature,
+        text_offset=text_offset,
+        text_length=text_length,
+        algorithm=header.algorithm,
+        chunk_size=chunk_size,
+        tree_offset=tree_offset,
+    )
+
+
+def _decode_compressed_document_header(payload: bytes | memoryview, total_size: int) -> SignedDocumentHeader:
+    header = _decode_header(payload, total_size)
+    if header.algorithm is None:
+        raise FormatError("Не указан алгоритм подписи документа")
+    text_offset = header.body_offset + _COMPRESSION.size
+    if text_offset > len(payload):
+        raise _TruncatedError(text_offset)
+    if header.body_length < _COMPRESSION.size:
+        raise FormatError("Поврежденный формат файла")
+    code, text_length = _COMPRESSION.unpack_from(payload, header.body_offset)
+    codec = _CODECS_BY_CODE.get(code)
+    if codec is None:
+        raise FormatError(f"Неподдерживаемый алгоритм сжатия: {code}")
+    return SignedDocumentHeader(
+        author=header.name,
+        signature=header.signature,
+        text_offset=text_offset,
+        text_length=text_length,
+        algorithm=header.algorithm,
+        compression=codec,
+        compressed_length=header.body_length - _COMPRESSION.size,
     )
 
 
-def decode_signed_document(payload: bytes) -> SignedDocument:
+def iter_document_text(
+    text: memoryview,
+    header: SignedDocumentHeader,
+    chunk_size: int = TEXT_CHUNK_SIZE,
+) -> Iterator[bytes | memoryview]:
+    if header.compression is None:
+        yield from iter_buffer_chunks(text, chunk_size)
+        return
+    text_length = 0
+    compressed = iter_buffer_chunks(text, chunk_size)
+    try:
+        for chunk in iter_decompressed(header.compression, compressed, chunk_size):
+            text_length += len(chunk)
+            if text_length > header.text_length:
+                raise FormatError("Поврежденные сжатые данные документа")
+            yield chunk
+    finally:
+        compressed.close()
+    if text_length != header.text_length:
+        raise FormatError("Поврежденные сжатые данные документа")
+
+
+def stored_text_length(header: SignedDocumentHeader) -> int:
+    return header.compressed_length if header.compression else header.text_length
+
+
+def _decode_legacy_document_header(payload: bytes | memoryview, total_size: int) -> SignedDocumentHeader:
     author_raw, offset = _read_part(payload, 0)
     signature_raw, offset = _read_part(payload, offset)
-    text_raw = payload[offset:]
-    try:
-        author = author_raw.decode("utf-8")
-        text = text_raw.decode("utf-8")
-    except UnicodeDecodeError as error:
-        raise FormatError("Некорректная кодировка документа") from error
-    return SignedDocument(author=author, signature=signature_raw, text=text)
+    return SignedDocumentHeader(
+        author=_decode_text(author_raw, _NAME_ERRORS[FileKind.DOCUMENT]),
+        signature=signature_raw,
+        text_offset=offset,
+        text_length=total_size - offset,
+        algorithm=LEGACY_ALGORITHM,
+    )
 
 
-def encode_public_key_blob(blob: PublicKeyBlob) -> bytes:
+def encode_signed_document(document: SignedDocument) -> bytes:
+    text_raw = document.text.encode("utf-8")
+    if document.chunk_size:
+        leaves = [leaf_hash(chunk) for chunk in iter_fixed_chunks([text_raw], document.chunk_size)]
+        header = encode_chunked_document_header(
+            document.author,
+            document.signature,
+            document.algorithm,
+            document.chunk_size,
+            len(text_raw),
+            encode_tree(build_tree(leaves)),
+        )
+    elif document.compression:
+        compressed = b"".join(iter_compressed(document.compression, [text_raw]))
+        header = encode_compressed_document_header(
+            document.author,
+            document.signature,
+            document.algorithm,
+            document.compression,
+            len(text_raw),
+            len(compressed),
+        )
+        return header + compressed
+    else:
+        header = encode_signed_document_header(document.author, document.signature, document.algorithm, len(text_raw))
+    return header + text_raw
+
+
+def decode_signed_document(payload: bytes | memoryview) -> SignedDocument:
+    with memoryview(payload) as view:
+        header = decode_signed_document_header(view)
+        try:
+            if header.compression:
+                with view[header.text_offset :] as body:
+                    decoder = codecs.getincrementaldecoder("utf-8")()
+                    parts = [decoder.decode(chunk) for chunk in iter_document_text(body, header)]
+                    parts.append(decoder.decode(b"", final=True))
+                    text = "".join(parts)
+            else:
+                text = str(view[header.text_offset :], "utf-8")
+        except UnicodeDecodeError as error:
+            raise FormatError("Некорректная кодировка документа") from error
+    return SignedDocument(
+        author=header.author,
+        signature=header.signature,
+        text=text,
+        algorithm=header.algorithm,
+        chunk_size=header.chunk_size,
+        compression=header.compression,
+    )
+
+
+def encode_bundle_prefix() -> bytes:
+    return _BUNDLE_PREFIX.pack(BUNDLE_MAGIC, FORMAT_VERSION)
+
+
+def encode_bundle_index(entries: list[BundleEntry], index_offset: int) -> bytes:
+    parts = []
+    for entry in entries:
+        name_raw = entry.name.encode("utf-8")
+        if len(name_raw) > 0xFFFF:
+            raise FormatError("Слишком длинное имя документа в пакете")
+        parts.append(_BUNDLE_ENTRY.pack(entry.offset, entry.length, len(name_raw)) + name_raw)
+    parts.append(_BUNDLE_FOOTER.pack(index_offset, len(entries), _BUNDLE_INDEX_MAGIC))
+    return b"".join(parts)
+
+
+def decode_bundle_index(buffer: bytes | memoryview) -> list[BundleEntry]:
+    total_size = len(buffer)
+    if total_size < _BUNDLE_PREFIX.size + _BUNDLE_FOOTER.size:
+        raise FormatError("Поврежденный формат пакета документов")
+    magic, version = _BUNDLE_PREFIX.unpack_from(buffer)
+    if magic != BUNDLE_MAGIC:
+        raise FormatError("Файл не является пакетом документов")
+    if version != FORMAT_VERSION:
+        raise FormatError(f"Неподдерживаемая версия формата: {version}")
+    footer_offset = total_size - _BUNDLE_FOOTER.size
+    index_offset, count, index_magic = _BUNDLE_FOOTER.unpack_from(buffer, footer_offset)
+    if index_magic != _BUNDLE_INDEX_MAGIC or not _BUNDLE_PREFIX.size <= index_offset <= footer_offset:
+        raise FormatError("Поврежденный формат пакета документов")
+
+    entries = []
+    offset = index_offset
+    for _ in range(count):
+        if offset + _BUNDLE_ENTRY.size > footer_offset:
+            raise FormatError("Поврежденный формат пакета документов")
+        entry_offset, length, name_length = _BUNDLE_ENTRY.unpack_from(buffer, offset)
+        offset += _BUNDLE_ENTRY.size
+        if offset + name_length > footer_offset or entry_offset < _BUNDLE_PREFIX.size:
+            raise FormatError("Поврежденный формат пакета документов")
+        if entry_offset + length > index_offset:
+            raise FormatError("Поврежденный формат пакета документов")
+        name = _decode_text(bytes(buffer[offset : offset + name_length]), _NAME_ERRORS[FileKind.BUNDLE])
+        entries.append(BundleEntry(name=name, offset=entry_offset, length=length))
+        offset += name_length
+    if offset != footer_offset:
+        raise FormatError("Поврежденный формат пакета документов")
+    return entries
+
+
+def encode_public_key_signing_payload(blob: PublicKeyBlob) -> bytes:
     owner_raw = blob.owner.encode("utf-8")
     return b"".join([_pack_part(owner_raw), _pack_part(blob.key_blob)])
 
 
+def encode_public_key_blob(blob: PublicKeyBlob) -> bytes:
+    return _encode_header(PUBLIC_KEY_MAGIC, None, blob.owner, b"", len(blob.key_blob)) + blob.key_blob
+
+
 def decode_public_key_blob(payload: bytes) -> PublicKeyBlob:
+    kind = detect_format(payload)
+    if kind is FileKind.PUBLIC_KEY:
+        header = _decode_header(payload, len(payload))
+        return PublicKeyBlob(owner=header.name, key_blob=payload[header.body_offset :])
+    if kind is not None:
+        raise FormatError("Файл не является открытым ключом")
+
     owner_raw, offset = _read_part(payload, 0)
     key_blob, offset = _read_part(payload, offset)
     if offset != len(payload):
         raise FormatError("Лишние данные в файле открытого ключа")
-    try:
-        owner = owner_raw.decode("utf-8")
-    except UnicodeDecodeError as error:
-        raise FormatError("Некорректная кодировка имени владельца ключа") from error
+    owner = _decode_text(owner_raw, _NAME_ERRORS[FileKind.PUBLIC_KEY])
     return PublicKeyBlob(owner=owner, key_blob=key_blob)
 
 
 def encode_signed_public_key_blob(blob: SignedPublicKeyBlob) -> bytes:
-    owner_raw = blob.owner.encode("utf-8")
-    return b"".join([_pack_part(owner_raw), _pack_part(blob.key_blob), blob.signature])
+    header = _encode_header(SIGNED_PUBLIC_KEY_MAGIC, blob.algorithm, blob.owner, blob.signature, len(blob.key_blob))
+    return header + blob.key_blob
 
 
 def decode_signed_public_key_blob(payload: bytes) -> SignedPublicKeyBlob:
+    kind = detect_format(payload)
+    if kind is FileKind.SIGNED_PUBLIC_KEY and _version(payload) == FORMAT_VERSION:
+        header = _decode_header(payload, len(payload))
+        if not header.signature or header.algorithm is None:
+            raise FormatError("Отсутствует подпись открытого ключа")
+        return SignedPublicKeyBlob(
+            owner=header.name,
+            key_blob=payload[header.body_offset :],
+            signature=header.signature,
+            algorithm=header.algorithm,
+        )
+    if kind is FileKind.SIGNED_PUBLIC_KEY:
+        raise FormatError(f"Неподдерживаемая версия формата: {_version(payload)}")
+    if kind is not None:
+        raise FormatError("Файл не является подписанным открытым ключом")
+
     owner_raw, offset = _read_part(payload, 0)
     key_blob, offset = _read_part(payload, offset)
     signature = payload[offset:]
     if not signature:
         raise FormatError("Отсутствует подпись открытого ключа")
-    try:
-        owner = owner_raw.decode("utf-8")
-    except UnicodeDecodeError as error:
-        raise FormatError("Некорректная кодировка имени владельца ключа") from error
-    return SignedPublicKeyBlob(owner=owner, key_blob=key_blob, signature=signature)
+    owner = _decode_text(owner_raw, _NAME_ERRORS[FileKind.SIGNED_PUBLIC_KEY])
+    return SignedPublicKeyBlob(owner=owner, key_blob=key_blob, signature=signature, algorithm=LEGACY_ALGORITHM)
+
+
+def encode_private_key_record(algorithm: str, secret: bytes) -> bytes:
+    code = ALGORITHM_CODES.get(algorithm)
+    if code is None:
+        raise FormatError(f"Неподдерживаемый алгоритм подписи: {algorithm}")
+    return _PRIVATE_KEY.pack(PRIVATE_KEY_MAGIC, FORMAT_VERSION, code, len(secret)) + secret
+
+
+def is_private_key_record(payload: bytes) -> bool:
+    return payload[: len(PRIVATE_KEY_MAGIC)] == PRIVATE_KEY_MAGIC
+
+
+def decode_private_key_record(payload: bytes) -> tuple[str, bytes]:
+    if len(payload) < _PRIVATE_KEY.size:
+        raise FormatError("Поврежденный файл закрытого ключа")
+    magic, version, code, secret_length = _PRIVATE_KEY.unpack_from(payload)
+    if magic != PRIVATE_KEY_MAGIC:
+        raise FormatError("Файл не является закрытым ключом")
+    if version != FORMAT_VERSION:
+        raise FormatError(f"Неподдерживаемая версия формата: {version}")
+    algorithm = _ALGORITHMS_BY_CODE.get(code)
+    if algorithm is None:
+        raise FormatError(f"Неподдерживаемый алгоритм подписи: {code}")
+    if len(payload) != _PRIVATE_KEY.size + secret_length:
+        raise FormatError("Поврежденный файл закрытого ключа")
+    return algorithm, payload[_PRIVATE_KEY.size :]
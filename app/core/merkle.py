@@ -0,0 +1,91 @@
+import hashlib
+from collections.abc import Callable, Iterable, Iterator
+
+
+MERKLE_HASH_SIZE = 32
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(chunk: bytes | memoryview) -> bytes:
+    digest = hashlib.sha256(_LEAF_PREFIX)
+    digest.update(chunk)
+    return digest.digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def leaf_count(text_length: int, chunk_size: int) -> int:
+    return max(1, -(-text_length // chunk_size))
+
+
+def level_sizes(leaves: int) -> list[int]:
+    sizes = [leaves]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def tree_size(leaves: int) -> int:
+    return sum(level_sizes(leaves)) * MERKLE_HASH_SIZE
+
+
+def node_offset(leaves: int, level: int, index: int) -> int:
+    return (sum(level_sizes(leaves)[:level]) + index) * MERKLE_HASH_SIZE
+
+
+def build_tree(leaves: list[bytes]) -> list[list[bytes]]:
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parents = [node_hash(current[index], current[index + 1]) for index in range(0, len(current) - 1, 2)]
+        if len(current) % 2:
+            parents.append(current[-1])
+        levels.append(parents)
+    return levels
+
+
+def encode_tree(levels: list[list[bytes]]) -> bytes:
+    return b"".join(node for level in levels for node in level)
+
+
+def iter_fixed_chunks(chunks: Iterable[bytes | memoryview], chunk_size: int) -> Iterator[bytes]:
+    pending = b""
+    produced = False
+    for chunk in chunks:
+        data = pending + chunk
+        start = 0
+        while len(data) - start >= chunk_size:
+            yield data[start : start + chunk_size]
+            start += chunk_size
+            produced = True
+        pending = data[start:]
+    if pending or not produced:
+        yield pending
+
+
+def root_from_range(
+    leaves: int,
+    first: int,
+    range_leaves: list[bytes],
+    read_node: Callable[[int, int], bytes],
+) -> bytes:
+    known = list(range_leaves)
+    low = first
+    for level, size in enumerate(level_sizes(leaves)[:-1]):
+        if low % 2:
+            known.insert(0, read_node(level, low - 1))
+            low -= 1
+        high = low + len(known) - 1
+        if high % 2 == 0 and high + 1 < size:
+            known.append(read_node(level, high + 1))
+        parents = [node_hash(known[index], known[index + 1]) for index in range(0, len(known) - 1, 2)]
+        if len(known) % 2:
+            parents.append(known[-1])
+        known = parents
+        low //= 2
+    return known[0]
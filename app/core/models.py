@@ -1,4 +1,34 @@
+from collections.abc import Callable
 from dataclasses import dataclass
+from enum import StrEnum
+
+from app.core.algorithms import LEGACY_ALGORITHM
+
+
+ProgressCallback = Callable[[int, int], None]
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+EXPORT_FORMATS = ("prometheus", "json")
+
+
+class FileKind(StrEnum):
+    DOCUMENT = "document"
+    PUBLIC_KEY = "public_key"
+    SIGNED_PUBLIC_KEY = "signed_public_key"
+    CHUNKED_DOCUMENT = "chunked_document"
+    COMPRESSED_DOCUMENT = "compressed_document"
+    BUNDLE = "bundle"
+
+
+@dataclass(slots=True)
+class ContainerHeader:
+    kind: FileKind
+    version: int
+    algorithm: str | None
+    name: str
+    signature: bytes
+    body_offset: int
+    body_length: int
 
 
 @dataclass(slots=True)
@@ -6,6 +36,9 @@ class SignedDocument:
     author: str
     signature: bytes
     text: str
+    algorithm: str = LEGACY_ALGORITHM
+    chunk_size: int = 0
+    compression: str | None = None
 
 
 @dataclass(slots=True)
@@ -19,3 +52,97 @@ class SignedPublicKeyBlob:
     owner: str
     key_blob: bytes
     signature: bytes
+    algorithm: str = LEGACY_ALGORITHM
+
+
+@dataclass(slots=True)
+class SignedDocumentHeader:
+    author: str
+    signature: bytes
+    text_offset: int
+    text_length: int
+    algorithm: str = LEGACY_ALGORITHM
+    chunk_size: int = 0
+    tree_offset: int = 0
+    compression: str | None = None
+    compressed_length: int = 0
+
+
+class VerificationStatus(StrEnum):
+    OK = "ok"
+    BAD_SIGNATURE = "bad_signature"
+    UNKNOWN_AUTHOR = "unknown_author"
+    FORMAT_ERROR = "format_error"
+    IO_ERROR = "io_error"
+
+
+@dataclass(slots=True)
+class VerificationResult:
+    path: str
+    status: VerificationStatus
+    size: int = 0
+    author: str | None = None
+    message: str | None = None
+    digest: str | None = None
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    capacity: int
+
+
+@dataclass(slots=True)
+class CatalogEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    author: str | None
+    digest: str | None
+    status: VerificationStatus
+    message: str | None
+    verified_at: float
+
+
+@dataclass(slots=True)
+class RescanSummary:
+    scanned: int
+    unchanged: int
+    updated: int
+    removed: int
+    seconds: float
+
+
+@dataclass(slots=True)
+class ProvisionReport:
+    created: list[str]
+    skipped: list[str]
+    seconds: float
+
+
+@dataclass(slots=True)
+class KeyImportReport:
+    imported: list[str]
+    duplicates: list[str]
+    owner_mismatches: list[str]
+    malformed: dict[str, str]
+    seconds: float
+
+
+@dataclass(slots=True)
+class BundleEntry:
+    name: str
+    offset: int
+    length: int
+
+
+@dataclass(slots=True)
+class OperationStats:
+    operation: str
+    count: int
+    errors: int
+    bytes: int
+    seconds: float
+    buckets: dict[str, int]
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from app.core.exceptions import AppError, FormatError
+from app.core.models import SignedDocument, SignedDocumentHeader, VerificationResult, VerificationStatus
+from app.services.atomic_writer import AtomicWriter
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.public_key_service import PublicKeyService
+from app.services.verification_cache import VerificationCache
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+T = TypeVar("T")
+
+_worker_crypto: CryptoService | None = None
+_worker_documents: DocumentService | None = None
+
+
+def _init_worker(chunk_size: int, compression: str | None, cache_path: Path | None, durable: bool) -> None:
+    global _worker_crypto, _worker_documents
+    _worker_crypto = CryptoService()
+    _worker_documents = DocumentService(
+        crypto=_worker_crypto,
+        cache=VerificationCache(cache_path) if cache_path is not None else None,
+        chunk_size=chunk_size,
+        compression=compression,
+        writer=AtomicWriter(durable=durable),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _load_key(payload: bytes) -> ECC.EccKey:
+    assert _worker_crypto is not None
+    return _worker_crypto.load_public_key(payload)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_private_key(payload: bytes) -> ECC.EccKey:
+    assert _worker_crypto is not None
+    return _worker_crypto.load_private_key(payload)
+
+
+def _verify_file_in_worker(source: str, header: SignedDocumentHeader, key_blob: bytes) -> bool:
+    assert _worker_documents is not None
+    return _worker_documents.verify_document_file(Path(source), header, _load_key(key_blob))
+
+
+def _verify_document_in_worker(document: SignedDocument, key_blob: bytes) -> bool:
+    assert _worker_documents is not None
+    return _worker_documents.verify_document(document, _load_key(key_blob))
+
+
+def _save_in_worker(destination: str, author: str, key_payload: bytes, text: str) -> None:
+    assert _worker_documents is not None
+    _worker_documents.save_document(Path(destination), author, _load_private_key(key_payload), text)
+
+
+def _sign_batch_in_worker(requests: list[tuple[str, bytes, str]]) -> list[bytes | AppError]:
+    assert _worker_documents is not None
+    results: list[bytes | AppError] = []
+    for author, key_payload, text in requests:
+        try:
+            results.append(_worker_documents.sign_text(author, _load_private_key(key_payload), text))
+        except AppError as error:
+            results.append(error)
+    return results
+
+
+def _verify_batch_in_worker(requests: list[tuple[bytes, SignedDocumentHeader, bytes]]) -> list[bool | AppError]:
+    assert _worker_documents is not None
+    results: list[bool | AppError] = []
+    for payload, header, key_blob in requests:
+        try:
+            with memoryview(payload) as view, view[header.text_offset :] as text:
+                results.append(_worker_documents.verify_document_view(text, header, _load_key(key_blob)))
+        except AppError as error:
+            results.append(error)
+    return results
+
+
+class _Offloader:
+    def __init__(self, max_concurrency: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _offload(self, function: Callable[..., T], *args: Any) -> T:
+        async with self._semaphore:
+            return await asyncio.to_thread(function, *args)
+
+
+class AsyncPublicKeyService(_Offloader):
+    def __init__(self, public_keys: PublicKeyService, crypto: CryptoService, max_concurrency: int = 64) -> None:
+        super().__init__(max_concurrency)
+        self._public_keys = public_keys
+        self._crypto = crypto
+        self._inflight: dict[tuple[str, bytes], asyncio.Future[ECC.EccKey]] = {}
+
+    async def load_and_verify_public_key(self, owner: str, verifier_public_key: ECC.EccKey) -> ECC.EccKey:
+        inflight_key = (owner, self._crypto.fingerprint(verifier_public_key))
+        pending = self._inflight.get(inflight_key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._offload(self._public_keys.load_and_verify_public_key, owner, verifier_public_key)
+            )
+            self._inflight[inflight_key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        return await asyncio.shield(pending)
+
+    async def import_public_key(self, source: Path, signer_private_key: ECC.EccKey) -> str:
+        return await self._offload(self._public_keys.import_public_key, source, signer_private_key)
+
+    async def import_public_keys(self, sources: list[Path], signer_private_key: ECC.EccKey) -> list[str]:
+        return await self._offload(self._public_keys.import_public_keys, sources, signer_private_key)
+
+    async def export_public_key(self, owner: str, private_key: ECC.EccKey, destination: Path) -> None:
+        await self._offload(self._public_keys.export_public_key, owner, private_key, destination)
+
+    async def owners(self) -> list[str]:
+        return await self._offload(self._public_keys.owners)
+
+
+class AsyncDocumentService(_Offloader):
+    def __init__(
+        self,
+        documents: DocumentService,
+        crypto: CryptoService,
+        workers: int | None = None,
+        max_concurrency: int = 64,
+    ) -> None:
+        super().__init__(max_concurrency)
+        self._documents = documents
+        self._crypto = crypto
+        self._workers = (os.cpu_count() or 1) if workers is None else workers
+        self._max_concurrency = max_concurrency
+        self._executor: Executor | None = None
+
+    async def __aenter__(self) -> "AsyncDocumentService":
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown)
+
+    async def read_document_header(self, source: Path) -> SignedDocumentHeader:
+        return await self._offload(self._documents.read_document_header, source)
+
+    async def load_document(self, source: Path) -> SignedDocument:
+        return await self._offload(self._documents.load_document, source)
+
+    async def save_document(self, destination: Path, author: str, private_key: ECC.EccKey, text: str) -> None:
+        if not self._workers:
+            await self._offload(self._documents.save_document, destination, author, private_key, text)
+            return
+        key_payload = self._crypto.export_private_key(private_key)
+        await self._submit(_save_in_worker, str(destination), author, key_payload, text)
+
+    async def verify_document(self, document: SignedDocument, author_public_key: ECC.EccKey) -> bool:
+        if not self._workers:
+            return await self._offload(self._documents.verify_document, document, author_public_key)
+        key_blob = self._crypto.export_public_key(author_public_key)
+        return await self._submit(_verify_document_in_worker, document, key_blob)
+
+    async def verify_document_file(
+        self,
+        source: Path,
+        header: SignedDocumentHeader,
+        author_public_key: ECC.EccKey,
+    ) -> bool:
+        if not self._workers:
+            return await self._offload(self._documents.verify_document_file, source, header, author_public_key)
+        key_blob = self._crypto.export_public_key(author_public_key)
+        return await self._submit(_verify_file_in_worker, str(source), header, key_blob)
+
+    async def sign_batch(self, requests: list[tuple[str, bytes, str]]) -> list[bytes | AppError]:
+        return await self._submit(_sign_batch_in_worker, requests)
+
+    async def verify_batch(self, requests: list[tuple[bytes, SignedDocumentHeader, bytes]]) -> list[bool | AppError]:
+        return await self._submit(_verify_batch_in_worker, requests)
+
+    async def verify_path(
+        self,
+        source: Path,
+        verifier_public_key: ECC.EccKey,
+        public_keys: AsyncPublicKeyService,
+    ) -> VerificationResult:
+        path = str(source)
+        size = 0
+        author = None
+        try:
+            size, header = await self._offload(self._stat_and_header, source)
+            author = header.author
+            try:
+                author_public_key = await public_keys.load_and_verify_public_key(author, verifier_public_key)
+            except AppError as error:
+                return VerificationResult(path, VerificationStatus.UNKNOWN_AUTHOR, size, author, str(error))
+            verified = await self.verify_document_file(source, header, author_public_key)
+        except FormatError as error:
+            return VerificationResult(path, VerificationStatus.FORMAT_ERROR, size, author, str(error))
+        except OSError as error:
+            return VerificationResult(path, VerificationStatus.IO_ERROR, size, author, str(error))
+        status = VerificationStatus.OK if verified else VerificationStatus.BAD_SIGNATURE
+        return VerificationResult(path, status, size, author)
+
+    async def verify_files(
+        self,
+        sources: Iterable[Path] | AsyncIterable[Path],
+        verifier_public_key: ECC.EccKey,
+        public_keys: AsyncPublicKeyService,
+        queue_size: int | None = None,
+    ) -> AsyncIterator[VerificationResult]:
+        consumers = self._max_concurrency
+        pending: asyncio.Queue[Path | None] = asyncio.Queue(maxsize=queue_size or 2 * consumers)
+        results: asyncio.Queue[VerificationResult | Exception | None] = asyncio.Queue(maxsize=queue_size or 2 * consumers)
+
+        async def produce() -> None:
+            try:
+                if isinstance(sources, AsyncIterable):
+                    async for source in sources:
+                        await pending.put(source)
+                else:
+                    for source in sources:
+                        await pending.put(source)
+            except Exception as error:
+                await results.put(error)
+                return
+            for _ in range(consumers):
+                await pending.put(None)
+
+        async def consume() -> None:
+            try:
+                while (source := await pending.get()) is not None:
+                    await results.put(await self.verify_path(source, verifier_public_key, public_keys))
+            except Exception as error:
+                await results.put(error)
+            else:
+                await results.put(None)
+
+        producer = asyncio.create_task(produce())
+        workers = [asyncio.create_task(consume()) for _ in range(consumers)]
+        try:
+            finished = 0
+            while finished < consumers:
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+            await producer
+            for worker in workers:
+                await worker
+        finally:
+            for task in (producer, *workers):
+                task.cancel()
+            await asyncio.gather(producer, *workers, return_exceptions=True)
+
+    async def _submit(self, function: Callable[..., T], *args: Any) -> T:
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), function, *args)
+
+    def _pool(self) -> Executor:
+        if self._executor is None and not self._workers:
+            self._executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=self._worker_settings())
+        elif self._executor is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_worker,
+                initargs=self._worker_settings(),
+            )
+        return self._executor
+
+    def _worker_settings(self) -> tuple[int, str | None, Path | None, bool]:
+        cache = self._documents.cache
+        return (
+            self._documents.chunk_size,
+            self._documents.compression,
+            None if cache is None else cache.path,
+            self._documents.writer.durable,
+        )
+
+    def _stat_and_header(self, source: Path) -> tuple[int, SignedDocumentHeader]:
+        size = source.stat().st_size
+        return size, self._documents.read_document_header(source)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import os
+import re
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+from app.core.exceptions import StorageError
+
+
+WRITTEN = "written"
+SYNCED = "synced"
+RENAMED = "renamed"
+DIRECTORY_SYNCED = "directory_synced"
+
+WRITE_STAGES = (WRITTEN, SYNCED, RENAMED, DIRECTORY_SYNCED)
+DEFAULT_MAX_BATCH = 256
+DEFAULT_SYNC_WORKERS = 16
+STALE_TEMPORARY_AGE = 3600.0
+
+_TEMPORARY_NAME = re.compile(r"\..+\.[0-9a-f]{8}\.tmp")
+
+FaultHook = Callable[[str, Path], None]
+StreamWriter = Callable[[BinaryIO], None]
+
+
+@dataclass(slots=True)
+class _Pending:
+    temporary: Path
+    destination: Path
+    stream: BinaryIO
+    exclusive: bool
+
+
+@dataclass(slots=True)
+class WriteBatch:
+    written: list[Path] = field(default_factory=list)
+    skipped: list[Path] = field(default_factory=list)
+    _pending: list[_Pending] = field(default_factory=list)
+
+
+class AtomicWriter:
+    def __init__(
+        self,
+        durable: bool = True,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        fault_hook: FaultHook | None = None,
+        sync_workers: int = DEFAULT_SYNC_WORKERS,
+    ) -> None:
+        self._durable = durable
+        self._max_batch = max(max_batch, 1)
+        self._sync_workers = max(sync_workers, 1)
+        self._fault_hook = fault_hook
+        self._local = threading.local()
+
+    @property
+    def durable(self) -> bool:
+        return self._durable
+
+    @contextmanager
+    def batch(self) -> Iterator[WriteBatch]:
+        batches = self._batches()
+        batch = WriteBatch()
+        batches.append(batch)
+        try:
+            yield batch
+        except BaseException:
+            batches.pop()
+            self._discard(batch._pending)
+            raise
+        batches.pop()
+        self._commit(batch)
+
+    def write_bytes(self, destination: Path, payload: bytes, exclusive: bool = False, mode: int = 0o666) -> bool:
+        return self.write_stream(destination, lambda stream: stream.write(payload), exclusive, mode)
+
+    def write_stream(
+        self,
+        destination: Path,
+        write: StreamWriter,
+        exclusive: bool = False,
+        mode: int = 0o666,
+    ) -> bool:
+        if exclusive and destination.exists():
+            return False
+        batches = self._batches()
+        batch = batches[-1] if batches else WriteBatch()
+        batch._pending.append(self._stage(destination, write, exclusive, mode))
+        if not batches:
+            self._commit(batch)
+            return bool(batch.written)
+        if len(batch._pending) >= self._max_batch:
+            self._commit(batch)
+        return True
+
+    @staticmethod
+    def sweep(directory: Path, max_age: float = STALE_TEMPORARY_AGE) -> int:
+        deadline = time.time() - max_age
+        removed = 0
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not _TEMPORARY_NAME.fullmatch(entry.name):
+                continue
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < deadline:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def _stage(self, destination: Path, write: StreamWriter, exclusive: bool, mode: int) -> _Pending:
+        temporary = destination.with_name(f".{destination.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        except OSError as error:
+            raise StorageError(f"Не удалось записать {destination}: {error}") from error
+        stream = os.fdopen(descriptor, "wb")
+        try:
+            write(stream)
+            stream.flush()
+            self._fault(WRITTEN, destination)
+        except BaseException:
+            stream.close()
+            temporary.unlink(missing_ok=True)
+            raise
+        return _Pending(temporary, destination, stream, exclusive)
+
+    def _commit(self, batch: WriteBatch) -> None:
+        pending, batch._pending = batch._pending, []
+        directories: dict[Path, None] = {}
+        published = 0
+        try:
+            self._fsync_all([item.stream.fileno() for item in pending])
+            for item in pending:
+                item.stream.close()
+                self._fault(SYNCED, item.destination)
+            for item in pending:
+                self._publish(item, batch)
+                published += 1
+                directories[item.destination.parent] = None
+                self._fault(RENAMED, item.destination)
+            self._sync_directories(list(directories))
+        except OSError as error:
+            raise StorageError(f"Не удалось записать файл: {error}") from error
+        finally:
+            self._discard(pending[published:])
+
+    @staticmethod
+    def _publish(item: _Pending, batch: WriteBatch) -> None:
+        if not item.exclusive:
+            item.temporary.replace(item.destination)
+            batch.written.append(item.destination)
+            return
+        try:
+            os.link(item.temporary, item.destination)
+        except FileExistsError:
+            batch.skipped.append(item.destination)
+        else:
+            batch.written.append(item.destination)
+        item.temporary.unlink()
+
+    def _fsync_all(self, descriptors: list[int]) -> None:
+        if not self._durable or not descriptors:
+            return
+        if len(descriptors) == 1 or self._sync_workers == 1:
+            for descriptor in descriptors:
+                os.fsync(descriptor)
+            return
+        workers = min(len(descriptors), self._sync_workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fsync") as executor:
+            for _ in executor.map(os.fsync, descriptors):
+                pass
+
+    def _sync_directories(self, directories: list[Path]) -> None:
+        descriptors: list[int] = []
+        try:
+            if self._durable and hasattr(os, "O_DIRECTORY"):
+                for directory in directories:
+                    descriptors.append(os.open(directory, os.O_RDONLY | os.O_DIRECTORY))
+                self._fsync_all(descriptors)
+        finally:
+            for descriptor in descriptors:
+                os.close(descriptor)
+        for directory in directories:
+            self._fault(DIRECTORY_SYNCED, directory)
+
+    def _fault(self, stage: str, path: Path) -> None:
+        if self._fault_hook is not None:
+            self._fault_hook(stage, path)
+
+    def _batches(self) -> list[WriteBatch]:
+        batches = getattr(self._local, "batches", None)
+        if batches is None:
+            batches = self._local.batches = []
+        return batches
+
+    @staticmethod
+    def _discard(pending: list[_Pending]) -> None:
+        for item in pending:
+            item.stream.close()
+            item.temporary.unlink(missing_ok=True)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.core.digests import content_digest
+from app.core.exceptions import AppError, FormatError, StorageError
+from app.core.models import OperationStats, VerificationResult, VerificationStatus
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.key_store import open_key_store
+from app.services.public_key_service import PublicKeyService
+from app.services.verification_cache import VerificationCache
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+    from app.services.instrumentation import MetricsRegistry
+
+
+DOCUMENT_SUFFIX = ".sd"
+
+_worker_state: "_BatchVerifier | None" = None
+
+
+class _BatchVerifier:
+    def __init__(
+        self,
+        store_path: Path,
+        cache_path: Path | None,
+        verifier_key_blob: bytes,
+        with_digest: bool,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self._with_digest = with_digest
+        self._metrics = metrics
+        crypto = CryptoService()
+        cache = VerificationCache(cache_path) if cache_path is not None else None
+        store = open_key_store(store_path)
+        self._documents = DocumentService(crypto=crypto, cache=cache)
+        self._public_keys = PublicKeyService(store=store, crypto=crypto, verification_cache=cache)
+        if metrics is not None:
+            from app.services.instrumentation import instrument_services
+
+            instrument_services(metrics, crypto=crypto, store=store, public_keys=self._public_keys, documents=self._documents)
+        self._verifier_public_key = crypto.load_public_key(verifier_key_blob)
+
+    def verify(self, path: str) -> VerificationResult:
+        source = Path(path)
+        size = 0
+        author = None
+        try:
+            size = source.stat().st_size
+            header = self._documents.read_document_header(source)
+            author = header.author
+            try:
+                author_public_key = self._public_keys.load_and_verify_public_key(author, self._verifier_public_key)
+            except (AppError, ValueError) as error:
+                return VerificationResult(path, VerificationStatus.UNKNOWN_AUTHOR, size, author, str(error))
+            verified = self._documents.verify_document_file(source, header, author_public_key)
+            status = VerificationStatus.OK if verified else VerificationStatus.BAD_SIGNATURE
+            result = VerificationResult(path, status, size, author)
+            if self._with_digest:
+                result.digest = content_digest(source).hex()
+        except (FormatError, ValueError) as error:
+            return VerificationResult(path, VerificationStatus.FORMAT_ERROR, size, author, str(error))
+        except (OSError, StorageError) as error:
+            return VerificationResult(path, VerificationStatus.IO_ERROR, size, author, str(error))
+        except AppError as error:
+            return VerificationResult(path, VerificationStatus.BAD_SIGNATURE, size, author, str(error))
+        return result
+
+    def drain_metrics(self) -> list[OperationStats]:
+        return [] if self._metrics is None else self._metrics.drain()
+
+
+def _init_worker(
+    store_path: Path,
+    cache_path: Path | None,
+    verifier_key_blob: bytes,
+    with_digest: bool,
+    metric_buckets: tuple[float, ...] | None,
+) -> None:
+    global _worker_state
+    metrics = None
+    if metric_buckets is not None:
+        from app.services.instrumentation import MetricsRegistry
+
+        metrics = MetricsRegistry(metric_buckets)
+    _worker_state = _BatchVerifier(store_path, cache_path, verifier_key_blob, with_digest, metrics)
+
+
+def _verify_in_worker(path: str) -> tuple[VerificationResult, list[OperationStats]]:
+    assert _worker_state is not None
+    return _worker_state.verify(path), _worker_state.drain_metrics()
+
+
+class BatchVerifyService:
+    def __init__(
+        self,
+        store_path: Path,
+        crypto: CryptoService,
+        workers: int | None = None,
+        chunk_size: int = 64,
+        cache_path: Path | None = None,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self._store_path = store_path
+        self._cache_path = cache_path
+        self._metrics = metrics
+        self._crypto = crypto
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+
+    @staticmethod
+    def discover(roots: Iterable[Path]) -> Iterator[Path]:
+        for root in roots:
+            if root.is_dir():
+                for entry in BatchVerifyService.iter_entries(root):
+                    yield Path(entry.path)
+            else:
+                yield root
+
+    def verify(
+        self,
+        paths: Iterable[Path],
+        verifier_public_key: ECC.EccKey,
+        with_digest: bool = False,
+    ) -> Iterator[VerificationResult]:
+        verifier_key_blob = self._crypto.export_public_key(verifier_public_key)
+        names = (str(path) for path in paths)
+        if self._workers == 1:
+            verifier = _BatchVerifier(self._store_path, self._cache_path, verifier_key_blob, with_digest, self._metrics)
+            yield from map(verifier.verify, names)
+            return
+        import multiprocessing
+
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with multiprocessing.get_context(method).Pool(
+            processes=self._workers,
+            initializer=_init_worker,
+            initargs=(
+                self._store_path,
+                self._cache_path,
+                verifier_key_blob,
+                with_digest,
+                None if self._metrics is None else self._metrics.buckets,
+            ),
+        ) as pool:
+            for result, operations in pool.imap_unordered(_verify_in_worker, names, chunksize=self._chunk_size):
+                if operations and self._metrics is not None:
+                    self._metrics.merge(operations)
+                yield result
+
+    @staticmethod
+    def iter_entries(root: Path) -> Iterator[os.DirEntry[str]]:
+        pending = [root]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(Path(entry.path))
+                    elif entry.is_file() and entry.name.endswith(DOCUMENT_SUFFIX):
+                        yield entry
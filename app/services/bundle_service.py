@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+from collections.abc import Hashable, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from app.core.exceptions import AppError, FormatError, StorageError, ValidationError
+from app.core.formats import (
+    TEXT_CHUNK_SIZE,
+    decode_bundle_index,
+    decode_signed_document,
+    decode_signed_document_header,
+    encode_bundle_index,
+    encode_bundle_prefix,
+)
+from app.core.models import BundleEntry, SignedDocument, VerificationResult, VerificationStatus
+from app.services.atomic_writer import AtomicWriter, WriteBatch
+from app.services.document_service import DocumentService
+from app.services.public_key_service import PublicKeyService
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+BUNDLE_SUFFIX = ".sdb"
+
+
+class BundleService:
+    def __init__(
+        self,
+        documents: DocumentService,
+        public_keys: PublicKeyService,
+        writer: AtomicWriter | None = None,
+    ) -> None:
+        self._documents = documents
+        self._public_keys = public_keys
+        self._writer = writer or AtomicWriter()
+        self._index: tuple[Hashable, dict[str, BundleEntry]] | None = None
+        self._index_lock = threading.Lock()
+
+    def batch(self) -> AbstractContextManager[WriteBatch]:
+        return self._writer.batch()
+
+    def pack(self, sources: Iterable[Path], destination: Path) -> list[BundleEntry]:
+        paths = [source.absolute() for source in sources]
+        root = Path(os.path.commonpath([path.parent for path in paths])) if paths else None
+        entries: list[BundleEntry] = []
+        names: set[str] = set()
+
+        def write(stream: BinaryIO) -> None:
+            stream.write(encode_bundle_prefix())
+            for source in paths:
+                name = source.relative_to(root).as_posix()
+                if name in names:
+                    raise ValidationError(f"Повторяющееся имя документа в пакете: {name}")
+                payload = source.read_bytes()
+                try:
+                    decode_signed_document_header(payload)
+                except FormatError as error:
+                    raise FormatError(f"{name}: {error}") from error
+                entries.append(BundleEntry(name=name, offset=stream.tell(), length=len(payload)))
+                names.add(name)
+                stream.write(payload)
+            stream.write(encode_bundle_index(entries, stream.tell()))
+
+        self._writer.write_stream(destination, write)
+        return entries
+
+    def entries(self, bundle: Path) -> list[BundleEntry]:
+        with self._map(bundle) as (view, revision):
+            return list(self._entries(bundle, view, revision).values())
+
+    def read_document(self, bundle: Path, name: str) -> SignedDocument:
+        with self._map(bundle) as (view, revision):
+            entry = self._find(self._entries(bundle, view, revision), name)
+            with view[entry.offset : entry.offset + entry.length] as payload:
+                return decode_signed_document(payload)
+
+    def extract(self, bundle: Path, name: str, destination: Path) -> None:
+        with self._map(bundle) as (view, revision):
+            entry = self._find(self._entries(bundle, view, revision), name)
+            with view[entry.offset : entry.offset + entry.length] as payload:
+
+                def write(stream: BinaryIO) -> None:
+                    for start in range(0, entry.length, TEXT_CHUNK_SIZE):
+                        with payload[start : start + TEXT_CHUNK_SIZE] as chunk:
+                            stream.write(chunk)
+
+                self._writer.write_stream(destination, write)
+
+    def verify(self, bundle: Path, name: str, verifier_public_key: ECC.EccKey) -> VerificationResult:
+        with self._map(bundle) as (view, revision):
+            entry = self._find(self._entries(bundle, view, revision), name)
+            with view[entry.offset : entry.offset + entry.length] as payload:
+                return self._verify_entry(entry, payload, verifier_public_key)
+
+    def verify_all(self, bundle: Path, verifier_public_key: ECC.EccKey) -> Iterator[VerificationResult]:
+        with self._map(bundle, sequential=True) as (view, revision):
+            entries = sorted(self._entries(bundle, view, revision).values(), key=lambda entry: entry.offset)
+            for entry in entries:
+                with view[entry.offset : entry.offset + entry.length] as payload:
+                    yield self._verify_entry(entry, payload, verifier_public_key)
+
+    def _verify_entry(self, entry: BundleEntry, payload: memoryview, verifier_public_key: ECC.EccKey) -> VerificationResult:
+        author = None
+        try:
+            header = decode_signed_document_header(payload)
+            author = header.author
+            try:
+                author_public_key = self._public_keys.load_and_verify_public_key(author, verifier_public_key)
+            except (AppError, ValueError) as error:
+                return VerificationResult(entry.name, VerificationStatus.UNKNOWN_AUTHOR, entry.length, author, str(error))
+            with payload[header.text_offset :] as text:
+                verified = self._documents.verify_document_view(text, header, author_public_key)
+        except (FormatError, ValueError) as error:
+            return VerificationResult(entry.name, VerificationStatus.FORMAT_ERROR, entry.length, author, str(error))
+        except (OSError, StorageError) as error:
+            return VerificationResult(entry.name, VerificationStatus.IO_ERROR, entry.length, author, str(error))
+        except AppError as error:
+            return VerificationResult(entry.name, VerificationStatus.BAD_SIGNATURE, entry.length, author, str(error))
+        status = VerificationStatus.OK if verified else VerificationStatus.BAD_SIGNATURE
+        return VerificationResult(entry.name, status, entry.length, author)
+
+    def _entries(self, bundle: Path, view: memoryview, revision: Hashable) -> dict[str, BundleEntry]:
+        cache_key = (str(bundle.resolve()), revision)
+        with self._index_lock:
+            if self._index is not None and self._index[0] == cache_key:
+                return self._index[1]
+        entries = {entry.name: entry for entry in decode_bundle_index(view)}
+        with self._index_lock:
+            self._index = (cache_key, entries)
+        return entries
+
+    @staticmethod
+    def _find(entries: dict[str, BundleEntry], name: str) -> BundleEntry:
+        entry = entries.get(name)
+        if entry is None:
+            raise ValidationError(f"Документ {name} не найден в пакете")
+        return entry
+
+    @staticmethod
+    @contextmanager
+    def _map(bundle: Path, sequential: bool = False) -> Iterator[tuple[memoryview, Hashable]]:
+        with bundle.open("rb") as stream:
+            stat = os.fstat(stream.fileno())
+            if not stat.st_size:
+                raise FormatError("Файл не является пакетом документов")
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if sequential and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mapped) as view:
+                    yield view, (stat.st_mtime_ns, stat.st_size, stat.st_ino)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.core.exceptions import StorageError
+from app.core.models import CatalogEntry, RescanSummary, VerificationResult, VerificationStatus
+from app.services.batch_verify_service import BatchVerifyService
+from app.services.crypto_service import CryptoService
+from app.services.public_key_service import PublicKeyService
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+_COLUMNS = "path, size, mtime_ns, author, digest, status, message, verified_at"
+_COMMIT_EVERY = 1000
+_KEY_COLUMNS = (("verifier", "TEXT"), ("key_revision", "TEXT"))
+
+
+class CatalogService:
+    def __init__(
+        self,
+        database: Path,
+        batch: BatchVerifyService,
+        public_keys: PublicKeyService,
+        crypto: CryptoService,
+    ) -> None:
+        self._database = database
+        self._batch = batch
+        self._public_keys = public_keys
+        self._crypto = crypto
+        self._database.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, author TEXT, "
+            "digest TEXT, status TEXT NOT NULL, message TEXT, verified_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(documents)")}
+        for name, column_type in _KEY_COLUMNS:
+            if name not in columns:
+                self._connection.execute(f"ALTER TABLE documents ADD COLUMN {name} {column_type}")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS documents_author ON documents (author)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS documents_status ON documents (status)")
+
+    def rescan(self, roots: Iterable[Path], verifier_public_key: ECC.EccKey, force: bool = False) -> RescanSummary:
+        started = time.perf_counter()
+        roots = [root.resolve() for root in roots]
+        verifier = self._crypto.fingerprint(verifier_public_key).hex()
+        revisions: dict[str, str] = {}
+        with self._lock:
+            known = {
+                path: (size, mtime_ns, author, row_verifier, key_revision)
+                for path, size, mtime_ns, author, row_verifier, key_revision in self._connection.execute(
+                    "SELECT path, size, mtime_ns, author, verifier, key_revision FROM documents"
+                )
+            }
+
+        changed: dict[str, tuple[int, int]] = {}
+        seen: set[str] = set()
+        for path, size, mtime_ns in self._scan(roots):
+            seen.add(path)
+            if force or not self._is_current(known.get(path), size, mtime_ns, verifier, revisions):
+                changed[path] = (size, mtime_ns)
+
+        removed = [path for path in known if path not in seen and self._is_under(path, roots)]
+        if changed:
+            results = self._batch.verify((Path(path) for path in changed), verifier_public_key, with_digest=True)
+            self._store(results, changed, verifier, revisions)
+        if removed:
+            self._execute_many("DELETE FROM documents WHERE path = ?", ((path,) for path in removed))
+
+        return RescanSummary(
+            scanned=len(seen),
+            unchanged=len(seen) - len(changed),
+            updated=len(changed),
+            removed=len(removed),
+            seconds=time.perf_counter() - started,
+        )
+
+    def by_author(self, author: str) -> list[CatalogEntry]:
+        return self._query(f"SELECT {_COLUMNS} FROM documents WHERE author = ? ORDER BY path", (author,))
+
+    def by_status(self, status: VerificationStatus) -> list[CatalogEntry]:
+        return self._query(f"SELECT {_COLUMNS} FROM documents WHERE status = ? ORDER BY path", (str(status),))
+
+    def status_counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _scan(self, roots: list[Path]) -> Iterator[tuple[str, int, int]]:
+        for root in roots:
+            if root.is_dir():
+                for entry in self._batch.iter_entries(root):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+            elif root.is_file():
+                stat = root.stat()
+                yield str(root), stat.st_size, stat.st_mtime_ns
+
+    def _is_current(
+        self,
+        row: tuple[int, int, str | None, str | None, str | None] | None,
+        size: int,
+        mtime_ns: int,
+        verifier: str,
+        revisions: dict[str, str],
+    ) -> bool:
+        if row is None:
+            return False
+        row_size, row_mtime_ns, author, row_verifier, key_revision = row
+        if (row_size, row_mtime_ns) != (size, mtime_ns) or row_verifier != verifier:
+            return False
+        return author is None or key_revision == self._key_revision(author, revisions)
+
+    def _key_revision(self, author: str, revisions: dict[str, str]) -> str:
+        revision = revisions.get(author)
+        if revision is None:
+            revision = revisions[author] = json.dumps(self._public_keys.key_revision(author))
+        return revision
+
+    @staticmethod
+    def _is_under(path: str, roots: list[Path]) -> bool:
+        for root in roots:
+            prefix = str(root)
+            if path == prefix or path.startswith(prefix.rstrip(os.sep) + os.sep):
+                return True
+        return False
+
+    def _store(
+        self,
+        results: Iterable[VerificationResult],
+        stats: dict[str, tuple[int, int]],
+        verifier: str,
+        revisions: dict[str, str],
+    ) -> None:
+        verified_at = time.time()
+
+        def rows() -> Iterator[tuple]:
+            for result in results:
+                size, mtime_ns = stats[result.path]
+                yield (
+                    result.path,
+                    size,
+                    mtime_ns,
+                    result.author,
+                    result.digest,
+                    str(result.status),
+                    result.message,
+                    verified_at,
+                    verifier,
+                    None if result.author is None else self._key_revision(result.author, revisions),
+                )
+
+        self._execute_many(
+            f"INSERT OR REPLACE INTO documents ({_COLUMNS}, verifier, key_revision) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows(),
+        )
+
+    def _execute_many(self, statement: str, rows: Iterable[tuple]) -> None:
+        batch: list[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= _COMMIT_EVERY:
+                self._commit(statement, batch)
+                batch = []
+        if batch:
+            self._commit(statement, batch)
+
+    def _commit(self, statement: str, batch: list[tuple]) -> None:
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.executemany(statement, batch)
+                self._connection.execute("COMMIT")
+            except sqlite3.Error as error:
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+                raise StorageError(f"Не удалось обновить каталог документов: {error}") from error
+
+    def _query(self, statement: str, parameters: tuple) -> list[CatalogEntry]:
+        with self._lock:
+            rows = self._connection.execute(statement, parameters).fetchall()
+        return [
+            CatalogEntry(
+                path=path,
+                size=size,
+                mtime_ns=mtime_ns,
+                author=author,
+                digest=digest,
+                status=VerificationStatus(status),
+                message=message,
+                verified_at=verified_at,
+            )
+            for path, size, mtime_ns, author, digest, status, message, verified_at in rows
+        ]
@@ -1,45 +1,173 @@
-from Crypto.Hash import SHA256
-from Crypto.PublicKey import ECC
-from Crypto.Signature import DSS
+from __future__ import annotations
 
-from app.core.exceptions import CryptoError
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from app.core.algorithms import DEFAULT_ALGORITHM, ECDSA_P256_SHA256, ED25519PH
+from app.core.exceptions import CryptoError, FormatError
+from app.core.formats import decode_private_key_record, encode_private_key_record, is_private_key_record
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+class _EcdsaP256:
+    name = ECDSA_P256_SHA256
+    curve = "P-256"
+    key_curve = "NIST P-256"
+
+    def new_digest(self) -> Any:
+        from Crypto.Hash import SHA256
+
+        return SHA256.new()
+
+    def scheme(self, key: ECC.EccKey) -> Any:
+        from Crypto.Signature import DSS
+
+        return DSS.new(key, "fips-186-3")
+
+    def export_secret(self, key: ECC.EccKey) -> bytes:
+        return int(key.d).to_bytes(32, "big")
+
+    def construct(self, secret: bytes) -> ECC.EccKey:
+        from Crypto.PublicKey import ECC
+
+        return ECC.construct(curve=self.curve, d=int.from_bytes(secret, "big"))
+
+
+class _Ed25519:
+    name = ED25519PH
+    curve = "Ed25519"
+    key_curve = "Ed25519"
+
+    def new_digest(self) -> Any:
+        from Crypto.Hash import SHA512
+
+        return SHA512.new()
+
+    def scheme(self, key: ECC.EccKey) -> Any:
+        from Crypto.Signature import eddsa
+
+        return eddsa.new(key, "rfc8032")
+
+    def export_secret(self, key: ECC.EccKey) -> bytes:
+        return key.seed
+
+    def construct(self, secret: bytes) -> ECC.EccKey:
+        from Crypto.PublicKey import ECC
+
+        return ECC.construct(curve=self.curve, seed=secret)
+
+
+_ALGORITHMS = {algorithm.name: algorithm for algorithm in (_EcdsaP256(), _Ed25519())}
+_ALGORITHMS_BY_CURVE = {algorithm.key_curve: algorithm for algorithm in _ALGORITHMS.values()}
+_FINGERPRINT_CACHE_SIZE = 256
 
 
 class CryptoService:
-    def generate_private_key(self) -> ECC.EccKey:
-        return ECC.generate(curve="P-256")
+    def __init__(self, default_algorithm: str = DEFAULT_ALGORITHM) -> None:
+        self._default = self._algorithm(default_algorithm)
+        self._fingerprints: OrderedDict[int, tuple[ECC.EccKey, bytes]] = OrderedDict()
+        self._fingerprints_lock = threading.Lock()
+
+    @property
+    def default_algorithm(self) -> str:
+        return self._default.name
+
+    def algorithm_for_key(self, key: ECC.EccKey) -> str:
+        algorithm = _ALGORITHMS_BY_CURVE.get(key.curve)
+        if algorithm is None:
+            raise CryptoError("Неподдерживаемый тип ключа")
+        return algorithm.name
+
+    def generate_private_key(self, algorithm: str | None = None) -> ECC.EccKey:
+        from Crypto.PublicKey import ECC
+
+        spec = self._default if algorithm is None else self._algorithm(algorithm)
+        return ECC.generate(curve=spec.curve)
 
     def export_private_key(self, key: ECC.EccKey) -> bytes:
         return key.export_key(format="PEM").encode("utf-8")
 
+    def export_private_key_record(self, key: ECC.EccKey) -> bytes:
+        algorithm = self._algorithm(self.algorithm_for_key(key))
+        if not key.has_private():
+            raise CryptoError("Ключ не содержит закрытой части")
+        return encode_private_key_record(algorithm.name, algorithm.export_secret(key))
+
     def load_private_key(self, payload: bytes) -> ECC.EccKey:
+        from Crypto.PublicKey import ECC
+
         try:
+            if is_private_key_record(payload):
+                algorithm, secret = decode_private_key_record(payload)
+                return self._algorithm(algorithm).construct(secret)
             return ECC.import_key(payload)
-        except (ValueError, TypeError) as error:
+        except (ValueError, TypeError, FormatError) as error:
             raise CryptoError("Не удалось прочитать закрытый ключ") from error
 
     def export_public_key(self, key: ECC.EccKey) -> bytes:
         return key.public_key().export_key(format="DER")
 
+    def fingerprint(self, key: ECC.EccKey) -> bytes:
+        from Crypto.Hash import SHA256
+
+        with self._fingerprints_lock:
+            entry = self._fingerprints.get(id(key))
+            if entry is not None and entry[0] is key:
+                self._fingerprints.move_to_end(id(key))
+                return entry[1]
+        fingerprint = SHA256.new(self.export_public_key(key)).digest()
+        with self._fingerprints_lock:
+            self._fingerprints[id(key)] = (key, fingerprint)
+            while len(self._fingerprints) > _FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.popitem(last=False)
+        return fingerprint
+
     def load_public_key(self, payload: bytes) -> ECC.EccKey:
+        from Crypto.PublicKey import ECC
+
         try:
             return ECC.import_key(payload)
         except (ValueError, TypeError) as error:
             raise CryptoError("Не удалось прочитать открытый ключ") from error
 
+    def new_digest(self, algorithm: str) -> Any:
+        return self._algorithm(algorithm).new_digest()
+
     def sign(self, private_key: ECC.EccKey, payload: bytes) -> bytes:
-        digest = SHA256.new(payload)
-        signer = DSS.new(private_key, "fips-186-3")
+        digest = self.new_digest(self.algorithm_for_key(private_key))
+        digest.update(payload)
+        return self.sign_digest(private_key, digest)
+
+    def sign_digest(self, private_key: ECC.EccKey, digest: Any) -> bytes:
+        signer = self._algorithm(self.algorithm_for_key(private_key)).scheme(private_key)
         try:
             return signer.sign(digest)
-        except ValueError as error:
+        except (ValueError, TypeError) as error:
             raise CryptoError("Не удалось подписать данные") from error
 
-    def verify(self, public_key: ECC.EccKey, payload: bytes, signature: bytes) -> bool:
-        digest = SHA256.new(payload)
-        verifier = DSS.new(public_key, "fips-186-3")
+    def verify(self, public_key: ECC.EccKey, payload: bytes, signature: bytes, algorithm: str | None = None) -> bool:
+        key_algorithm = self.algorithm_for_key(public_key)
+        digest = self.new_digest(key_algorithm)
+        digest.update(payload)
+        return self.verify_digest(public_key, digest, signature, algorithm)
+
+    def verify_digest(self, public_key: ECC.EccKey, digest: Any, signature: bytes, algorithm: str | None = None) -> bool:
+        key_algorithm = self.algorithm_for_key(public_key)
+        if algorithm is not None and algorithm != key_algorithm:
+            return False
+        verifier = self._algorithm(key_algorithm).scheme(public_key)
         try:
             verifier.verify(digest, signature)
             return True
-        except ValueError:
+        except (ValueError, TypeError):
             return False
+
+    @staticmethod
+    def _algorithm(name: str) -> _EcdsaP256 | _Ed25519:
+        algorithm = _ALGORITHMS.get(name)
+        if algorithm is None:
+            raise CryptoError(f"Неподдерживаемый алгоритм подписи: {name}")
+        return algorithm
@@ -0,0 +1,78 @@
+import base64
+import itertools
+import json
+import socket
+from pathlib import Path
+from typing import Any
+
+from app.core.exceptions import AppError, CryptoError, FormatError, StorageError, ValidationError
+from app.core.models import VerificationResult, VerificationStatus
+
+
+_ERRORS: dict[str, type[AppError]] = {
+    error.__name__: error for error in (AppError, ValidationError, CryptoError, FormatError, StorageError)
+}
+
+
+class DaemonClient:
+    def __init__(self, socket_path: Path, timeout: float | None = 30.0) -> None:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(str(socket_path))
+        except OSError:
+            self._socket.close()
+            raise
+        self._stream = self._socket.makefile("rwb")
+        self._ids = itertools.count(1)
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stream.close()
+        self._socket.close()
+
+    def ping(self) -> None:
+        self._call({"op": "ping"})
+
+    def reload(self) -> None:
+        self._call({"op": "reload"})
+
+    def metrics(self, export_format: str = "prometheus") -> str:
+        return self._call({"op": "metrics", "format": export_format})["metrics"]
+
+    def sign(self, user: str, text: str) -> bytes:
+        response = self._call({"op": "sign", "user": user, "text": _encode(text.encode("utf-8"))})
+        return base64.b64decode(response["document"])
+
+    def verify(self, user: str, document: bytes, name: str = "") -> VerificationResult:
+        response = self._call({"op": "verify", "user": user, "document": _encode(document)})
+        return VerificationResult(
+            path=name,
+            status=VerificationStatus(response["status"]),
+            size=len(document),
+            author=response["author"],
+            message=response["message"],
+        )
+
+    def _call(self, request: dict[str, Any]) -> dict[str, Any]:
+        request_id = next(self._ids)
+        self._stream.write(json.dumps(request | {"id": request_id}).encode("utf-8") + b"\n")
+        self._stream.flush()
+        line = self._stream.readline()
+        if not line:
+            raise ConnectionError("Демон закрыл соединение")
+        response = json.loads(line)
+        if response.get("id") not in (request_id, None):
+            raise ConnectionError("Ответ демона не соответствует запросу")
+        if not response.get("ok"):
+            raise _ERRORS.get(response.get("error_type"), AppError)(response.get("error"))
+        return response
+
+
+def _encode(payload: bytes) -> str:
+    return base64.b64encode(payload).decode("ascii")
@@ -1,25 +1,623 @@
-from pathlib import Path
+from __future__ import annotations
 
-from Crypto.PublicKey import ECC
+import codecs
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
-from app.core.formats import decode_signed_document, encode_signed_document
-from app.core.models import SignedDocument
+from app.core.compression import CODECS
+from app.core.digests import new_content_digest
+from app.core.exceptions import FormatError, ValidationError
+from app.core.formats import (
+    TEXT_CHUNK_SIZE,
+    decode_signed_document,
+    encode_chunked_document_header,
+    encode_chunked_signing_payload,
+    encode_signed_document,
+    encode_signed_document_header,
+    iter_buffer_chunks,
+    iter_document_text,
+    iter_encoded_text,
+    read_signed_document_header,
+    stored_text_length,
+    write_compressed_document,
+    write_document,
+)
+from app.core.merkle import (
+    MERKLE_HASH_SIZE,
+    build_tree,
+    encode_tree,
+    iter_fixed_chunks,
+    leaf_count,
+    leaf_hash,
+    node_offset,
+    root_from_range,
+)
+from app.core.models import ProgressCallback, SignedDocument, SignedDocumentHeader
+from app.services.atomic_writer import AtomicWriter, StreamWriter, WriteBatch
 from app.services.crypto_service import CryptoService
+from app.services.mapped_document import MappedDocument
+from app.services.verification_cache import VerificationCache
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+_PreviousLeaf = Callable[[int, bytes], bytes | None]
+_FileRevision = tuple[int, int, int, int, int]
+
+VERIFIED_LEAVES_LIMIT = 8
+
+
+@dataclass(slots=True)
+class _VerifiedLeaves:
+    revision: _FileRevision
+    author: str
+    chunk_size: int
+    text_offset: int
+    text_length: int
+    leaves: list[bytes]
 
 
 class DocumentService:
-    def __init__(self, crypto: CryptoService) -> None:
+    def __init__(
+        self,
+        crypto: CryptoService,
+        cache: VerificationCache | None = None,
+        chunk_size: int = 0,
+        compression: str | None = None,
+        writer: AtomicWriter | None = None,
+    ) -> None:
+        if compression is not None and compression not in CODECS:
+            raise ValidationError(f"Неподдерживаемый алгоритм сжатия: {compression}")
+        if compression is not None and chunk_size:
+            raise ValidationError("Сжатие не поддерживается для документов с деревом хешей")
         self._crypto = crypto
+        self._cache = cache
+        self._chunk_size = chunk_size
+        self._compression = compression
+        self._writer = writer or AtomicWriter()
+        self._verified_leaves: OrderedDict[Path, _VerifiedLeaves] = OrderedDict()
+        self._verified_leaves_lock = threading.Lock()
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    @property
+    def compression(self) -> str | None:
+        return self._compression
+
+    @property
+    def cache(self) -> VerificationCache | None:
+        return self._cache
+
+    @property
+    def writer(self) -> AtomicWriter:
+        return self._writer
+
+    def batch(self) -> AbstractContextManager[WriteBatch]:
+        return self._writer.batch()
+
+    def save_document(
+        self,
+        destination: Path,
+        author: str,
+        private_key: ECC.EccKey,
+        text: str,
+        progress: ProgressCallback | None = None,
+    ) -> None:
+        total = 2 * len(text)
+        algorithm = self._crypto.algorithm_for_key(private_key)
+
+        def text_chunks(done: int) -> Iterator[bytes]:
+            for chunk in iter_encoded_text(text):
+                yield chunk
+                done += TEXT_CHUNK_SIZE
+                self._report(progress, done, total)
+
+        if self._chunk_size:
+            with self._previous_leaves(destination, author) as previous:
+                leaves, text_length = self._hash_chunks(text_chunks(0), self._chunk_size, previous)
+            header = self._sign_chunked(author, private_key, algorithm, leaves, text_length)
+        else:
+            text_length = 0
+            digest = self._crypto.new_digest(algorithm)
+            for chunk in text_chunks(0):
+                digest.update(chunk)
+                text_length += len(chunk)
+            signature = self._crypto.sign_digest(private_key, digest)
+            if self._compression:
+                self._writer.write_stream(
+                    destination,
+                    self._compressed_writer(
+                        self._compression,
+                        author,
+                        signature,
+                        algorithm,
+                        text_length,
+                        text_chunks(len(text)),
+                    ),
+                )
+                return
+            header = encode_signed_document_header(author, signature, algorithm, text_length)
+
+        self._writer.write_stream(destination, self._plain_writer(header, text_length, text_chunks(len(text))))
+
+    def sign_text(self, author: str, private_key: ECC.EccKey, text: str) -> bytes:
+        algorithm = self._crypto.algorithm_for_key(private_key)
+        text_raw = text.encode("utf-8")
+        if self._chunk_size:
+            leaves, text_length = self._hash_chunks([text_raw], self._chunk_size)
+            header = self._sign_chunked(author, private_key, algorithm, leaves, text_length)
+        else:
+            signature = self._crypto.sign(private_key, text_raw)
+            if self._compression:
+                document = SignedDocument(author, signature, text, algorithm, compression=self._compression)
+                return encode_signed_document(document)
+            header = encode_signed_document_header(author, signature, algorithm, len(text_raw))
+        return header + text_raw
+
+    def sign_text_file(self, source: Path, destination: Path, author: str, private_key: ECC.EccKey) -> None:
+        algorithm = self._crypto.algorithm_for_key(private_key)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with source.open("rb") as stream:
+            revision = _file_revision(stream.fileno())
+
+            def validated_chunks() -> Iterator[bytes]:
+                for chunk in self._iter_stream_chunks(stream):
+                    decoder.decode(chunk)
+                    yield chunk
+                decoder.decode(b"", final=True)
+
+            def unchanged_chunks() -> Iterator[bytes]:
+                stream.seek(0)
+                yield from self._iter_stream_chunks(stream)
+                if _file_revision(stream.fileno()) != revision:
+                    raise FormatError("Исходный файл изменился во время подписи")
+
+            try:
+                if self._chunk_size:
+                    with self._previous_leaves(destination, author) as previous:
+                        leaves, text_length = self._hash_chunks(validated_chunks(), self._chunk_size, previous)
+                else:
+                    digest = self._crypto.new_digest(algorithm)
+                    text_length = 0
+                    for chunk in validated_chunks():
+                        digest.update(chunk)
+                        text_length += len(chunk)
+            except UnicodeDecodeError as error:
+                raise FormatError("Некорректная кодировка документа") from error
+            if self._chunk_size:
+                header = self._sign_chunked(author, private_key, algorithm, leaves, text_length)
+            else:
+                signature = self._crypto.sign_digest(private_key, digest)
+                if self._compression:
+                    self._writer.write_stream(
+                        destination,
+                        self._compressed_writer(
+                            self._compression,
+                            author,
+                            signature,
+                            algorithm,
+                            text_length,
+                            unchanged_chunks(),
+                        ),
+                    )
+                    return
+                header = encode_signed_document_header(author, signature, algorithm, text_length)
+            self._writer.write_stream(destination, self._plain_writer(header, text_length, unchanged_chunks()))
+
+    def transcode_document(self, source: Path, destination: Path, compression: str | None) -> SignedDocumentHeader:
+        if compression is not None and compression not in CODECS:
+            raise ValidationError(f"Неподдерживаемый алгоритм сжатия: {compression}")
+        header = self.read_document_header(source)
+        if header.chunk_size:
+            raise FormatError("Сжатие не поддерживается для документов с деревом хешей")
+        with self._map_text(source, header) as text:
+            chunks = (bytes(chunk) for chunk in iter_document_text(text, header))
+            if compression:
+                writer = self._compressed_writer(
+                    compression,
+                    header.author,
+                    header.signature,
+                    header.algorithm,
+                    header.text_length,
+                    chunks,
+                )
+            else:
+                document_header = encode_signed_document_header(
+                    header.author,
+                    header.signature,
+                    header.algorithm,
+                    header.text_length,
+                )
+                writer = self._plain_writer(document_header, header.text_length, chunks)
+            self._writer.write_stream(destination, writer)
+        return self.read_document_header(destination)
+
+    def load_document(self, source: Path, progress: ProgressCallback | None = None) -> SignedDocument:
+        if progress is None:
+            return decode_signed_document(source.read_bytes())
+        with source.open("rb") as stream:
+            total = os.fstat(stream.fileno()).st_size
+            payload = bytearray(total)
+            with memoryview(payload) as view:
+                done = 0
+                while done < total:
+                    read = stream.readinto(view[done : done + TEXT_CHUNK_SIZE])
+                    if not read:
+                        raise FormatError("Документ изменился во время чтения")
+                    done += read
+                    progress(done, total)
+                return decode_signed_document(view)
+
+    def read_document_header(self, source: Path) -> SignedDocumentHeader:
+        with source.open("rb") as stream:
+            return read_signed_document_header(stream, source.stat().st_size)
+
+    def open_mapped_document(self, source: Path, header: SignedDocumentHeader | None = None) -> MappedDocument:
+        return MappedDocument(source, header or self.read_document_header(source))
+
+    def verify_document(
+        self,
+        document: SignedDocument,
+        author_public_key: ECC.EccKey,
+        progress: ProgressCallback | None = None,
+    ) -> bool:
+        if document.chunk_size:
+            total = len(document.text)
+
+            def text_chunks() -> Iterator[bytes]:
+                done = 0
+                for chunk in iter_encoded_text(document.text):
+                    yield chunk
+                    done += TEXT_CHUNK_SIZE
+                    self._report(progress, done, total)
+
+            leaves, text_length = self._hash_chunks(text_chunks(), document.chunk_size)
+            return self._verify_chunked(
+                document.algorithm,
+                document.signature,
+                document.chunk_size,
+                leaves,
+                text_length,
+                author_public_key,
+            )
+
+        cache_key = None
+        if self._cache is not None:
+            text_digest = new_content_digest()
+            for chunk in iter_encoded_text(document.text):
+                text_digest.update(chunk)
+            cache_key = self._cache_key(document.algorithm, document.signature, text_digest.digest(), author_public_key)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        total = len(document.text)
+        done = 0
+        digest = self._crypto.new_digest(document.algorithm)
+        for chunk in iter_encoded_text(document.text):
+            digest.update(chunk)
+            done += TEXT_CHUNK_SIZE
+            self._report(progress, done, total)
+        verified = self._crypto.verify_digest(author_public_key, digest, document.signature, document.algorithm)
+        if cache_key is not None:
+            self._cache.put(cache_key, verified)
+        return verified
+
+    def verify_mapped_document(
+        self,
+        document: MappedDocument,
+        author_public_key: ECC.EccKey,
+        progress: ProgressCallback | None = None,
+    ) -> bool:
+        header = replace(document.header, compression=None)
+        with document.text() as text:
+            return self.verify_document_view(text, header, author_public_key, progress)
+
+    def verify_document_file(
+        self,
+        source: Path,
+        header: SignedDocumentHeader,
+        author_public_key: ECC.EccKey,
+        progress: ProgressCallback | None = None,
+    ) -> bool:
+        if header.chunk_size:
+            return self._verify_chunked_file(source, header, author_public_key, progress)
+        with self._map_text(source, header) as text:
+            return self.verify_document_view(text, header, author_public_key, progress)
+
+    def _verify_chunked_file(
+        self,
+        source: Path,
+        header: SignedDocumentHeader,
+        author_public_key: ECC.EccKey,
+        progress: ProgressCallback | None,
+    ) -> bool:
+        leaves = []
+        with source.open("rb") as stream:
+            revision = _file_revision(stream.fileno())
+            if revision[2] != header.text_offset + header.text_length:
+                raise FormatError("Документ изменился во время проверки")
+            if header.text_length:
+                with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view, view[header.text_offset :] as text:
+                        leaves = self._hash_view(text, header, progress)
+            if _file_revision(stream.fileno()) != revision:
+                raise FormatError("Документ изменился во время проверки")
+        verified = self._verify_chunked(
+            header.algorithm,
+            header.signature,
+            header.chunk_size,
+            leaves or [leaf_hash(b"")],
+            header.text_length,
+            author_public_key,
+        )
+        if verified and leaves:
+            self._remember_leaves(
+                source,
+                _VerifiedLeaves(revision, header.author, header.chunk_size, header.text_offset, header.text_length, leaves),
+            )
+        return verified
+
+    def verify_document_view(
+        self,
+        text: memoryview,
+        header: SignedDocumentHeader,
+        author_public_key: ECC.EccKey,
+        progress: ProgressCallback | None = None,
+    ) -> bool:
+        done = 0
+        if header.chunk_size:
+            leaves = self._hash_view(text, header, progress)
+            return self._verify_chunked(
+                header.algorithm,
+                header.signature,
+                header.chunk_size,
+                leaves or [leaf_hash(b"")],
+                header.text_length,
+                author_public_key,
+            )
+
+        cache_key = None
+        if self._cache is not None and header.compression is None:
+            text_digest = new_content_digest()
+            for chunk in iter_buffer_chunks(text):
+                text_digest.update(chunk)
+            cache_key = self._cache_key(header.algorithm, header.signature, text_digest.digest(), author_public_key)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        digest = self._crypto.new_digest(header.algorithm)
+        stream_digest = new_content_digest() if self._cache is not None and cache_key is None else None
+        for chunk in iter_document_text(text, header):
+            digest.update(chunk)
+            if stream_digest is not None:
+                stream_digest.update(chunk)
+            done += len(chunk)
+            self._report(progress, done, header.text_length)
+        if stream_digest is not None:
+            cache_key = self._cache_key(header.algorithm, header.signature, stream_digest.digest(), author_public_key)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        verified = self._crypto.verify_digest(author_public_key, digest, header.signature, header.algorithm)
+        if cache_key is not None:
+            self._cache.put(cache_key, verified)
+        return verified
+
+    def verify_document_range(
+        self,
+        source: Path,
+        header: SignedDocumentHeader,
+        author_public_key: ECC.EccKey,
+        offset: int,
+        length: int,
+    ) -> bytes | None:
+        if not header.chunk_size:
+            raise FormatError("Документ не поддерживает проверку фрагментов")
+        if offset < 0 or length < 0 or offset + length > header.text_length:
+            raise ValidationError("Диапазон выходит за пределы документа")
+        chunk_size = header.chunk_size
+        leaves = leaf_count(header.text_length, chunk_size)
+        first = min(offset, max(header.text_length - 1, 0)) // chunk_size
+        last = max(first, (offset + length - 1) // chunk_size)
+        range_start = first * chunk_size
+        range_end = min((last + 1) * chunk_size, header.text_length)
+
+        with source.open("rb") as stream:
+            if os.fstat(stream.fileno()).st_size != header.text_offset + header.text_length:
+                raise FormatError("Документ изменился во время проверки")
+            stream.seek(header.text_offset + range_start)
+            data = stream.read(range_end - range_start)
+            if len(data) != range_end - range_start:
+                raise FormatError("Документ изменился во время проверки")
+
+            def read_node(level: int, index: int) -> bytes:
+                stream.seek(header.tree_offset + node_offset(leaves, level, index))
+                node = stream.read(MERKLE_HASH_SIZE)
+                if len(node) != MERKLE_HASH_SIZE:
+                    raise FormatError("Поврежденный формат файла")
+                return node
+
+            range_leaves = [leaf_hash(data[start : start + chunk_size]) for start in range(0, len(data), chunk_size)]
+            root = root_from_range(leaves, first, range_leaves or [leaf_hash(b"")], read_node)
+
+        payload = encode_chunked_signing_payload(chunk_size, header.text_length, root)
+        if not self._crypto.verify(author_public_key, payload, header.signature, header.algorithm):
+            return None
+        return data[offset - range_start : offset - range_start + length]
+
+    def _hash_view(
+        self,
+        text: memoryview,
+        header: SignedDocumentHeader,
+        progress: ProgressCallback | None,
+    ) -> list[bytes]:
+        leaves = []
+        done = 0
+        for chunk in iter_buffer_chunks(text, header.chunk_size):
+            leaves.append(leaf_hash(chunk))
+            done += len(chunk)
+            self._report(progress, done, header.text_length)
+        return leaves
+
+    def _hash_chunks(
+        self,
+        chunks: Iterable[bytes],
+        chunk_size: int,
+        previous: _PreviousLeaf | None = None,
+    ) -> tuple[list[bytes], int]:
+        leaves = []
+        text_length = 0
+        for index, chunk in enumerate(iter_fixed_chunks(chunks, chunk_size)):
+            leaf = previous(index, chunk) if previous is not None else None
+            leaves.append(leaf or leaf_hash(chunk))
+            text_length += len(chunk)
+        return leaves, text_length
+
+    def _sign_chunked(
+        self,
+        author: str,
+        private_key: ECC.EccKey,
+        algorithm: str,
+        leaves: list[bytes],
+        text_length: int,
+    ) -> bytes:
+        levels = build_tree(leaves)
+        payload = encode_chunked_signing_payload(self._chunk_size, text_length, levels[-1][0])
+        signature = self._crypto.sign(private_key, payload)
+        return encode_chunked_document_header(
+            author,
+            signature,
+            algorithm,
+            self._chunk_size,
+            text_length,
+            encode_tree(levels),
+        )
+
+    def _verify_chunked(
+        self,
+        algorithm: str,
+        signature: bytes,
+        chunk_size: int,
+        leaves: list[bytes],
+        text_length: int,
+        author_public_key: ECC.EccKey,
+    ) -> bool:
+        root = build_tree(leaves)[-1][0]
+        cache_key = None
+        if self._cache is not None:
+            cache_key = self._cache_key(algorithm, signature, root, author_public_key)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        payload = encode_chunked_signing_payload(chunk_size, text_length, root)
+        verified = self._crypto.verify(author_public_key, payload, signature, algorithm)
+        if cache_key is not None:
+            self._cache.put(cache_key, verified)
+        return verified
+
+    @contextmanager
+    def _previous_leaves(self, destination: Path, author: str) -> Iterator[_PreviousLeaf | None]:
+        with self._verified_leaves_lock:
+            verified = self._verified_leaves.pop(destination.resolve(), None)
+        if verified is None or verified.chunk_size != self._chunk_size or verified.author != author:
+            yield None
+            return
+        try:
+            stream = destination.open("rb")
+        except OSError:
+            yield None
+            return
+        with stream:
+            if _file_revision(stream.fileno()) != verified.revision:
+                yield None
+                return
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text_end = verified.text_offset + verified.text_length
+
+                def previous(index: int, chunk: bytes) -> bytes | None:
+                    if index >= len(verified.leaves):
+                        return None
+                    start = verified.text_offset + index * verified.chunk_size
+                    if mapped[start : min(start + verified.chunk_size, text_end)] != chunk:
+                        return None
+                    return verified.leaves[index]
+
+                yield previous
+
+    def _remember_leaves(self, source: Path, verified: _VerifiedLeaves) -> None:
+        key = source.resolve()
+        with self._verified_leaves_lock:
+            self._verified_leaves[key] = verified
+            self._verified_leaves.move_to_end(key)
+            while len(self._verified_leaves) > VERIFIED_LEAVES_LIMIT:
+                self._verified_leaves.popitem(last=False)
+
+    def _cache_key(self, algorithm: str, signature: bytes, text_digest: bytes, author_public_key: ECC.EccKey) -> bytes:
+        return VerificationCache.make_key(
+            b"document",
+            algorithm.encode("ascii"),
+            signature,
+            text_digest,
+            self._crypto.fingerprint(author_public_key),
+        )
+
+    @staticmethod
+    def _compressed_writer(
+        codec: str,
+        author: str,
+        signature: bytes,
+        algorithm: str,
+        text_length: int,
+        text_chunks: Iterable[bytes],
+    ) -> StreamWriter:
+        return lambda stream: write_compressed_document(
+            stream,
+            author,
+            signature,
+            algorithm,
+            codec,
+            text_length,
+            text_chunks,
+        )
+
+    @staticmethod
+    def _plain_writer(header: bytes, text_length: int, text_chunks: Iterable[bytes]) -> StreamWriter:
+        return lambda stream: write_document(stream, header, text_length, text_chunks)
+
+    @staticmethod
+    def _report(progress: ProgressCallback | None, done: int, total: int) -> None:
+        if progress is not None:
+            progress(min(done, total), total)
+
+    @staticmethod
+    def _iter_stream_chunks(stream: BinaryIO) -> Iterator[bytes]:
+        while chunk := stream.read(TEXT_CHUNK_SIZE):
+            yield chunk
 
-    def save_document(self, destination: Path, author: str, private_key: ECC.EccKey, text: str) -> None:
-        text_bytes = text.encode("utf-8")
-        signature = self._crypto.sign(private_key, text_bytes)
-        payload = encode_signed_document(SignedDocument(author=author, signature=signature, text=text))
-        destination.write_bytes(payload)
+    @staticmethod
+    @contextmanager
+    def _map_text(source: Path, header: SignedDocumentHeader) -> Iterator[memoryview]:
+        if stored_text_length(header) == 0:
+            yield memoryview(b"")
+            return
+        with source.open("rb") as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) != header.text_offset + stored_text_length(header):
+                raise FormatError("Документ изменился во время проверки")
+            with memoryview(mapped) as view, view[header.text_offset :] as text:
+                yield text
 
-    def load_document(self, source: Path) -> SignedDocument:
-        payload = source.read_bytes()
-        return decode_signed_document(payload)
 
-    def verify_document(self, document: SignedDocument, author_public_key: ECC.EccKey) -> bool:
-        return self._crypto.verify(author_public_key, document.text.encode("utf-8"), document.signature)
+def _file_revision(descriptor: int) -> _FileRevision:
+    stat = os.fstat(descriptor)
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import bisect
+import cProfile
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, TypeVar
+
+from app.core.exceptions import ValidationError
+from app.core.models import PROFILE_MODES, OperationStats
+from app.services import bundle_service, document_service, public_key_service, signing_daemon
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.key_service import KeyService
+from app.services.key_store import PublicKeyStore
+from app.services.public_key_service import PublicKeyService
+
+
+T = TypeVar("T")
+SizeOf = Callable[[tuple[Any, ...], dict[str, Any], Any], int]
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_TRACEMALLOC_TOP = 30
+
+
+def _argument(index: int, name: str, measure: Callable[[Any], int] = len) -> SizeOf:
+    def size(args: tuple[Any, ...], kwargs: dict[str, Any], _: Any) -> int:
+        return measure(kwargs[name] if name in kwargs else args[index])
+
+    return size
+
+
+def _loaded_payload(_: tuple[Any, ...], __: dict[str, Any], result: tuple[Any, bytes]) -> int:
+    return len(result[1])
+
+
+def _header_length(_: tuple[Any, ...], __: dict[str, Any], result: Any) -> int:
+    return result.text_offset
+
+
+def _text_length(_: tuple[Any, ...], __: dict[str, Any], result: Any) -> int:
+    return result.text_length
+
+
+_CRYPTO_METHODS: dict[str, SizeOf | None] = {
+    "load_public_key": _argument(0, "payload"),
+    "load_private_key": _argument(0, "payload"),
+    "sign": _argument(1, "payload"),
+    "verify": _argument(1, "payload"),
+    "sign_digest": None,
+    "verify_digest": None,
+}
+_KEY_METHODS: dict[str, SizeOf | None] = {"ensure_user": None, "load_private_key": None}
+_STORE_METHODS: dict[str, SizeOf | None] = {"revision": None, "load": _loaded_payload}
+_PUBLIC_KEY_METHODS: dict[str, SizeOf | None] = {"load_and_verify_public_key": None}
+_DOCUMENT_METHODS: dict[str, SizeOf | None] = {
+    "read_document_header": _header_length,
+    "load_document": None,
+    "save_document": _argument(3, "text"),
+    "sign_text": _argument(2, "text"),
+    "verify_document": _argument(0, "document", lambda document: len(document.text)),
+    "verify_document_file": _argument(1, "header", lambda header: header.text_length),
+    "verify_document_view": _argument(0, "text"),
+    "transcode_document": _text_length,
+}
+_FORMAT_FUNCTIONS: dict[ModuleType, dict[str, SizeOf | None]] = {
+    document_service: {
+        "read_signed_document_header": None,
+        "decode_signed_document": _argument(0, "payload"),
+    },
+    public_key_service: {
+        "decode_public_key_blob": _argument(0, "payload"),
+        "decode_signed_public_key_blob": _argument(0, "payload"),
+    },
+    bundle_service: {
+        "decode_bundle_index": None,
+        "decode_signed_document_header": None,
+        "decode_signed_document": _argument(0, "payload"),
+    },
+    signing_daemon: {"decode_signed_document_header": None},
+}
+
+
+@dataclass(slots=True)
+class _Operation:
+    buckets: list[int]
+    count: int = 0
+    errors: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass(slots=True)
+class _Capture:
+    mode: str
+    destination: Path
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._bounds = buckets
+        self._lock = threading.Lock()
+        self._operations: dict[str, _Operation] = {}
+        self._captures: dict[str, _Capture] = {}
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self._bounds
+
+    def observe(self, operation: str, seconds: float, size: int = 0, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._operation(operation)
+            stats.count += 1
+            stats.errors += failed
+            stats.bytes += size
+            stats.seconds += seconds
+            stats.buckets[bisect.bisect_left(self._bounds, seconds)] += 1
+
+    def snapshot(self) -> list[OperationStats]:
+        with self._lock:
+            return [self._stats(operation, stats) for operation, stats in sorted(self._operations.items())]
+
+    def drain(self) -> list[OperationStats]:
+        with self._lock:
+            operations, self._operations = self._operations, {}
+        return [self._stats(operation, stats) for operation, stats in sorted(operations.items())]
+
+    def merge(self, snapshot: Iterable[OperationStats]) -> None:
+        with self._lock:
+            for other in snapshot:
+                stats = self._operation(other.operation)
+                stats.count += other.count
+                stats.errors += other.errors
+                stats.bytes += other.bytes
+                stats.seconds += other.seconds
+                previous = 0
+                for index, total in enumerate(other.buckets.values()):
+                    stats.buckets[index] += total - previous
+                    previous = total
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations.clear()
+
+    def export(self, export_format: str) -> str:
+        if export_format == "prometheus":
+            return self.to_prometheus()
+        if export_format == "json":
+            return self.to_json_lines()
+        raise ValidationError(f"Неизвестный формат метрик: {export_format}")
+
+    def to_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = ["# TYPE app_operation_seconds histogram"]
+        for stats in snapshot:
+            label = _label(stats.operation)
+            for bound, count in stats.buckets.items():
+                lines.append(f'app_operation_seconds_bucket{{operation="{label}",le="{bound}"}} {count}')
+            lines.append(f'app_operation_seconds_sum{{operation="{label}"}} {stats.seconds:.9f}')
+            lines.append(f'app_operation_seconds_count{{operation="{label}"}} {stats.count}')
+        for name in ("bytes", "errors"):
+            lines.append(f"# TYPE app_operation_{name}_total counter")
+            for stats in snapshot:
+                lines.append(f'app_operation_{name}_total{{operation="{_label(stats.operation)}"}} {getattr(stats, name)}')
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self) -> str:
+        return "".join(json.dumps(asdict(stats)) + "\n" for stats in self.snapshot())
+
+    def capture(self, operation: str, mode: str, destination: Path) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValidationError(f"Неизвестный режим профилирования: {mode}")
+        with self._lock:
+            self._captures[operation] = _Capture(mode, destination)
+
+    def pending_captures(self) -> list[str]:
+        with self._lock:
+            return sorted(self._captures)
+
+    def wrap(self, operation: str, function: Callable[..., T], size: SizeOf | None = None) -> Callable[..., T]:
+        @functools.wraps(function)
+        def measured(*args: Any, **kwargs: Any) -> T:
+            capture = self._take_capture(operation) if self._captures else None
+            started = time.perf_counter()
+            try:
+                if capture is None:
+                    result = function(*args, **kwargs)
+                else:
+                    with _profiling(capture, operation):
+                        result = function(*args, **kwargs)
+            except BaseException:
+                self.observe(operation, time.perf_counter() - started, failed=True)
+                raise
+            self.observe(operation, time.perf_counter() - started, size(args, kwargs, result) if size else 0)
+            return result
+
+        return measured
+
+    def instrument(self, target: object, prefix: str, methods: dict[str, SizeOf | None]) -> None:
+        for name, size in methods.items():
+            setattr(target, name, self.wrap(f"{prefix}.{name}", getattr(target, name), size))
+
+    @contextmanager
+    def instrument_module(self, module: ModuleType, prefix: str, functions: dict[str, SizeOf | None]) -> Iterator[None]:
+        originals = {name: getattr(module, name) for name in functions}
+        try:
+            for name, size in functions.items():
+                setattr(module, name, self.wrap(f"{prefix}.{name}", originals[name], size))
+            yield
+        finally:
+            for name, function in originals.items():
+                setattr(module, name, function)
+
+    def _operation(self, operation: str) -> _Operation:
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = _Operation(buckets=[0] * (len(self._bounds) + 1))
+        return stats
+
+    def _stats(self, operation: str, stats: _Operation) -> OperationStats:
+        return OperationStats(
+            operation=operation,
+            count=stats.count,
+            errors=stats.errors,
+            bytes=stats.bytes,
+            seconds=stats.seconds,
+            buckets=self._cumulative(stats.buckets),
+        )
+
+    def _take_capture(self, operation: str) -> _Capture | None:
+        with self._lock:
+            return self._captures.pop(operation, None)
+
+    def _cumulative(self, buckets: list[int]) -> dict[str, int]:
+        cumulative: dict[str, int] = {}
+        total = 0
+        for bound, count in zip([*map(_bound, self._bounds), "+Inf"], buckets):
+            total += count
+            cumulative[bound] = total
+        return cumulative
+
+
+def instrument_services(
+    registry: MetricsRegistry,
+    crypto: CryptoService | None = None,
+    keys: KeyService | None = None,
+    store: PublicKeyStore | None = None,
+    public_keys: PublicKeyService | None = None,
+    documents: DocumentService | None = None,
+) -> None:
+    for target, prefix, methods in (
+        (crypto, "crypto", _CRYPTO_METHODS),
+        (keys, "keys", _KEY_METHODS),
+        (store, "store", _STORE_METHODS),
+        (public_keys, "public_keys", _PUBLIC_KEY_METHODS),
+        (documents, "documents", _DOCUMENT_METHODS),
+    ):
+        if target is not None:
+            registry.instrument(target, prefix, methods)
+
+
+@contextmanager
+def instrument_formats(registry: MetricsRegistry) -> Iterator[None]:
+    with ExitStack() as stack:
+        for module, functions in _FORMAT_FUNCTIONS.items():
+            stack.enter_context(registry.instrument_module(module, "formats", functions))
+        yield
+
+
+@contextmanager
+def _profiling(capture: _Capture, operation: str) -> Iterator[None]:
+    if capture.mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(capture.destination)
+        return
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        if not tracing:
+            tracemalloc.stop()
+        report = [f"{operation}: peak {peak - baseline} bytes above baseline"]
+        report.extend(str(statistic) for statistic in after.compare_to(before, "lineno")[:_TRACEMALLOC_TOP])
+        capture.destination.write_text("\n".join(report) + "\n", encoding="utf-8")
+
+
+def _bound(value: float) -> str:
+    return format(value, "g")
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
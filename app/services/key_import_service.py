@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import time
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
+
+from app.core.exceptions import AppError, ValidationError
+from app.core.models import KeyImportReport
+from app.services.crypto_service import CryptoService
+from app.services.public_key_service import PublicKeyService, countersign_public_key_payload
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+PUBLIC_KEY_SUFFIXES = (".pub", ".spub")
+
+_worker_state: "_KeyCountersigner | None" = None
+
+_Prepared = tuple[str, str | None, bytes | None, bytes | None, str | None]
+
+
+class _KeyCountersigner:
+    def __init__(self, signer_key_payload: bytes) -> None:
+        self._crypto = CryptoService()
+        self._signer_private_key = self._crypto.load_private_key(signer_key_payload)
+
+    def prepare(self, item: tuple[str, bytes]) -> _Prepared:
+        name, payload = item
+        try:
+            owner, blob, signed_payload = countersign_public_key_payload(self._crypto, payload, self._signer_private_key)
+        except AppError as error:
+            return name, None, None, None, str(error)
+        return name, owner, blob, signed_payload, None
+
+
+def _init_worker(signer_key_payload: bytes) -> None:
+    global _worker_state
+    _worker_state = _KeyCountersigner(signer_key_payload)
+
+
+def _prepare_in_worker(item: tuple[str, bytes]) -> _Prepared:
+    assert _worker_state is not None
+    return _worker_state.prepare(item)
+
+
+class KeyImportService:
+    def __init__(
+        self,
+        public_keys: PublicKeyService,
+        crypto: CryptoService,
+        workers: int | None = None,
+        chunk_size: int = 256,
+    ) -> None:
+        self._public_keys = public_keys
+        self._crypto = crypto
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+
+    def import_keys(self, source: Path, signer_private_key: ECC.EccKey) -> KeyImportReport:
+        started = time.perf_counter()
+        if not source.is_dir() and not zipfile.is_zipfile(source):
+            raise ValidationError("Источник ключей должен быть каталогом или zip-архивом")
+        signer_key_payload = self._crypto.export_private_key(signer_private_key)
+
+        records: dict[str, bytes] = {}
+        blobs: dict[str, bytes] = {}
+        names: dict[str, str] = {}
+        duplicates: list[str] = []
+        owner_mismatches: list[str] = []
+        malformed: dict[str, str] = {}
+        for name, owner, blob, signed_payload, error in self._prepare(source, signer_key_payload):
+            if error is not None:
+                malformed[name] = error
+            elif PurePosixPath(name).stem != owner:
+                owner_mismatches.append(name)
+            elif owner in blobs:
+                duplicates.append(name)
+            else:
+                blobs[owner] = blob
+                names[owner] = name
+                records[owner] = signed_payload
+
+        for owner in list(records):
+            if self._public_keys.stored_key_blob(owner) == blobs[owner]:
+                duplicates.append(names[owner])
+                del records[owner]
+
+        imported = self._public_keys.store_signed_payloads(records) if records else []
+        return KeyImportReport(
+            imported=imported,
+            duplicates=duplicates,
+            owner_mismatches=owner_mismatches,
+            malformed=malformed,
+            seconds=time.perf_counter() - started,
+        )
+
+    @staticmethod
+    def iter_sources(source: Path) -> Iterator[tuple[str, bytes]]:
+        if source.is_dir():
+            pending = [source]
+            while pending:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(Path(entry.path))
+                        elif entry.is_file() and entry.name.endswith(PUBLIC_KEY_SUFFIXES):
+                            path = Path(entry.path)
+                            yield path.relative_to(source).as_posix(), path.read_bytes()
+            return
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(PUBLIC_KEY_SUFFIXES):
+                    yield info.filename, archive.read(info)
+
+    def _prepare(self, source: Path, signer_key_payload: bytes) -> Iterator[_Prepared]:
+        items = self.iter_sources(source)
+        if self._workers == 1:
+            countersigner = _KeyCountersigner(signer_key_payload)
+            yield from map(countersigner.prepare, items)
+            return
+        import multiprocessing
+
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with multiprocessing.get_context(method).Pool(
+            processes=self._workers,
+            initializer=_init_worker,
+            initargs=(signer_key_payload,),
+        ) as pool:
+            yield from pool.imap(_prepare_in_worker, items, chunksize=self._chunk_size)
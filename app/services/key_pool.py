@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import TYPE_CHECKING
+
+from app.services.crypto_service import CryptoService
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+class KeyPool:
+    def __init__(self, crypto: CryptoService, size: int = 16, algorithm: str | None = None) -> None:
+        self._crypto = crypto
+        self._algorithm = algorithm or crypto.default_algorithm
+        self._keys: queue.Queue[tuple[ECC.EccKey, bytes]] = queue.Queue(maxsize=max(size, 1))
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._fill, name="key-pool", daemon=True)
+        self._thread.start()
+
+    @property
+    def algorithm(self) -> str:
+        return self._algorithm
+
+    def available(self) -> int:
+        return self._keys.qsize()
+
+    def take(self) -> tuple[ECC.EccKey, bytes]:
+        try:
+            return self._keys.get_nowait()
+        except queue.Empty:
+            return self._generate()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _generate(self) -> tuple[ECC.EccKey, bytes]:
+        key = self._crypto.generate_private_key(self._algorithm)
+        return key, self._crypto.export_private_key(key)
+
+    def _fill(self) -> None:
+        while not self._stopped.is_set():
+            item = self._generate()
+            while not self._stopped.is_set():
+                try:
+                    self._keys.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
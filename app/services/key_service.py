@@ -1,18 +1,64 @@
+from __future__ import annotations
+
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
 from pathlib import Path
-
-from Crypto.PublicKey import ECC
+from typing import TYPE_CHECKING
 
 from app.core.exceptions import StorageError, ValidationError
+from app.core.formats import is_private_key_record
+from app.core.models import CacheStats
+from app.services.atomic_writer import AtomicWriter
 from app.services.crypto_service import CryptoService
+from app.services.key_pool import KeyPool
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+
+PEM_KEY_FORMAT = "pem"
+BINARY_KEY_FORMAT = "binary"
+KEY_FORMATS = (PEM_KEY_FORMAT, BINARY_KEY_FORMAT)
+
+_KEY_FILES = {BINARY_KEY_FORMAT: "private.key", PEM_KEY_FORMAT: "private.pem"}
+_PRIVATE_KEY_MODE = 0o600
 
 
 class KeyService:
-    def __init__(self, keys_dir: Path, crypto: CryptoService) -> None:
+    def __init__(
+        self,
+        keys_dir: Path,
+        crypto: CryptoService,
+        key_pool: KeyPool | None = None,
+        key_format: str = PEM_KEY_FORMAT,
+        cache_size: int = 128,
+        cache_ttl: float | None = 300.0,
+        writer: AtomicWriter | None = None,
+    ) -> None:
+        if key_format not in KEY_FORMATS:
+            raise ValidationError(f"Неизвестный формат закрытого ключа: {key_format}")
         self._keys_dir = keys_dir
         self._crypto = crypto
+        self._key_pool = key_pool
+        self._key_format = key_format
+        self._writer = writer or AtomicWriter()
         self._keys_dir.mkdir(parents=True, exist_ok=True)
 
+        self._cache: OrderedDict[str, tuple[float, Hashable, ECC.EccKey]] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    @property
+    def key_format(self) -> str:
+        return self._key_format
+
     @staticmethod
     def validate_username(username: str) -> str:
         cleaned = username.strip()
@@ -26,23 +72,87 @@ class KeyService:
 
     def ensure_user(self, username: str) -> ECC.EccKey:
         username = self.validate_username(username)
-        key_path = self._private_key_path(username)
-        if not key_path.exists():
-            key = self._crypto.generate_private_key()
+        key_path = self._existing_key_path(username)
+        if key_path is None:
+            key, payload = self._new_private_key()
+            key_path = self._key_path(username, self._key_format)
             key_path.parent.mkdir(parents=True, exist_ok=True)
-            key_path.write_bytes(self._crypto.export_private_key(key))
-            return key
-        return self._crypto.load_private_key(key_path.read_bytes())
+            self._writer.sweep(key_path.parent)
+            with self._writer.batch() as batch:
+                self._writer.write_bytes(key_path, payload, exclusive=True, mode=_PRIVATE_KEY_MODE)
+            key_path = self._existing_key_path(username)
+            if key_path is None:
+                raise StorageError("Пара ключей пользователя не найдена")
+            if key_path in batch.written:
+                self._cache_put(username, _file_revision(key_path), key)
+                return key
+        return self._load_key(username, key_path)
+
+    def has_user(self, username: str) -> bool:
+        return self._existing_key_path(self.validate_username(username)) is not None
+
+    def usernames(self) -> list[str]:
+        return sorted(entry.name for entry in self._keys_dir.iterdir() if self._existing_key_path(entry.name))
+
+    def store_private_keys(self, records: Iterable[tuple[str, bytes]]) -> list[str]:
+        pending: dict[Path, str] = {}
+        with self._writer.batch() as batch:
+            for username, payload in records:
+                username = self.validate_username(username)
+                self._writer.sweep(self._keys_dir / username)
+                if self._existing_key_path(username) is not None:
+                    continue
+                key_format = BINARY_KEY_FORMAT if is_private_key_record(payload) else PEM_KEY_FORMAT
+                key_path = self._key_path(username, key_format)
+                try:
+                    key_path.parent.mkdir(parents=True, exist_ok=True)
+                except OSError as error:
+                    raise StorageError(f"Не удалось сохранить ключ пользователя {username}: {error}") from error
+                if self._writer.write_bytes(key_path, payload, exclusive=True, mode=_PRIVATE_KEY_MODE):
+                    pending[key_path] = username
+        created = [pending[key_path] for key_path in batch.written if key_path in pending]
+        for username in created:
+            self._invalidate(username)
+        return created
 
     def load_private_key(self, username: str) -> ECC.EccKey:
         username = self.validate_username(username)
-        key_path = self._private_key_path(username)
-        if not key_path.exists():
+        key_path = self._existing_key_path(username)
+        if key_path is None:
             raise StorageError("Пара ключей пользователя не найдена")
-        return self._crypto.load_private_key(key_path.read_bytes())
+        return self._load_key(username, key_path)
+
+    def key_revision(self, username: str) -> Hashable | None:
+        key_path = self._existing_key_path(self.validate_username(username))
+        return None if key_path is None else _file_revision(key_path)
+
+    def convert_private_key(self, username: str, key_format: str) -> bool:
+        if key_format not in KEY_FORMATS:
+            raise ValidationError(f"Неизвестный формат закрытого ключа: {key_format}")
+        username = self.validate_username(username)
+        key_path = self._existing_key_path(username)
+        if key_path is None:
+            raise StorageError("Пара ключей пользователя не найдена")
+        target = self._key_path(username, key_format)
+        if key_path == target:
+            return False
+        key = self._crypto.load_private_key(key_path.read_bytes())
+        self._writer.sweep(key_path.parent)
+        if key_format == BINARY_KEY_FORMAT:
+            payload = self._crypto.export_private_key_record(key)
+        else:
+            payload = self._crypto.export_private_key(key)
+        self._writer.write_bytes(target, payload, mode=_PRIVATE_KEY_MODE)
+        try:
+            key_path.unlink()
+        except OSError as error:
+            raise StorageError(f"Не удалось сохранить ключ пользователя {username}: {error}") from error
+        self._invalidate(username)
+        return True
 
     def delete_user_keys(self, username: str) -> None:
         username = self.validate_username(username)
+        self._invalidate(username)
         key_dir = self._keys_dir / username
         if not key_dir.exists():
             raise StorageError("Пара ключей пользователя не найдена")
@@ -51,5 +161,89 @@ class KeyService:
                 item.unlink()
         key_dir.rmdir()
 
-    def _private_key_path(self, username: str) -> Path:
-        return self._keys_dir / username / "private.pem"
+    def cache_info(self) -> CacheStats:
+        with self._cache_lock:
+            return CacheStats(
+                hits=self._cache_hits,
+                misses=self._cache_misses,
+                size=len(self._cache),
+                capacity=self._cache_size,
+            )
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
+
+    def _load_key(self, username: str, key_path: Path) -> ECC.EccKey:
+        try:
+            with key_path.open("rb") as stream:
+                revision = _stat_revision(os.fstat(stream.fileno()))
+                cached = self._cache_get(username, revision)
+                if cached is not None:
+                    return cached
+                payload = stream.read()
+        except FileNotFoundError as error:
+            raise StorageError("Пара ключей пользователя не найдена") from error
+        key = self._crypto.load_private_key(payload)
+        self._cache_put(username, revision, key)
+        return key
+
+    def _cache_get(self, username: str, revision: Hashable) -> ECC.EccKey | None:
+        if self._cache_size <= 0:
+            return None
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(username)
+            if (
+                entry is None
+                or entry[1] != revision
+                or (self._cache_ttl is not None and now - entry[0] > self._cache_ttl)
+            ):
+                self._cache.pop(username, None)
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(username)
+            self._cache_hits += 1
+            return entry[2]
+
+    def _cache_put(self, username: str, revision: Hashable, key: ECC.EccKey) -> None:
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[username] = (time.monotonic(), revision, key)
+            self._cache.move_to_end(username)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _invalidate(self, username: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(username, None)
+
+    def _new_private_key(self) -> tuple[ECC.EccKey, bytes]:
+        if self._key_pool is not None and self._key_pool.algorithm == self._crypto.default_algorithm:
+            key, payload = self._key_pool.take()
+        else:
+            key, payload = self._crypto.generate_private_key(), None
+        if self._key_format == BINARY_KEY_FORMAT:
+            return key, self._crypto.export_private_key_record(key)
+        return key, payload or self._crypto.export_private_key(key)
+
+    def _key_path(self, username: str, key_format: str) -> Path:
+        return self._keys_dir / username / _KEY_FILES[key_format]
+
+    def _existing_key_path(self, username: str) -> Path | None:
+        for key_format in (BINARY_KEY_FORMAT, PEM_KEY_FORMAT):
+            key_path = self._key_path(username, key_format)
+            if key_path.is_file():
+                return key_path
+        return None
+
+
+def _stat_revision(stat: os.stat_result) -> tuple[int, int, int, int, int]:
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
+
+
+def _file_revision(path: Path) -> tuple[int, int, int, int, int]:
+    return _stat_revision(path.stat())
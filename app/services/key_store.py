@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+from collections.abc import Hashable, Iterable, Iterator
+from pathlib import Path
+from typing import Protocol
+
+from app.core.exceptions import StorageError
+from app.services.atomic_writer import AtomicWriter
+
+
+KEYRING_SUFFIX = ".sqlite3"
+SIGNED_KEY_SUFFIX = ".spub"
+
+FileRevision = tuple[int, int, int, int, int]
+
+
+class PublicKeyStore(Protocol):
+    @property
+    def path(self) -> Path: ...
+
+    def revision(self, owner: str) -> Hashable | None: ...
+
+    def load(self, owner: str) -> tuple[Hashable, bytes]: ...
+
+    def write(self, owner: str, payload: bytes) -> None: ...
+
+    def write_many(self, items: Iterable[tuple[str, bytes]]) -> int: ...
+
+    def owners(self) -> Iterator[str]: ...
+
+    def compact(self) -> None: ...
+
+
+class DirectoryKeyStore:
+    def __init__(self, storage_dir: Path, writer: AtomicWriter | None = None) -> None:
+        self._storage_dir = storage_dir
+        self._writer = writer or AtomicWriter()
+        self._storage_dir.mkdir(parents=True, exist_ok=True)
+        self._writer.sweep(self._storage_dir)
+
+    @property
+    def path(self) -> Path:
+        return self._storage_dir
+
+    def revision(self, owner: str) -> FileRevision | None:
+        try:
+            stat = self._path(owner).stat()
+        except (OSError, ValueError):
+            return None
+        return _file_revision(stat)
+
+    def load(self, owner: str) -> tuple[FileRevision, bytes]:
+        try:
+            with self._path(owner).open("rb") as stream:
+                stat = os.fstat(stream.fileno())
+                payload = stream.read()
+        except (FileNotFoundError, ValueError) as error:
+            raise StorageError("Открытый ключ автора не найден в хранилище") from error
+        except OSError as error:
+            raise StorageError("Не удалось прочитать открытый ключ автора") from error
+        return _file_revision(stat), payload
+
+    def write(self, owner: str, payload: bytes) -> None:
+        self._writer.write_bytes(self._path(owner), payload)
+
+    def write_many(self, items: Iterable[tuple[str, bytes]]) -> int:
+        with self._writer.batch() as batch:
+            for owner, payload in items:
+                self.write(owner, payload)
+        return len(batch.written)
+
+    def owners(self) -> Iterator[str]:
+        for item in self._storage_dir.glob(f"*{SIGNED_KEY_SUFFIX}"):
+            yield item.name[: -len(SIGNED_KEY_SUFFIX)]
+
+    def compact(self) -> None:
+        pass
+
+    def _path(self, owner: str) -> Path:
+        return self._storage_dir / f"{owner}{SIGNED_KEY_SUFFIX}"
+
+
+class SqliteKeyStore:
+    def __init__(self, database: Path) -> None:
+        self._database = database
+        self._database.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS keyring ("
+            "owner TEXT PRIMARY KEY, revision INTEGER NOT NULL, payload BLOB NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    @property
+    def path(self) -> Path:
+        return self._database
+
+    def revision(self, owner: str) -> int | None:
+        with self._lock:
+            row = self._connection.execute("SELECT revision FROM keyring WHERE owner = ?", (owner,)).fetchone()
+        return None if row is None else row[0]
+
+    def load(self, owner: str) -> tuple[int, bytes]:
+        with self._lock:
+            row = self._connection.execute("SELECT revision, payload FROM keyring WHERE owner = ?", (owner,)).fetchone()
+        if row is None:
+            raise StorageError("Открытый ключ автора не найден в хранилище")
+        return row[0], row[1]
+
+    def write(self, owner: str, payload: bytes) -> None:
+        self.write_many([(owner, payload)])
+
+    def write_many(self, items: Iterable[tuple[str, bytes]]) -> int:
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                cursor = self._connection.executemany(
+                    "INSERT INTO keyring (owner, revision, payload) VALUES (?, 1, ?) "
+                    "ON CONFLICT (owner) DO UPDATE SET revision = revision + 1, payload = excluded.payload",
+                    items,
+                )
+                self._connection.execute("COMMIT")
+            except BaseException as error:
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+                if isinstance(error, sqlite3.Error):
+                    raise StorageError(f"Не удалось записать ключи в хранилище: {error}") from error
+                raise
+        return cursor.rowcount
+
+    def owners(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connection.execute("SELECT owner FROM keyring ORDER BY owner").fetchall()
+        for row in rows:
+            yield row[0]
+
+    def compact(self) -> None:
+        with self._lock:
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._connection.execute("VACUUM")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def open_key_store(path: Path, writer: AtomicWriter | None = None) -> PublicKeyStore:
+    if path.suffix == KEYRING_SUFFIX:
+        return SqliteKeyStore(path)
+    return DirectoryKeyStore(path, writer)
+
+
+def migrate_directory_store(source: DirectoryKeyStore, target: PublicKeyStore) -> int:
+    def read_all() -> Iterator[tuple[str, bytes]]:
+        for owner in source.owners():
+            _, payload = source.load(owner)
+            yield owner, payload
+
+    return target.write_many(read_all())
+
+
+def _file_revision(stat: os.stat_result) -> FileRevision:
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
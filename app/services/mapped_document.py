@@ -0,0 +1,117 @@
+import mmap
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+from app.core.exceptions import FormatError
+from app.core.formats import iter_document_text
+from app.core.models import ProgressCallback, SignedDocumentHeader
+
+
+_LINE_LOOKBEHIND = 1 << 12
+_SEARCH_WINDOW = 1 << 22
+
+
+class MappedDocument:
+    def __init__(self, source: Path, header: SignedDocumentHeader) -> None:
+        self._header = header
+        self._start = header.text_offset
+        self._end = header.text_offset + header.text_length
+        self._stream: BinaryIO = source.open("rb")
+        self._mapped: mmap.mmap | None = None
+        try:
+            if header.compression and header.text_length:
+                self._stream = self._decompress(self._stream, header)
+                self._start, self._end = 0, header.text_length
+            if header.text_length:
+                self._mapped = mmap.mmap(self._stream.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(self._mapped) != self._end:
+                    raise FormatError("Документ изменился во время чтения")
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "MappedDocument":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    @property
+    def header(self) -> SignedDocumentHeader:
+        return self._header
+
+    @property
+    def size(self) -> int:
+        return self._header.text_length
+
+    def read(self, offset: int, length: int) -> tuple[int, int, str]:
+        start = self._align(offset)
+        end = self._align(offset + length)
+        if self._mapped is None or start >= end:
+            return start, start, ""
+        payload = self._mapped[self._start + start : self._start + end]
+        return start, end, payload.decode("utf-8", errors="replace")
+
+    def line_start(self, offset: int) -> int:
+        offset = self._align(offset)
+        if self._mapped is None or offset == 0:
+            return offset
+        position = self._mapped.rfind(b"\n", max(self._start, self._start + offset - _LINE_LOOKBEHIND), self._start + offset)
+        return offset if position < 0 else position + 1 - self._start
+
+    @contextmanager
+    def text(self) -> Iterator[memoryview]:
+        if self._mapped is None:
+            yield memoryview(b"")
+            return
+        with memoryview(self._mapped) as view, view[self._start : self._end] as text:
+            yield text
+
+    def find(self, needle: str, offset: int = 0, progress: ProgressCallback | None = None) -> int | None:
+        pattern = needle.encode("utf-8")
+        if self._mapped is None or not pattern:
+            return None
+        start = self._start + self._align(offset)
+        while start < self._end:
+            stop = min(start + _SEARCH_WINDOW, self._end)
+            position = self._mapped.find(pattern, start, min(stop + len(pattern) - 1, self._end))
+            if position >= 0:
+                return position - self._start
+            if progress is not None:
+                progress(stop - self._start, self.size)
+            start = stop
+        return None
+
+    def close(self) -> None:
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        self._stream.close()
+
+    @staticmethod
+    def _decompress(stream: BinaryIO, header: SignedDocumentHeader) -> BinaryIO:
+        target = tempfile.TemporaryFile()
+        try:
+            with stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) != header.text_offset + header.compressed_length:
+                    raise FormatError("Документ изменился во время чтения")
+                with memoryview(mapped) as view, view[header.text_offset :] as body:
+                    for chunk in iter_document_text(body, header):
+                        target.write(chunk)
+            target.flush()
+        except BaseException:
+            target.close()
+            raise
+        return target
+
+    def _align(self, offset: int) -> int:
+        offset = min(max(offset, 0), self.size)
+        if self._mapped is None:
+            return offset
+        limit = min(offset + 3, self.size)
+        while offset < limit and self._mapped[self._start + offset] & 0xC0 == 0x80:
+            offset += 1
+        return offset
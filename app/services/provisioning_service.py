@@ -0,0 +1,92 @@
+import os
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from app.core.models import ProvisionReport
+from app.services.crypto_service import CryptoService
+from app.services.key_service import BINARY_KEY_FORMAT, KeyService
+from app.services.public_key_service import PublicKeyService
+
+
+PUBLIC_KEY_SUFFIX = ".pub"
+
+
+def _generate_batch(algorithm: str, key_format: str, usernames: list[str]) -> list[tuple[str, bytes, bytes]]:
+    crypto = CryptoService(default_algorithm=algorithm)
+    export = crypto.export_private_key_record if key_format == BINARY_KEY_FORMAT else crypto.export_private_key
+    records = []
+    for username in usernames:
+        key = crypto.generate_private_key()
+        records.append((username, export(key), crypto.export_public_key(key)))
+    return records
+
+
+def _generate_batch_in_worker(task: tuple[str, str, list[str]]) -> list[tuple[str, bytes, bytes]]:
+    return _generate_batch(*task)
+
+
+class ProvisioningService:
+    def __init__(
+        self,
+        keys: KeyService,
+        public_keys: PublicKeyService,
+        crypto: CryptoService,
+        workers: int | None = None,
+        batch_size: int = 64,
+    ) -> None:
+        self._keys = keys
+        self._public_keys = public_keys
+        self._crypto = crypto
+        self._workers = workers or os.cpu_count() or 1
+        self._batch_size = batch_size
+
+    def provision(self, usernames: Iterable[str], export_dir: Path | None = None) -> ProvisionReport:
+        started = time.perf_counter()
+        pending: list[str] = []
+        skipped: list[str] = []
+        seen: set[str] = set()
+        for raw_name in usernames:
+            username = self._keys.validate_username(raw_name)
+            if username in seen:
+                continue
+            seen.add(username)
+            if self._keys.has_user(username):
+                skipped.append(username)
+            else:
+                pending.append(username)
+
+        if export_dir is not None:
+            export_dir.mkdir(parents=True, exist_ok=True)
+
+        created: list[str] = []
+        for records in self._generate(pending):
+            stored = set(self._keys.store_private_keys((username, payload) for username, payload, _ in records))
+            exports = []
+            for username, _, public_blob in records:
+                if username not in stored:
+                    skipped.append(username)
+                    continue
+                created.append(username)
+                if export_dir is not None:
+                    exports.append((username, public_blob, export_dir / f"{username}{PUBLIC_KEY_SUFFIX}"))
+            self._public_keys.export_public_key_blobs(exports)
+
+        return ProvisionReport(created=created, skipped=skipped, seconds=time.perf_counter() - started)
+
+    def _generate(self, usernames: list[str]) -> Iterator[list[tuple[str, bytes, bytes]]]:
+        algorithm = self._crypto.default_algorithm
+        key_format = self._keys.key_format
+        tasks = [
+            (algorithm, key_format, usernames[start : start + self._batch_size])
+            for start in range(0, len(usernames), self._batch_size)
+        ]
+        if self._workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield _generate_batch(*task)
+            return
+        import multiprocessing
+
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with multiprocessing.get_context(method).Pool(processes=min(self._workers, len(tasks))) as pool:
+            yield from pool.imap_unordered(_generate_batch_in_worker, tasks)
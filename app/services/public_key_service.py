@@ -1,56 +1,204 @@
-from pathlib import Path
+from __future__ import annotations
 
-from Crypto.PublicKey import ECC
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 from app.core.exceptions import FormatError, StorageError
 from app.core.formats import (
     decode_public_key_blob,
     decode_signed_public_key_blob,
+    detect_format,
     encode_public_key_blob,
+    encode_public_key_signing_payload,
     encode_signed_public_key_blob,
 )
-from app.core.models import PublicKeyBlob, SignedPublicKeyBlob
+from app.core.models import CacheStats, FileKind, PublicKeyBlob, SignedPublicKeyBlob
+from app.services.atomic_writer import AtomicWriter
 from app.services.crypto_service import CryptoService
+from app.services.key_store import PublicKeyStore
+from app.services.verification_cache import VerificationCache
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
 
 
 class PublicKeyService:
-    def __init__(self, storage_dir: Path, crypto: CryptoService) -> None:
-        self._storage_dir = storage_dir
+    def __init__(
+        self,
+        store: PublicKeyStore,
+        crypto: CryptoService,
+        cache_size: int = 1024,
+        verification_cache: VerificationCache | None = None,
+        writer: AtomicWriter | None = None,
+    ) -> None:
+        self._store = store
         self._crypto = crypto
-        self._storage_dir.mkdir(parents=True, exist_ok=True)
+        self._verification_cache = verification_cache
+        self._writer = writer or AtomicWriter()
+
+        self._cache: OrderedDict[tuple[str, bytes], tuple[Hashable, ECC.EccKey]] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
 
     def export_public_key(self, owner: str, private_key: ECC.EccKey, destination: Path) -> None:
-        blob = self._crypto.export_public_key(private_key)
-        payload = encode_public_key_blob(PublicKeyBlob(owner=owner, key_blob=blob))
-        destination.write_bytes(payload)
+        self.export_public_key_blob(owner, self._crypto.export_public_key(private_key), destination)
+
+    def export_public_key_blob(self, owner: str, key_blob: bytes, destination: Path) -> None:
+        payload = encode_public_key_blob(PublicKeyBlob(owner=owner, key_blob=key_blob))
+        self._writer.write_bytes(destination, payload)
+
+    def export_public_key_blobs(self, records: Iterable[tuple[str, bytes, Path]]) -> None:
+        with self._writer.batch():
+            for owner, key_blob, destination in records:
+                self.export_public_key_blob(owner, key_blob, destination)
 
     def import_public_key(self, source: Path, signer_private_key: ECC.EccKey) -> str:
-        payload = source.read_bytes()
-        owner, blob = self._extract_owner_and_blob(payload)
-        data_to_sign = encode_public_key_blob(PublicKeyBlob(owner=owner, key_blob=blob))
-        signature = self._crypto.sign(signer_private_key, data_to_sign)
-        signed_blob = SignedPublicKeyBlob(owner=owner, key_blob=blob, signature=signature)
-        storage_path = self._storage_dir / f"{owner}.spub"
-        storage_path.write_bytes(encode_signed_public_key_blob(signed_blob))
+        owner, _, signed_payload = self.countersign_payload(source.read_bytes(), signer_private_key)
+        self._store.write(owner, signed_payload)
+        self._invalidate(owner)
         return owner
 
+    def import_public_keys(self, sources: list[Path], signer_private_key: ECC.EccKey) -> list[str]:
+        records: dict[str, bytes] = {}
+        for source in sources:
+            owner, _, signed_payload = self.countersign_payload(source.read_bytes(), signer_private_key)
+            records[owner] = signed_payload
+        return self.store_signed_payloads(records)
+
+    def countersign_payload(self, payload: bytes, signer_private_key: ECC.EccKey) -> tuple[str, bytes, bytes]:
+        return countersign_public_key_payload(self._crypto, payload, signer_private_key)
+
+    def store_signed_payloads(self, records: dict[str, bytes]) -> list[str]:
+        self._store.write_many(records.items())
+        for owner in records:
+            self._invalidate(owner)
+        return list(records)
+
+    def stored_key_blob(self, owner: str) -> bytes | None:
+        try:
+            _, payload = self._store.load(owner)
+            return decode_signed_public_key_blob(payload).key_blob
+        except (FormatError, StorageError):
+            return None
+
     def load_and_verify_public_key(self, owner: str, verifier_public_key: ECC.EccKey) -> ECC.EccKey:
-        storage_path = self._storage_dir / f"{owner}.spub"
-        if not storage_path.exists():
+        revision = self._store.revision(owner)
+        if revision is None:
             raise StorageError("Открытый ключ автора не найден в хранилище")
-        payload = storage_path.read_bytes()
+        verifier_fingerprint = self._crypto.fingerprint(verifier_public_key)
+        cache_key = (owner, verifier_fingerprint)
+        cached = self._cache_get(cache_key, revision)
+        if cached is not None:
+            return cached
+
+        revision, payload = self._store.load(owner)
         signed_blob = decode_signed_public_key_blob(payload)
-        data = encode_public_key_blob(PublicKeyBlob(owner=signed_blob.owner, key_blob=signed_blob.key_blob))
-        if not self._crypto.verify(verifier_public_key, data, signed_blob.signature):
+        if not self._countersignature_valid(signed_blob, payload, verifier_public_key, verifier_fingerprint):
             raise StorageError("Подпись под открытым ключом не подтверждена")
         if signed_blob.owner != owner:
             raise StorageError("Несоответствие имени владельца открытого ключа")
-        return self._crypto.load_public_key(signed_blob.key_blob)
+        public_key = self._crypto.load_public_key(signed_blob.key_blob)
+        self._cache_put(cache_key, revision, public_key)
+        return public_key
 
-    def _extract_owner_and_blob(self, payload: bytes) -> tuple[str, bytes]:
-        try:
-            unsigned = decode_public_key_blob(payload)
-            return unsigned.owner, unsigned.key_blob
-        except FormatError:
-            signed = decode_signed_public_key_blob(payload)
-            return signed.owner, signed.key_blob
+    def owners(self) -> list[str]:
+        return sorted(self._store.owners())
+
+    def key_revision(self, owner: str) -> Hashable | None:
+        return self._store.revision(owner)
+
+    def cache_info(self) -> CacheStats:
+        with self._cache_lock:
+            return CacheStats(
+                hits=self._cache_hits,
+                misses=self._cache_misses,
+                size=len(self._cache),
+                capacity=self._cache_size,
+            )
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
+
+    def _cache_get(self, cache_key: tuple[str, bytes], revision: Hashable) -> ECC.EccKey | None:
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry is None or entry[0] != revision:
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(cache_key)
+            self._cache_hits += 1
+            return entry[1]
+
+    def _cache_put(self, cache_key: tuple[str, bytes], revision: Hashable, public_key: ECC.EccKey) -> None:
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[cache_key] = (revision, public_key)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _invalidate(self, owner: str) -> None:
+        with self._cache_lock:
+            for cache_key in [cache_key for cache_key in self._cache if cache_key[0] == owner]:
+                del self._cache[cache_key]
+
+    def _countersignature_valid(
+        self,
+        signed_blob: SignedPublicKeyBlob,
+        payload: bytes,
+        verifier_public_key: ECC.EccKey,
+        verifier_fingerprint: bytes,
+    ) -> bool:
+        cache_key = None
+        if self._verification_cache is not None:
+            cache_key = VerificationCache.make_key(b"public-key", payload, verifier_fingerprint)
+            cached = self._verification_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        data = encode_public_key_signing_payload(PublicKeyBlob(owner=signed_blob.owner, key_blob=signed_blob.key_blob))
+        verified = self._crypto.verify(verifier_public_key, data, signed_blob.signature, signed_blob.algorithm)
+        if cache_key is not None:
+            self._verification_cache.put(cache_key, verified)
+        return verified
+
+
+def countersign_public_key_payload(
+    crypto: CryptoService,
+    payload: bytes,
+    signer_private_key: ECC.EccKey,
+) -> tuple[str, bytes, bytes]:
+    owner, blob = _extract_owner_and_blob(payload)
+    crypto.load_public_key(blob)
+    data_to_sign = encode_public_key_signing_payload(PublicKeyBlob(owner=owner, key_blob=blob))
+    signed_blob = SignedPublicKeyBlob(
+        owner=owner,
+        key_blob=blob,
+        signature=crypto.sign(signer_private_key, data_to_sign),
+        algorithm=crypto.algorithm_for_key(signer_private_key),
+    )
+    return owner, blob, encode_signed_public_key_blob(signed_blob)
+
+
+def _extract_owner_and_blob(payload: bytes) -> tuple[str, bytes]:
+    kind = detect_format(payload)
+    if kind is FileKind.PUBLIC_KEY:
+        unsigned = decode_public_key_blob(payload)
+        return unsigned.owner, unsigned.key_blob
+    if kind is FileKind.SIGNED_PUBLIC_KEY:
+        signed = decode_signed_public_key_blob(payload)
+        return signed.owner, signed.key_blob
+    try:
+        unsigned = decode_public_key_blob(payload)
+        return unsigned.owner, unsigned.key_blob
+    except FormatError:
+        signed = decode_signed_public_key_blob(payload)
+        return signed.owner, signed.key_blob
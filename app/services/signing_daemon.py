@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import functools
+import json
+import os
+import signal
+import socket
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+from app.core.exceptions import AppError, FormatError, ValidationError
+from app.core.formats import decode_signed_document_header
+from app.core.models import VerificationStatus
+from app.services.async_services import AsyncDocumentService, AsyncPublicKeyService
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.key_service import KeyService
+from app.services.public_key_service import PublicKeyService
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import ECC
+
+    from app.services.instrumentation import MetricsRegistry
+
+
+MAX_REQUEST_SIZE = 64 << 20
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_KEY_CACHE_SIZE = 1024
+
+Request = TypeVar("Request")
+Result = TypeVar("Result")
+Response = dict[str, Any]
+
+
+@dataclass(slots=True)
+class _UserKey:
+    private_payload: bytes
+    public_key: ECC.EccKey
+
+
+class _Batcher(Generic[Request, Result]):
+    def __init__(
+        self,
+        flush: Callable[[list[Request]], Awaitable[list[Result | AppError]]],
+        size: int,
+        in_flight: int,
+    ) -> None:
+        self._flush = flush
+        self._size = size
+        self._slots = asyncio.Semaphore(in_flight)
+        self._queue: asyncio.Queue[tuple[Request, asyncio.Future[Result]]] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+        self._dispatches: set[asyncio.Task[None]] = set()
+
+    async def submit(self, request: Request) -> Result:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        future: asyncio.Future[Result] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((request, future))
+        return await future
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self._size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            dispatch = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(dispatch)
+            dispatch.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list[tuple[Request, asyncio.Future[Result]]]) -> None:
+        try:
+            results = await self._flush([request for request, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, AppError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class SigningDaemon:
+    def __init__(
+        self,
+        keys: KeyService,
+        public_keys: PublicKeyService,
+        documents: DocumentService,
+        crypto: CryptoService,
+        socket_path: Path,
+        workers: int | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pipelined: int = 256,
+        metrics: MetricsRegistry | None = None,
+        key_cache_size: int = DEFAULT_KEY_CACHE_SIZE,
+    ) -> None:
+        self._keys = keys
+        self._metrics = metrics
+        self._crypto = crypto
+        self._socket_path = socket_path
+        self._max_pipelined = max_pipelined
+        self._documents = AsyncDocumentService(documents, crypto, workers=workers)
+        self._public_keys = AsyncPublicKeyService(public_keys, crypto)
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        self._signer = _Batcher(self._documents.sign_batch, batch_size, 2 * max(workers, 1))
+        self._verifier = _Batcher(self._documents.verify_batch, batch_size, 2 * max(workers, 1))
+        self._key_cache_size = key_cache_size
+        self._users: OrderedDict[str, tuple[Hashable, _UserKey]] = OrderedDict()
+        self._loading: dict[str, tuple[Hashable, asyncio.Future[tuple[Hashable, _UserKey]]]] = {}
+        self._key_blobs: OrderedDict[int, tuple[ECC.EccKey, bytes]] = OrderedDict()
+        self._stopped = asyncio.Event()
+        self._handlers: dict[str, Callable[[dict[str, Any]], Awaitable[Response]]] = {
+            "ping": self._ping,
+            "sign": self._sign,
+            "verify": self._verify,
+            "reload": self._reload,
+            "metrics": self._export_metrics,
+        }
+
+    @property
+    def socket_path(self) -> Path:
+        return self._socket_path
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def serve(self) -> None:
+        self._remove_stale_socket()
+        previous_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self._handle_connection,
+                path=str(self._socket_path),
+                limit=MAX_REQUEST_SIZE,
+            )
+        finally:
+            os.umask(previous_umask)
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self.stop)
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+            self._socket_path.unlink(missing_ok=True)
+            await self._signer.aclose()
+            await self._verifier.aclose()
+            await self._documents.aclose()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending: set[asyncio.Task[None]] = set()
+        slots = asyncio.Semaphore(self._max_pipelined)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self._write(writer, _error(None, ValidationError("Слишком большой запрос")))
+                    break
+                if not line:
+                    break
+                await slots.acquire()
+                task = asyncio.create_task(self._respond(line, writer, slots))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter, slots: asyncio.Semaphore) -> None:
+        try:
+            await self._write(writer, await self._dispatch(line))
+        finally:
+            slots.release()
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, response: Response) -> None:
+        writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def _dispatch(self, line: bytes) -> Response:
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                raise ValidationError("Некорректный запрос") from error
+            if not isinstance(request, dict):
+                raise ValidationError("Некорректный запрос")
+            request_id = request.get("id")
+            handler = self._handlers.get(request.get("op"))
+            if handler is None:
+                raise ValidationError(f"Неизвестная операция: {request.get('op')}")
+            return {"id": request_id, "ok": True} | await handler(request)
+        except AppError as error:
+            return _error(request_id, error)
+        except Exception as error:
+            return _error(request_id, AppError(f"Внутренняя ошибка: {error}"))
+
+    async def _ping(self, _: dict[str, Any]) -> Response:
+        return {}
+
+    async def _reload(self, _: dict[str, Any]) -> Response:
+        self._keys.clear_cache()
+        self._users.clear()
+        self._loading.clear()
+        self._key_blobs.clear()
+        return {}
+
+    async def _export_metrics(self, request: dict[str, Any]) -> Response:
+        if self._metrics is None:
+            raise ValidationError("Метрики не включены, запустите демон с --metrics")
+        return {"metrics": self._metrics.export(request.get("format", "prometheus"))}
+
+    async def _sign(self, request: dict[str, Any]) -> Response:
+        user = _field(request, "user")
+        try:
+            text = _payload(request, "text").decode("utf-8")
+        except UnicodeDecodeError as error:
+            raise FormatError("Некорректная кодировка документа") from error
+        user_key = await self._user_key(user)
+        document = await self._signer.submit((user, user_key.private_payload, text))
+        return {"document": base64.b64encode(document).decode("ascii")}
+
+    async def _verify(self, request: dict[str, Any]) -> Response:
+        verifier_public_key = (await self._user_key(_field(request, "user"))).public_key
+        payload = _payload(request, "document")
+        author = None
+        try:
+            header = decode_signed_document_header(payload)
+            author = header.author
+            try:
+                author_public_key = await self._public_keys.load_and_verify_public_key(author, verifier_public_key)
+            except AppError as error:
+                return _verification(VerificationStatus.UNKNOWN_AUTHOR, author, str(error))
+            verified = await self._verifier.submit((payload, header, self._key_blob(author_public_key)))
+        except FormatError as error:
+            return _verification(VerificationStatus.FORMAT_ERROR, author, str(error))
+        return _verification(VerificationStatus.OK if verified else VerificationStatus.BAD_SIGNATURE, author)
+
+    async def _user_key(self, user: str) -> _UserKey:
+        user = self._keys.validate_username(user)
+        revision = self._keys.key_revision(user)
+        cached = self._users.get(user)
+        if cached is not None and revision is not None and cached[0] == revision:
+            self._users.move_to_end(user)
+            return cached[1]
+        loading = self._loading.get(user)
+        if loading is None or loading[0] != revision:
+            pending = asyncio.ensure_future(asyncio.to_thread(self._load_user_key, user))
+            self._loading[user] = (revision, pending)
+            pending.add_done_callback(functools.partial(self._finish_user_load, user))
+        else:
+            pending = loading[1]
+        return (await asyncio.shield(pending))[1]
+
+    def _finish_user_load(self, user: str, done: asyncio.Future[tuple[Hashable, _UserKey]]) -> None:
+        loading = self._loading.get(user)
+        if loading is not None and loading[1] is done:
+            del self._loading[user]
+        if done.cancelled() or done.exception() is not None:
+            return
+        self._users[user] = done.result()
+        self._users.move_to_end(user)
+        while len(self._users) > self._key_cache_size:
+            self._users.popitem(last=False)
+
+    def _load_user_key(self, user: str) -> tuple[Hashable, _UserKey]:
+        revision = self._keys.key_revision(user)
+        private_key = self._keys.load_private_key(user)
+        return revision, _UserKey(self._crypto.export_private_key(private_key), private_key.public_key())
+
+    def _key_blob(self, public_key: ECC.EccKey) -> bytes:
+        entry = self._key_blobs.get(id(public_key))
+        if entry is None or entry[0] is not public_key:
+            entry = (public_key, self._crypto.export_public_key(public_key))
+            self._key_blobs[id(public_key)] = entry
+        self._key_blobs.move_to_end(id(public_key))
+        while len(self._key_blobs) > self._key_cache_size:
+            self._key_blobs.popitem(last=False)
+        return entry[1]
+
+    def _remove_stale_socket(self) -> None:
+        if not self._socket_path.exists():
+            self._socket_path.parent.mkdir(parents=True, exist_ok=True)
+            return
+        if not self._socket_path.is_socket():
+            raise ValidationError(f"{self._socket_path} существует и не является сокетом")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self._socket_path))
+            except ConnectionRefusedError:
+                self._socket_path.unlink()
+                return
+        raise ValidationError("Демон уже запущен")
+
+
+def _field(request: dict[str, Any], name: str) -> str:
+    value = request.get(name)
+    if not isinstance(value, str):
+        raise ValidationError(f"В запросе не задано поле {name}")
+    return value
+
+
+def _payload(request: dict[str, Any], name: str) -> bytes:
+    try:
+        return base64.b64decode(_field(request, name), validate=True)
+    except binascii.Error as error:
+        raise ValidationError(f"Поле {name} должно быть в base64") from error
+
+
+def _verification(status: VerificationStatus, author: str | None, message: str | None = None) -> Response:
+    return {"status": str(status), "author": author, "message": message}
+
+
+def _error(request_id: Any, error: AppError) -> Response:
+    return {"id": request_id, "ok": False, "error": str(error), "error_type": type(error).__name__}
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.core.digests import new_content_digest
+from app.core.exceptions import StorageError
+from app.core.models import CacheStats
+
+
+_TOUCH_INTERVAL_S = 60.0
+_EVICT_EVERY = 256
+
+
+class VerificationCache:
+    def __init__(self, database: Path, max_entries: int = 1_000_000) -> None:
+        self._database = database
+        self._max_entries = max_entries
+        self._database.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._puts = 0
+        self._connection = sqlite3.connect(database, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS verifications ("
+            "key BLOB PRIMARY KEY, verified INTEGER NOT NULL, last_used REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS verifications_last_used ON verifications (last_used)")
+
+    @property
+    def path(self) -> Path:
+        return self._database
+
+    @staticmethod
+    def make_key(kind: bytes, *parts: bytes) -> bytes:
+        digest = new_content_digest()
+        digest.update(kind)
+        for part in parts:
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.digest()
+
+    def get(self, key: bytes) -> bool | None:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT verified, last_used FROM verifications WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._misses += 1
+                    return None
+                self._hits += 1
+                if now - row[1] > _TOUCH_INTERVAL_S:
+                    self._connection.execute("UPDATE verifications SET last_used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as error:
+                raise StorageError(f"Ошибка кэша проверок: {error}") from error
+        return bool(row[0])
+
+    def put(self, key: bytes, verified: bool) -> None:
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO verifications (key, verified, last_used) VALUES (?, ?, ?)",
+                    (key, int(verified), time.time()),
+                )
+                self._puts += 1
+                if self._puts % _EVICT_EVERY == 0:
+                    self._evict()
+            except sqlite3.Error as error:
+                raise StorageError(f"Ошибка кэша проверок: {error}") from error
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM verifications").fetchone()[0]
+            return CacheStats(hits=self._hits, misses=self._misses, size=size, capacity=self._max_entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM verifications")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        excess = self._connection.execute("SELECT COUNT(*) FROM verifications").fetchone()[0] - self._max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM verifications WHERE key IN "
+                "(SELECT key FROM verifications ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
@@ -1,13 +1,22 @@
+from collections.abc import Callable
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, messagebox
+from typing import Any
 
 import customtkinter as ctk
 
-from app.core.exceptions import AppError
+from app.core.exceptions import AppError, OperationCancelledError
+from app.core.models import ProgressCallback
 from app.services.document_service import DocumentService
+from app.services.key_import_service import KeyImportService
 from app.services.key_service import KeyService
 from app.services.public_key_service import PublicKeyService
+from app.ui.paged_viewer import PAGE_SIZE, PagedTextView
+from app.ui.task_runner import CancellationToken, TaskRunner
+
+
+LARGE_DOCUMENT_SIZE = 8 << 20
 
 
 class MainWindow(ctk.CTk):
@@ -16,14 +25,19 @@ class MainWindow(ctk.CTk):
         key_service: KeyService,
         public_key_service: PublicKeyService,
         document_service: DocumentService,
+        key_import_service: KeyImportService,
     ) -> None:
         super().__init__()
         self._key_service = key_service
         self._public_key_service = public_key_service
         self._document_service = document_service
+        self._key_import_service = key_import_service
 
         self._current_user: str | None = None
         self._current_private_key = None
+        self._tasks = TaskRunner(self, workers=3)
+        self._active_task: CancellationToken | None = None
+        self._background_check: CancellationToken | None = None
 
         self._default_title = "Подписанный документ"
         self.title(self._default_title)
@@ -51,6 +65,7 @@ class MainWindow(ctk.CTk):
         key_menu = tk.Menu(menu_bar, tearoff=0)
         key_menu.add_command(label="Экспорт открытого ключа", command=self.export_public_key)
         key_menu.add_command(label="Импорт открытого ключа", command=self.import_public_key)
+        key_menu.add_command(label="Импорт каталога открытых ключей", command=self.import_public_key_directory)
         key_menu.add_command(label="Удаление пары ключей", command=self.delete_key_pair)
         key_menu.add_command(label="Выбор закрытого ключа", command=self.select_private_key)
 
@@ -86,13 +101,32 @@ class MainWindow(ctk.CTk):
         self._save_button.grid(row=0, column=4, padx=(0, 12), pady=12)
 
         editor_frame = ctk.CTkFrame(self)
-        editor_frame.grid(row=1, column=0, sticky="nsew", padx=14, pady=(0, 14))
+        editor_frame.grid(row=1, column=0, sticky="nsew", padx=14, pady=(0, 8))
         editor_frame.grid_rowconfigure(0, weight=1)
         editor_frame.grid_columnconfigure(0, weight=1)
 
         self._text = ctk.CTkTextbox(editor_frame, wrap="word")
         self._text.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
 
+        self._viewer = PagedTextView(editor_frame, self._tasks)
+        self._viewer.grid(row=0, column=0, sticky="nsew")
+        self._viewer.grid_remove()
+
+        status = ctk.CTkFrame(self)
+        status.grid(row=2, column=0, sticky="ew", padx=14, pady=(0, 14))
+        status.grid_columnconfigure(1, weight=1)
+
+        self._status_label = ctk.CTkLabel(status, text="")
+        self._status_label.grid(row=0, column=0, padx=(12, 8), pady=8)
+
+        self._progress = ctk.CTkProgressBar(status)
+        self._progress.grid(row=0, column=1, sticky="ew", padx=(0, 8), pady=8)
+        self._progress.set(0)
+
+        self._cancel_button = ctk.CTkButton(status, text="Отмена", width=90, command=self.cancel_operation)
+        self._cancel_button.grid(row=0, column=2, padx=(0, 12), pady=8)
+        self._cancel_button.configure(state="disabled")
+
     def _lock_username_entry(self) -> None:
         self._username_entry.configure(state="disabled")
 
@@ -110,17 +144,99 @@ class MainWindow(ctk.CTk):
 
     def _apply_username_selection(self) -> None:
         raw_name = self._username_var.get()
-        if not raw_name.strip():
+        if not raw_name.strip() or self._is_busy():
             return
         try:
             username = self._key_service.validate_username(raw_name)
-            self._current_private_key = self._key_service.ensure_user(username)
+        except AppError as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+
+        def on_success(private_key: Any) -> None:
+            self._current_private_key = private_key
             self._current_user = username
             self._username_var.set(username)
-            self._lock_username_entry()
             messagebox.showinfo("Пользователь", f"Выбран пользователь: {username}")
-        except AppError as error:
+
+        self._lock_username_entry()
+        self._start_task(
+            "Подготовка ключей",
+            lambda _: self._key_service.ensure_user(username),
+            on_success,
+            "Не удалось подготовить ключи",
+            on_failure=self._unlock_username_entry,
+        )
+
+    def _is_busy(self) -> bool:
+        return self._active_task is not None
+
+    def _start_task(
+        self,
+        description: str,
+        work: Callable[[ProgressCallback], Any],
+        on_success: Callable[[Any], None],
+        failure_message: str,
+        cancellable: bool = False,
+        on_failure: Callable[[], None] | None = None,
+    ) -> None:
+        def finish(result: Any) -> None:
+            self._set_idle()
+            on_success(result)
+
+        def fail(error: BaseException) -> None:
+            self._set_idle()
+            if on_failure is not None:
+                on_failure()
+            self._show_task_error(error, failure_message)
+
+        self._set_busy(description, cancellable)
+        self._active_task = self._tasks.submit(work, finish, fail, self._on_task_progress)
+
+    def _set_busy(self, description: str, cancellable: bool) -> None:
+        for button in (self._select_user_button, self._load_button, self._save_button):
+            button.configure(state="disabled")
+        self._cancel_button.configure(state="normal" if cancellable else "disabled")
+        self._status_label.configure(text=description)
+        self._progress.configure(mode="indeterminate")
+        self._progress.start()
+
+    def _set_idle(self) -> None:
+        self._active_task = None
+        for button in (self._select_user_button, self._load_button, self._save_button):
+            button.configure(state="normal")
+        self._cancel_button.configure(state="disabled")
+        self._status_label.configure(text="")
+        self._progress.stop()
+        self._progress.configure(mode="determinate")
+        self._progress.set(0)
+
+    def _on_task_progress(self, done: int, total: int) -> None:
+        if self._progress.cget("mode") == "indeterminate":
+            self._progress.stop()
+            self._progress.configure(mode="determinate")
+        self._progress.set(done / total if total else 1)
+
+    def _show_task_error(self, error: BaseException, failure_message: str) -> None:
+        if isinstance(error, OperationCancelledError):
+            self._status_label.configure(text=str(error))
+        elif isinstance(error, AppError):
             messagebox.showerror("Ошибка", str(error))
+        elif isinstance(error, OSError):
+            messagebox.showerror("Ошибка", f"{failure_message}: {error}")
+        else:
+            self.report_callback_exception(type(error), error, error.__traceback__)
+
+    def cancel_operation(self) -> None:
+        if self._active_task is not None:
+            self._active_task.cancel()
+            self._status_label.configure(text="Отмена...")
+            self._cancel_button.configure(state="disabled")
+
+    def destroy(self) -> None:
+        self._cancel_background_check()
+        self._tasks.shutdown()
+        self._viewer.clear()
+        super().destroy()
 
     def _require_user_context(self) -> tuple[str, object]:
         if self._current_user is None or self._current_private_key is None:
@@ -130,52 +246,156 @@ class MainWindow(ctk.CTk):
     def _reset_title(self) -> None:
         self.title(self._default_title)
 
+    def _show_editor(self) -> None:
+        self._cancel_background_check()
+        self._viewer.clear()
+        self._viewer.grid_remove()
+        self._text.grid()
+
+    def _show_viewer(self, document: Any) -> None:
+        self._cancel_background_check()
+        self._text.delete("1.0", tk.END)
+        self._text.grid_remove()
+        self._viewer.grid()
+        self._viewer.show(document)
+
     def create_document(self) -> None:
+        if self._is_busy():
+            return
+        self._show_editor()
         self._text.delete("1.0", tk.END)
         self._reset_title()
 
     def save_document(self) -> None:
+        if self._is_busy():
+            return
         try:
             username, private_key = self._require_user_context()
-            target = filedialog.asksaveasfilename(
-                title="Сохранить подписанный документ",
-                defaultextension=".sd",
-                filetypes=[("Signed Document", "*.sd"), ("All Files", "*.*")],
-            )
-            if not target:
-                return
-            text = self._text.get("1.0", tk.END).rstrip("\n")
-            self._document_service.save_document(Path(target), username, private_key, text)
-            messagebox.showinfo("Успешно", "Документ сохранен")
         except AppError as error:
             messagebox.showerror("Ошибка", str(error))
-        except OSError as error:
-            messagebox.showerror("Ошибка", f"Не удалось сохранить документ: {error}")
+            return
+        if self._viewer.document is not None:
+            messagebox.showerror("Ошибка", "Большой документ открыт только для просмотра")
+            return
+        target = filedialog.asksaveasfilename(
+            title="Сохранить подписанный документ",
+            defaultextension=".sd",
+            filetypes=[("Signed Document", "*.sd"), ("All Files", "*.*")],
+        )
+        if not target:
+            return
+        text = self._text.get("1.0", tk.END).rstrip("\n")
+        self._start_task(
+            "Сохранение документа",
+            lambda progress: self._document_service.save_document(Path(target), username, private_key, text, progress),
+            lambda _: messagebox.showinfo("Успешно", "Документ сохранен"),
+            "Не удалось сохранить документ",
+            cancellable=True,
+        )
 
     def load_document(self) -> None:
+        if self._is_busy():
+            return
         try:
             _, private_key = self._require_user_context()
-            source = filedialog.askopenfilename(
-                title="Загрузить подписанный документ",
-                filetypes=[("Signed Document", "*.sd"), ("All Files", "*.*")],
-            )
-            if not source:
-                return
-            document = self._document_service.load_document(Path(source))
-            verifier_public_key = private_key.public_key()
+        except AppError as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+        source = filedialog.askopenfilename(
+            title="Загрузить подписанный документ",
+            filetypes=[("Signed Document", "*.sd"), ("All Files", "*.*")],
+        )
+        if not source:
+            return
+        verifier_public_key = private_key.public_key()
+        try:
+            large = Path(source).stat().st_size >= LARGE_DOCUMENT_SIZE
+        except OSError as error:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить документ: {error}")
+            return
+        if large:
+            self._open_large_document(Path(source), verifier_public_key)
+            return
+
+        def work(progress: ProgressCallback) -> Any:
+            document = self._document_service.load_document(Path(source), progress)
             author_public_key = self._public_key_service.load_and_verify_public_key(document.author, verifier_public_key)
-            if not self._document_service.verify_document(document, author_public_key):
+            if not self._document_service.verify_document(document, author_public_key, progress):
                 raise AppError("Подпись документа не подтверждена")
+            return document
+
+        def on_success(document: Any) -> None:
+            self._show_editor()
             self._text.delete("1.0", tk.END)
             self._text.insert("1.0", document.text)
             self.title(f"Подписанный документ {document.author}")
             messagebox.showinfo("Успешно", "Документ проверен и загружен")
-        except AppError as error:
-            messagebox.showerror("Ошибка", str(error))
-        except OSError as error:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить документ: {error}")
+
+        self._start_task("Загрузка документа", work, on_success, "Не удалось загрузить документ", cancellable=True)
+
+    def _open_large_document(self, source: Path, verifier_public_key: Any) -> None:
+        def work(progress: ProgressCallback) -> Any:
+            header = self._document_service.read_document_header(source)
+            author_public_key = self._public_key_service.load_and_verify_public_key(header.author, verifier_public_key)
+            document = self._document_service.open_mapped_document(source, header)
+            try:
+                if header.chunk_size:
+                    _, page_end, _ = document.read(0, PAGE_SIZE)
+                    verified = self._document_service.verify_document_range(source, header, author_public_key, 0, page_end)
+                    if verified is None:
+                        raise AppError("Подпись документа не подтверждена")
+                elif not self._document_service.verify_mapped_document(document, author_public_key, progress):
+                    raise AppError("Подпись документа не подтверждена")
+            except BaseException:
+                document.close()
+                raise
+            return document, author_public_key
+
+        def on_opened(result: Any) -> None:
+            document, author_public_key = result
+            self._show_viewer(document)
+            if document.header.chunk_size:
+                self.title(f"Подписанный документ {document.header.author} (подпись проверяется)")
+                self._check_in_background(source, document, author_public_key)
+                return
+            self.title(f"Подписанный документ {document.header.author}")
+            messagebox.showinfo("Успешно", "Документ проверен и открыт для просмотра")
+
+        self._start_task("Проверка подписи", work, on_opened, "Не удалось открыть документ", cancellable=True)
+
+    def _check_in_background(self, source: Path, document: Any, author_public_key: Any) -> None:
+        def work(progress: ProgressCallback) -> bool:
+            return self._document_service.verify_document_file(source, document.header, author_public_key, progress)
+
+        def reject(show: Callable[[], None]) -> None:
+            self._background_check = None
+            self._show_editor()
+            self._reset_title()
+            show()
+
+        def on_checked(verified: bool) -> None:
+            if self._background_check is not token:
+                return
+            if not verified:
+                reject(lambda: messagebox.showerror("Ошибка", "Подпись документа не подтверждена"))
+                return
+            self._background_check = None
+            self.title(f"Подписанный документ {document.header.author}")
+
+        def on_error(error: BaseException) -> None:
+            if self._background_check is token:
+                reject(lambda: self._show_task_error(error, "Не удалось проверить документ"))
+
+        token = self._background_check = self._tasks.submit(work, on_checked, on_error)
+
+    def _cancel_background_check(self) -> None:
+        if self._background_check is not None:
+            self._background_check.cancel()
+            self._background_check = None
 
     def export_public_key(self) -> None:
+        if self._is_busy():
+            return
         try:
             username, private_key = self._require_user_context()
             target = filedialog.asksaveasfilename(
@@ -194,22 +414,57 @@ class MainWindow(ctk.CTk):
             messagebox.showerror("Ошибка", f"Не удалось экспортировать ключ: {error}")
 
     def import_public_key(self) -> None:
+        if self._is_busy():
+            return
         try:
             _, private_key = self._require_user_context()
-            source = filedialog.askopenfilename(
-                title="Импорт открытого ключа",
-                filetypes=[("Public Key", "*.pub *.spub"), ("All Files", "*.*")],
-            )
-            if not source:
-                return
-            owner = self._public_key_service.import_public_key(Path(source), private_key)
-            messagebox.showinfo("Успешно", f"Ключ пользователя {owner} импортирован")
         except AppError as error:
             messagebox.showerror("Ошибка", str(error))
-        except OSError as error:
-            messagebox.showerror("Ошибка", f"Не удалось импортировать ключ: {error}")
+            return
+        source = filedialog.askopenfilename(
+            title="Импорт открытого ключа",
+            filetypes=[("Public Key", "*.pub *.spub"), ("All Files", "*.*")],
+        )
+        if not source:
+            return
+        self._start_task(
+            "Импорт открытого ключа",
+            lambda _: self._public_key_service.import_public_key(Path(source), private_key),
+            lambda owner: messagebox.showinfo("Успешно", f"Ключ пользователя {owner} импортирован"),
+            "Не удалось импортировать ключ",
+        )
+
+    def import_public_key_directory(self) -> None:
+        if self._is_busy():
+            return
+        try:
+            _, private_key = self._require_user_context()
+        except AppError as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+        source = filedialog.askdirectory(title="Импорт каталога открытых ключей")
+        if not source:
+            return
+
+        def on_success(report: Any) -> None:
+            lines = [
+                f"Импортировано: {len(report.imported)}",
+                f"Уже известны или повторяются: {len(report.duplicates)}",
+                f"Имя файла не совпадает с владельцем: {len(report.owner_mismatches)}",
+                f"Повреждённые файлы: {len(report.malformed)}",
+            ]
+            messagebox.showinfo("Импорт ключей", "\n".join(lines))
+
+        self._start_task(
+            "Импорт открытых ключей",
+            lambda _: self._key_import_service.import_keys(Path(source), private_key),
+            on_success,
+            "Не удалось импортировать ключи",
+        )
 
     def delete_key_pair(self) -> None:
+        if self._is_busy():
+            return
         try:
             username, _ = self._require_user_context()
             if not messagebox.askyesno("Подтверждение", f"Удалить пару ключей пользователя {username}?"):
@@ -227,6 +482,8 @@ class MainWindow(ctk.CTk):
             messagebox.showerror("Ошибка", f"Не удалось удалить ключи: {error}")
 
     def select_private_key(self) -> None:
+        if self._is_busy():
+            return
         self.create_document()
         self._unlock_username_entry()
 
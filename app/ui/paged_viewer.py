@@ -0,0 +1,180 @@
+import tkinter as tk
+from tkinter import messagebox
+
+import customtkinter as ctk
+
+from app.core.exceptions import OperationCancelledError
+from app.core.models import ProgressCallback
+from app.services.mapped_document import MappedDocument
+from app.ui.task_runner import CancellationToken, TaskRunner
+
+
+PAGE_SIZE = 1 << 18
+
+
+class PagedTextView(ctk.CTkFrame):
+    def __init__(self, master: tk.Misc, tasks: TaskRunner) -> None:
+        super().__init__(master)
+        self._tasks = tasks
+        self._search: CancellationToken | None = None
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._document: MappedDocument | None = None
+        self._page_start = 0
+        self._page_end = 0
+        self._search_from = 0
+        self._shift_pending = False
+
+        self._text = ctk.CTkTextbox(self, wrap="word", activate_scrollbars=False, yscrollcommand=self._on_text_scrolled)
+        self._text.grid(row=0, column=0, sticky="nsew", padx=(10, 0), pady=10)
+        self._text.configure(state="disabled")
+
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=0, column=1, sticky="ns", padx=(0, 10), pady=10)
+
+        search = ctk.CTkFrame(self, fg_color="transparent")
+        search.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
+        search.grid_columnconfigure(0, weight=1)
+
+        self._search_var = tk.StringVar(value="")
+        self._search_entry = ctk.CTkEntry(search, textvariable=self._search_var, placeholder_text="Поиск")
+        self._search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 8))
+        self._search_entry.bind("<Return>", lambda _: self.find_next())
+        self._search_var.trace_add("write", lambda *_: self._reset_search())
+
+        self._find_button = ctk.CTkButton(search, text="Найти далее", width=120, command=self.find_next)
+        self._find_button.grid(row=0, column=1, padx=(0, 8))
+
+        self._position_label = ctk.CTkLabel(search, text="", width=80)
+        self._position_label.grid(row=0, column=2)
+
+    @property
+    def document(self) -> MappedDocument | None:
+        return self._document
+
+    def show(self, document: MappedDocument) -> None:
+        self.clear()
+        self._document = document
+        self._load_page(0)
+
+    def clear(self) -> None:
+        self._cancel_search()
+        if self._document is not None:
+            self._document.close()
+            self._document = None
+        self._page_start = self._page_end = 0
+        self._reset_search()
+        self._set_text("")
+        self._position_label.configure(text="")
+
+    def find_next(self) -> None:
+        needle = self._search_var.get()
+        if self._document is None or not needle or self._search is not None:
+            return
+        document, start = self._document, self._search_from
+
+        def work(progress: ProgressCallback) -> int | None:
+            found = document.find(needle, start, progress)
+            if found is None and start > 0:
+                found = document.find(needle, 0, progress)
+            return found
+
+        def on_found(found: int | None) -> None:
+            if self._search is not token:
+                return
+            self._finish_search()
+            if found is None:
+                messagebox.showinfo("Поиск", "Текст не найден")
+                return
+            self._select(needle, found)
+
+        def on_error(error: BaseException) -> None:
+            if self._search is not token:
+                return
+            self._finish_search()
+            if not isinstance(error, OperationCancelledError):
+                messagebox.showerror("Поиск", f"Не удалось выполнить поиск: {error}")
+
+        self._find_button.configure(state="disabled")
+        token = self._search = self._tasks.submit(work, on_found, on_error, self._on_search_progress)
+
+    def _select(self, needle: str, found: int) -> None:
+        assert self._document is not None
+        self._search_from = found + 1
+        if not self._page_start <= found < self._page_end - len(needle.encode("utf-8")):
+            self._load_page(found)
+        _, _, before = self._document.read(self._page_start, found - self._page_start)
+        first = f"1.0 + {len(before)} chars"
+        last = f"{first} + {len(needle)} chars"
+        self._text.tag_remove("sel", "1.0", tk.END)
+        self._text.tag_add("sel", first, last)
+        self._text.see(first)
+
+    def _on_search_progress(self, done: int, total: int) -> None:
+        if self._search is not None and total:
+            self._position_label.configure(text=f"Поиск {done / total:.0%}")
+
+    def _cancel_search(self) -> None:
+        if self._search is not None:
+            self._search.cancel()
+        self._finish_search()
+
+    def _finish_search(self) -> None:
+        self._search = None
+        self._find_button.configure(state="normal")
+        self._position_label.configure(text="")
+
+    def _reset_search(self) -> None:
+        self._search_from = 0
+
+    def _load_page(self, offset: int) -> None:
+        assert self._document is not None
+        start = self._document.line_start(max(offset - PAGE_SIZE // 4, 0))
+        self._page_start, self._page_end, text = self._document.read(start, PAGE_SIZE)
+        self._set_text(text)
+
+    def _set_text(self, text: str) -> None:
+        self._text.configure(state="normal")
+        self._text.delete("1.0", tk.END)
+        self._text.insert("1.0", text)
+        self._text.configure(state="disabled")
+
+    def _byte_position(self, fraction: float) -> float:
+        return self._page_start + fraction * (self._page_end - self._page_start)
+
+    def _on_text_scrolled(self, first: str, last: str) -> None:
+        if self._document is None or not self._document.size:
+            self._scrollbar.set(0, 1)
+            return
+        size = self._document.size
+        top, bottom = self._byte_position(float(first)), self._byte_position(float(last))
+        self._scrollbar.set(top / size, bottom / size)
+        self._position_label.configure(text=f"{top / size:.0%}")
+        near_end = float(last) >= 1.0 and self._page_end < size
+        near_start = float(first) <= 0.0 and self._page_start > 0
+        if (near_end or near_start) and not self._shift_pending:
+            self._shift_pending = True
+            self.after_idle(self._shift_page, top)
+
+    def _shift_page(self, top: float) -> None:
+        self._shift_pending = False
+        if self._document is None:
+            return
+        self._load_page(int(top))
+        span = self._page_end - self._page_start
+        if span:
+            self._text.yview_moveto((top - self._page_start) / span)
+
+    def _on_scrollbar(self, action: str, amount: str, unit: str | None = None) -> None:
+        if self._document is None:
+            return
+        if action == "moveto":
+            target = int(min(max(float(amount), 0.0), 1.0) * self._document.size)
+            if not self._page_start <= target < self._page_end:
+                self._load_page(target)
+            span = self._page_end - self._page_start
+            if span:
+                self._text.yview_moveto((target - self._page_start) / span)
+        elif action == "scroll" and unit is not None:
+            self._text.yview_scroll(int(amount), unit)
@@ -0,0 +1,127 @@
+import threading
+import tkinter as tk
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Generic, TypeVar
+
+from app.core.exceptions import OperationCancelledError
+from app.core.models import ProgressCallback
+
+
+T = TypeVar("T")
+
+
+class CancellationToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelledError("Операция отменена")
+
+
+class _Task(Generic[T]):
+    def __init__(
+        self,
+        token: CancellationToken,
+        on_success: Callable[[T], None],
+        on_error: Callable[[BaseException], None],
+        on_progress: ProgressCallback | None,
+    ) -> None:
+        self.future: Future[T] | None = None
+        self.token = token
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.progress: tuple[int, int] | None = None
+        self.reported: tuple[int, int] | None = None
+
+
+class TaskRunner:
+    def __init__(self, widget: tk.Misc, workers: int = 2, poll_interval_ms: int = 50) -> None:
+        self._widget = widget
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-task")
+        self._poll_interval_ms = poll_interval_ms
+        self._tasks: list[_Task] = []
+        self._polling = False
+
+    def submit(
+        self,
+        work: Callable[[ProgressCallback], T],
+        on_success: Callable[[T], None],
+        on_error: Callable[[BaseException], None],
+        on_progress: ProgressCallback | None = None,
+    ) -> CancellationToken:
+        token = CancellationToken()
+        task: _Task[T] = _Task(token, on_success, on_error, on_progress)
+
+        def report(done: int, total: int) -> None:
+            token.raise_if_cancelled()
+            task.progress = (done, total)
+
+        def run() -> T:
+            token.raise_if_cancelled()
+            return work(report)
+
+        task.future = self._executor.submit(run)
+        self._tasks.append(task)
+        if not self._polling:
+            self._polling = True
+            self._widget.after(self._poll_interval_ms, self._poll)
+        return token
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.token.cancel()
+        self._tasks.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        pending: list[_Task] = []
+        failure: Exception | None = None
+        try:
+            for task in tasks:
+                assert task.future is not None
+                try:
+                    self._report_progress(task)
+                except Exception as error:
+                    failure = failure or error
+                if not task.future.done():
+                    pending.append(task)
+                    continue
+                try:
+                    self._deliver(task)
+                except Exception as error:
+                    failure = failure or error
+        finally:
+            self._tasks = pending + self._tasks
+            if self._tasks:
+                self._widget.after(self._poll_interval_ms, self._poll)
+            else:
+                self._polling = False
+        if failure is not None:
+            raise failure
+
+    @staticmethod
+    def _report_progress(task: _Task) -> None:
+        progress = task.progress
+        if task.on_progress is not None and progress is not None and progress != task.reported:
+            task.reported = progress
+            task.on_progress(*progress)
+
+    @staticmethod
+    def _deliver(task: _Task) -> None:
+        assert task.future is not None
+        error = task.future.exception()
+        if error is None:
+            task.on_success(task.future.result())
+        else:
+            task.on_error(error)
@@ -0,0 +1,75 @@
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.cases import (
+    algorithm_cases,
+    bundle_cases,
+    chunked_document_cases,
+    compression_cases,
+    document_cases,
+    key_service_cases,
+    public_key_cases,
+    storage_cases,
+)
+from benchmarks.harness import describe, find_regressions, load_results, parse_size, write_results
+
+
+DEFAULT_SIZES = "1K,64K,1M,16M,256M,1G"
+DEFAULT_OWNERS = "10,1000,100000"
+GROUPS = ["documents", "chunked-documents", "compression", "bundles", "storage", "algorithms", "keys", "public-keys"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Benchmarks for formats, crypto and services")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Document sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--owners", default=DEFAULT_OWNERS, help=f"Keyring sizes (default {DEFAULT_OWNERS})")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per case")
+    parser.add_argument("--only", choices=GROUPS, action="append", help="Run selected groups")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"), help="Where to write results")
+    parser.add_argument("--baseline", type=Path, help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(value) for value in args.sizes.split(",")]
+    owners = [int(value) for value in args.owners.split(",")]
+    groups = set(args.only or GROUPS)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        cases = []
+        if "documents" in groups:
+            cases.append(document_cases(Path(workdir), sizes, args.repeat))
+        if "chunked-documents" in groups:
+            cases.append(chunked_document_cases(Path(workdir), sizes, args.repeat))
+        if "compression" in groups:
+            cases.append(compression_cases(Path(workdir), sizes, args.repeat))
+        if "bundles" in groups:
+            cases.append(bundle_cases(Path(workdir), args.repeat))
+        if "storage" in groups:
+            cases.append(storage_cases(Path(workdir), args.repeat))
+        if "algorithms" in groups:
+            cases.append(algorithm_cases(args.repeat))
+        if "keys" in groups:
+            cases.append(key_service_cases(Path(workdir), args.repeat))
+        if "public-keys" in groups:
+            cases.append(public_key_cases(Path(workdir), owners, args.repeat))
+        for group in cases:
+            for result in group:
+                print(describe(result), flush=True)
+                results.append(result)
+
+    write_results(args.output, results)
+    print(f"Results written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    regressions = find_regressions(results, load_results(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
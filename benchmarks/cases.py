@@ -0,0 +1,336 @@
+import itertools
+import random
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.core.algorithms import ALGORITHMS
+from app.core.compression import CODECS
+from app.core.formats import (
+    decode_signed_document,
+    encode_public_key_blob,
+    encode_public_key_signing_payload,
+    encode_signed_document,
+    encode_signed_public_key_blob,
+)
+from app.core.merkle import DEFAULT_CHUNK_SIZE
+from app.core.models import PublicKeyBlob, SignedDocument, SignedPublicKeyBlob
+from app.services.atomic_writer import AtomicWriter
+from app.services.bundle_service import BundleService
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.key_service import KEY_FORMATS, KeyService
+from app.services.key_store import DirectoryKeyStore, PublicKeyStore, SqliteKeyStore
+from app.services.public_key_service import PublicKeyService
+from benchmarks.harness import BenchResult, format_size, measure
+
+
+_LINE = "The quick brown fox jumps over the lazy dog while the signature keeps it honest.\n"
+_LOOKUP_SAMPLE = 256
+_RANGE_SIZE = 1 << 12
+_BUNDLE_DOCUMENTS = 1000
+_BUNDLE_DOCUMENT_SIZE = 1 << 10
+_STORAGE_DOCUMENTS = 200
+_STORAGE_DOCUMENT_SIZE = 1 << 10
+_PROSE_VOCABULARY = 4096
+
+
+def make_text(size: int) -> str:
+    repeats = size // len(_LINE) + 1
+    return (_LINE * repeats)[:size]
+
+
+def make_prose(size: int, seed: int = 21) -> str:
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(_PROSE_VOCABULARY)
+    ]
+    parts = []
+    length = 0
+    while length < size:
+        line = " ".join(rng.choices(words, k=rng.randint(6, 16))) + ".\n"
+        parts.append(line)
+        length += len(line)
+    return "".join(parts)[:size]
+
+
+def public_key_payload(crypto: CryptoService, owner: str, private_key: object) -> bytes:
+    return encode_public_key_blob(PublicKeyBlob(owner=owner, key_blob=crypto.export_public_key(private_key)))
+
+
+def document_cases(workdir: Path, sizes: list[int], repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    documents = DocumentService(crypto=crypto)
+    private_key = crypto.generate_private_key()
+    public_key = private_key.public_key()
+    target = workdir / "bench.sd"
+
+    for size in sizes:
+        param = format_size(size)
+        text = make_text(size)
+        raw = text.encode("utf-8")
+        signature = crypto.sign(private_key, raw)
+        document = SignedDocument(author="bench", signature=signature, text=text)
+        payload = encode_signed_document(document)
+
+        yield measure("formats.encode_signed_document", param, lambda: encode_signed_document(document), repeat, size)
+        yield measure("formats.decode_signed_document", param, lambda: decode_signed_document(payload), repeat, size)
+        yield measure("crypto.sign", param, lambda: crypto.sign(private_key, raw), repeat, size)
+        yield measure("crypto.verify", param, lambda: crypto.verify(public_key, raw, signature), repeat, size)
+
+        del payload, raw
+        yield measure(
+            "documents.save_document",
+            param,
+            lambda: documents.save_document(target, "bench", private_key, text),
+            repeat,
+            size,
+        )
+        header = documents.read_document_header(target)
+        yield measure(
+            "documents.verify_document_file",
+            param,
+            lambda: documents.verify_document_file(target, header, public_key),
+            repeat,
+            size,
+        )
+        target.unlink()
+
+
+def compression_cases(workdir: Path, sizes: list[int], repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    private_key = crypto.generate_private_key()
+    public_key = private_key.public_key()
+    target = workdir / "bench-compressed.sd"
+
+    for size in sizes:
+        text = make_prose(size)
+        for codec in (None, *CODECS):
+            documents = DocumentService(crypto=crypto, compression=codec)
+            param = f"{codec or 'none'},{format_size(size)}"
+            documents.save_document(target, "bench", private_key, text)
+            header = documents.read_document_header(target)
+            stored = target.stat().st_size - header.text_offset
+            yield measure(
+                "compressed.save_document",
+                param,
+                lambda: documents.save_document(target, "bench", private_key, text),
+                repeat,
+                size,
+                stored_bytes=stored,
+            )
+            yield measure(
+                "compressed.verify_document_file",
+                param,
+                lambda: documents.verify_document_file(target, header, public_key),
+                repeat,
+                size,
+                stored_bytes=stored,
+            )
+            yield measure(
+                "compressed.load_document",
+                param,
+                lambda: documents.load_document(target),
+                repeat,
+                size,
+                stored_bytes=stored,
+            )
+        del text
+        target.unlink()
+
+
+def chunked_document_cases(workdir: Path, sizes: list[int], repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    documents = DocumentService(crypto=crypto, chunk_size=DEFAULT_CHUNK_SIZE)
+    private_key = crypto.generate_private_key()
+    public_key = private_key.public_key()
+    target = workdir / "bench-chunked.sd"
+
+    for size in sizes:
+        param = format_size(size)
+        text = make_text(size)
+        edited = text[: size // 2] + "#" + text[size // 2 + 1 :]
+
+        def save_fresh() -> None:
+            target.unlink(missing_ok=True)
+            documents.save_document(target, "bench", private_key, text)
+
+        yield measure("chunked.save_document", f"{param},fresh", save_fresh, repeat, size)
+        versions = itertools.cycle((edited, text))
+        yield measure(
+            "chunked.save_document",
+            f"{param},edit",
+            lambda: documents.save_document(target, "bench", private_key, next(versions)),
+            repeat,
+            size,
+        )
+        header = documents.read_document_header(target)
+        yield measure(
+            "chunked.verify_document_file",
+            param,
+            lambda: documents.verify_document_file(target, header, public_key),
+            repeat,
+            size,
+        )
+        length = min(_RANGE_SIZE, size)
+        yield measure(
+            "chunked.verify_document_range",
+            param,
+            lambda: documents.verify_document_range(target, header, public_key, (size - length) // 2, length),
+            repeat,
+            length,
+        )
+        del text, edited
+        target.unlink()
+
+
+def bundle_cases(workdir: Path, repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    verifier = crypto.generate_private_key()
+    author = crypto.generate_private_key()
+    public_keys = PublicKeyService(store=SqliteKeyStore(workdir / "bundle-keyring.sqlite3"), crypto=crypto)
+    public_keys.store_signed_payloads(
+        {"bench": public_keys.countersign_payload(public_key_payload(crypto, "bench", author), verifier)[2]}
+    )
+    documents = DocumentService(crypto=crypto)
+    bundles = BundleService(documents=documents, public_keys=public_keys)
+    verifier_public_key = verifier.public_key()
+
+    source_dir = workdir / "bundle-sources"
+    source_dir.mkdir()
+    text = make_text(_BUNDLE_DOCUMENT_SIZE)
+    sources = []
+    for index in range(_BUNDLE_DOCUMENTS):
+        source = source_dir / f"{index:05d}.sd"
+        documents.save_document(source, "bench", author, text)
+        sources.append(source)
+    bundle = workdir / "bench.sdb"
+    bundles.pack(sources, bundle)
+    total = bundle.stat().st_size
+    param = f"{_BUNDLE_DOCUMENTS}x{format_size(_BUNDLE_DOCUMENT_SIZE)}"
+
+    def verify_files() -> None:
+        for source in sources:
+            header = documents.read_document_header(source)
+            key = public_keys.load_and_verify_public_key(header.author, verifier_public_key)
+            documents.verify_document_file(source, header, key)
+
+    yield measure("bundles.pack", param, lambda: bundles.pack(sources, bundle), repeat, total)
+    yield measure("bundles.verify_all", param, lambda: list(bundles.verify_all(bundle, verifier_public_key)), repeat, total)
+    yield measure("bundles.verify_files", param, verify_files, repeat, total)
+    yield measure("bundles.read_document", param, lambda: bundles.read_document(bundle, sources[-1].name), repeat)
+
+
+def storage_cases(workdir: Path, repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    author = crypto.generate_private_key()
+    text = make_text(_STORAGE_DOCUMENT_SIZE)
+    param = f"{_STORAGE_DOCUMENTS}x{format_size(_STORAGE_DOCUMENT_SIZE)}"
+    total = _STORAGE_DOCUMENTS * _STORAGE_DOCUMENT_SIZE
+
+    for mode, durable, batched in (("no-fsync", False, True), ("per-file", True, False), ("batched", True, True)):
+        documents = DocumentService(crypto=crypto, writer=AtomicWriter(durable=durable))
+        target_dir = workdir / f"storage-{mode}"
+        target_dir.mkdir()
+        targets = [target_dir / f"{index:05d}.sd" for index in range(_STORAGE_DOCUMENTS)]
+
+        def save_all() -> None:
+            if not batched:
+                for target in targets:
+                    documents.save_document(target, "bench", author, text)
+                return
+            with documents.batch():
+                for target in targets:
+                    documents.save_document(target, "bench", author, text)
+
+        yield measure("storage.save_documents", f"{param},{mode}", save_all, repeat, total)
+
+
+def algorithm_cases(repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    message = make_text(1 << 10).encode("utf-8")
+
+    for algorithm in ALGORITHMS:
+        private_key = crypto.generate_private_key(algorithm)
+        public_key = private_key.public_key()
+        signature = crypto.sign(private_key, message)
+        private_payload = crypto.export_private_key(private_key)
+        public_payload = crypto.export_public_key(private_key)
+
+        yield measure("algorithms.generate_private_key", algorithm, lambda: crypto.generate_private_key(algorithm), repeat)
+        yield measure("algorithms.sign", algorithm, lambda: crypto.sign(private_key, message), repeat)
+        yield measure("algorithms.verify", algorithm, lambda: crypto.verify(public_key, message, signature), repeat)
+        yield measure("algorithms.load_private_key", algorithm, lambda: crypto.load_private_key(private_payload), repeat)
+        yield measure("algorithms.load_public_key", algorithm, lambda: crypto.load_public_key(public_payload), repeat)
+
+
+def key_service_cases(workdir: Path, repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    keys = KeyService(keys_dir=workdir / "keys", crypto=crypto, cache_size=0)
+    counter = iter(range(10**9))
+
+    yield measure("keys.ensure_user", "create", lambda: keys.ensure_user(f"user{next(counter)}"), repeat)
+    keys.ensure_user("existing")
+    yield measure("keys.ensure_user", "load", lambda: keys.ensure_user("existing"), repeat)
+
+    for key_format in KEY_FORMATS:
+        stored = KeyService(keys_dir=workdir / f"keys-{key_format}", crypto=crypto, key_format=key_format, cache_size=0)
+        stored.ensure_user("existing")
+        yield measure("keys.load_private_key", key_format, lambda: stored.load_private_key("existing"), repeat)
+    cached = KeyService(keys_dir=workdir / "keys", crypto=crypto)
+    cached.load_private_key("existing")
+    yield measure("keys.load_private_key", "cached", lambda: cached.load_private_key("existing"), repeat)
+
+
+def public_key_cases(workdir: Path, owner_counts: list[int], repeat: int) -> Iterator[BenchResult]:
+    crypto = CryptoService()
+    verifier = crypto.generate_private_key()
+    verifier_public_key = verifier.public_key()
+    subject_blob = crypto.export_public_key(crypto.generate_private_key())
+    rng = random.Random(16)
+
+    for count in owner_counts:
+        owners = [f"owner{index:06d}" for index in range(count)]
+        sample = rng.sample(owners, min(_LOOKUP_SAMPLE, count))
+        payloads = _signed_payloads(crypto, verifier, subject_blob, owners, set(sample))
+        stores: list[tuple[str, PublicKeyStore]] = [
+            ("directory", DirectoryKeyStore(workdir / f"pk-{count}")),
+            ("sqlite", SqliteKeyStore(workdir / f"keyring-{count}.sqlite3")),
+        ]
+        for backend, store in stores:
+            store.write_many(payloads.items())
+            for cache_size, mode in ((0, "cold"), (1024, "warm")):
+                service = PublicKeyService(store=store, crypto=crypto, cache_size=cache_size)
+                if cache_size:
+                    for owner in sample:
+                        service.load_and_verify_public_key(owner, verifier_public_key)
+                lookups = itertools.cycle(sample)
+                yield measure(
+                    "public_keys.load_and_verify_public_key",
+                    f"{backend},{count},{mode}",
+                    lambda: service.load_and_verify_public_key(next(lookups), verifier_public_key),
+                    repeat,
+                )
+
+
+def _signed_payloads(
+    crypto: CryptoService,
+    verifier: object,
+    key_blob: bytes,
+    owners: list[str],
+    signed_owners: set[str],
+) -> dict[str, bytes]:
+    filler: bytes | None = None
+    payloads = {}
+    for owner in owners:
+        if owner not in signed_owners and filler is not None:
+            payloads[owner] = filler
+            continue
+        data = encode_public_key_signing_payload(PublicKeyBlob(owner=owner, key_blob=key_blob))
+        signature = crypto.sign(verifier, data)
+        signed_blob = SignedPublicKeyBlob(owner=owner, key_blob=key_blob, signature=signature)
+        payload = encode_signed_public_key_blob(signed_blob)
+        payloads[owner] = payload
+        if owner not in signed_owners:
+            filler = payload
+    return payloads
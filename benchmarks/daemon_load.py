@@ -0,0 +1,135 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.bootstrap import build_services
+from app.core.exceptions import AppError
+from app.core.models import VerificationStatus
+from app.services.daemon_client import DaemonClient
+from benchmarks.cases import make_text, public_key_payload
+from benchmarks.harness import parse_size
+
+
+def _prepare_base_dir(base_dir: Path, user: str) -> None:
+    services = build_services(base_dir)
+    private_key = services.keys.ensure_user(user)
+    payload = public_key_payload(services.crypto, user, private_key)
+    services.public_keys.store_signed_payloads({user: services.public_keys.countersign_payload(payload, private_key)[2]})
+
+
+def _connect(socket_path: Path, timeout: float) -> DaemonClient:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client = DaemonClient(socket_path)
+            client.ping()
+            return client
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@contextmanager
+def _started_daemon(base_dir: Path, socket_path: Path, workers: int | None, batch_size: int) -> Iterator[None]:
+    command = [sys.executable, "-m", "app.cli", "--base-dir", str(base_dir), "serve", "--socket", str(socket_path)]
+    command += ["--batch-size", str(batch_size)]
+    if workers is not None:
+        command += ["--workers", str(workers)]
+    daemon = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    try:
+        _connect(socket_path, timeout=30.0).close()
+        yield
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=30.0)
+
+
+def _operation(client: DaemonClient, user: str, op: str, text: str, document: bytes, index: int) -> Callable[[], bool]:
+    if op == "mixed":
+        op = "sign" if index % 2 else "verify"
+    if op == "sign":
+        return lambda: bool(client.sign(user, text))
+    return lambda: client.verify(user, document).status == VerificationStatus.OK
+
+
+def run_load(socket_path: Path, user: str, clients: int, requests: int, op: str, text: str) -> dict[str, object]:
+    with DaemonClient(socket_path) as client:
+        document = client.sign(user, text)
+
+    latencies: list[list[float]] = [[] for _ in range(clients)]
+    errors = [0] * clients
+    barrier = threading.Barrier(clients + 1)
+
+    def worker(slot: int) -> None:
+        with DaemonClient(socket_path) as client:
+            barrier.wait()
+            for index in range(slot, requests, clients):
+                call = _operation(client, user, op, text, document, index)
+                started = time.perf_counter()
+                try:
+                    succeeded = call()
+                except (AppError, OSError, ValueError):
+                    succeeded = False
+                latencies[slot].append(time.perf_counter() - started)
+                errors[slot] += not succeeded
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(latency for chunk in latencies for latency in chunk)
+    percentiles = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return {
+        "op": op,
+        "clients": clients,
+        "requests": len(samples),
+        "errors": sum(errors),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(samples) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentiles[49] * 1e3, 3),
+        "p99_ms": round(percentiles[98] * 1e3, 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.daemon_load", description="Load test for the signing daemon")
+    parser.add_argument("--socket", type=Path, help="Socket of a running daemon (by default a temporary one is started)")
+    parser.add_argument("--user", default="bench", help="User that signs and verifies (default bench)")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=2000, help="Total number of requests")
+    parser.add_argument("--op", choices=["sign", "verify", "mixed"], default="mixed", help="Requests to send")
+    parser.add_argument("--size", default="1K", help="Document size (default 1K)")
+    parser.add_argument("--workers", type=int, default=None, help="Daemon worker processes")
+    parser.add_argument("--batch-size", type=int, default=64, help="Daemon batch size")
+    args = parser.parse_args(argv)
+
+    text = make_text(parse_size(args.size))
+    if args.socket is not None:
+        report = run_load(args.socket, args.user, args.clients, args.requests, args.op, text)
+    else:
+        with tempfile.TemporaryDirectory(prefix="daemon-bench-") as workdir:
+            base_dir = Path(workdir)
+            socket_path = base_dir / "daemon.sock"
+            _prepare_base_dir(base_dir, args.user)
+            with _started_daemon(base_dir, socket_path, args.workers, args.batch_size):
+                report = run_load(socket_path, args.user, args.clients, args.requests, args.op, text)
+    print(json.dumps(report))
+    return 0 if not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
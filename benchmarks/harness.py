@@ -0,0 +1,112 @@
+import json
+import os
+import platform
+import statistics
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+@dataclass(slots=True)
+class BenchResult:
+    name: str
+    param: str
+    median_s: float
+    min_s: float
+    runs: int
+    payload_bytes: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.param}]"
+
+
+def parse_size(value: str) -> int:
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    value = value.strip().upper()
+    if value[-1] in units:
+        return int(value[:-1]) * units[value[-1]]
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    for unit, factor in (("G", 1 << 30), ("M", 1 << 20), ("K", 1 << 10)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def measure(
+    name: str,
+    param: str,
+    operation: Callable[[], object],
+    repeat: int,
+    payload_bytes: int = 0,
+    min_batch_s: float = 0.05,
+    stored_bytes: int = 0,
+) -> BenchResult:
+    started = time.perf_counter()
+    operation()
+    first = time.perf_counter() - started
+    number = max(1, int(min_batch_s / first)) if first < min_batch_s else 1
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        samples.append((time.perf_counter() - started) / number)
+    return BenchResult(
+        name=name,
+        param=param,
+        median_s=statistics.median(samples),
+        min_s=min(samples),
+        runs=repeat * number,
+        payload_bytes=payload_bytes,
+        stored_bytes=stored_bytes,
+    )
+
+
+def describe(result: BenchResult) -> str:
+    line = f"{result.key:<64} {result.median_s * 1e3:>12.4f} ms"
+    if result.payload_bytes:
+        line += f" {result.payload_bytes / result.median_s / 1e6:>10.1f} MB/s"
+    if result.stored_bytes:
+        line += f" {result.payload_bytes / result.stored_bytes:>6.2f}x"
+    return line
+
+
+def write_results(path: Path, results: Iterable[BenchResult]) -> None:
+    document = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_results(path: Path) -> dict[str, BenchResult]:
+    document = json.loads(path.read_text(encoding="utf-8"))
+    results = (BenchResult(**item) for item in document["results"])
+    return {result.key: result for result in results}
+
+
+def find_regressions(results: Iterable[BenchResult], baseline: dict[str, BenchResult], tolerance: float) -> list[str]:
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.key)
+        if reference is None:
+            continue
+        ratio = result.median_s / reference.median_s
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result.key}: {reference.median_s * 1e3:.3f} ms -> {result.median_s * 1e3:.3f} ms (x{ratio:.2f})"
+            )
+    return regressions
@@ -1,9 +1,15 @@
+import sys
 from pathlib import Path
 
-from app.app import build_app
-
 
 def main() -> None:
+    if len(sys.argv) > 1:
+        from app.cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from app.app import build_app
+
     app = build_app(Path(__file__).resolve().parent)
     app.mainloop()
 
@@ -0,0 +1,32 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.services.crypto_service import CryptoService
+from app.services.key_store import DirectoryKeyStore
+from app.services.public_key_service import PublicKeyService
+
+
+class _WorkdirFixture:
+    def setUp(self) -> None:
+        super().setUp()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = Path(workdir.name)
+        self.crypto = CryptoService()
+
+    def public_key_service(self, name: str = "pk") -> PublicKeyService:
+        return PublicKeyService(DirectoryKeyStore(self.workdir / name), self.crypto)
+
+    def import_public_key(self, public_keys: PublicKeyService, owner: str, key: object, signer: object) -> None:
+        source = self.workdir / f"{owner}.pub"
+        public_keys.export_public_key(owner, key, source)
+        public_keys.import_public_key(source, signer)
+
+
+class WorkdirTestCase(_WorkdirFixture, unittest.TestCase):
+    pass
+
+
+class AsyncWorkdirTestCase(_WorkdirFixture, unittest.IsolatedAsyncioTestCase):
+    pass
@@ -0,0 +1,77 @@
+import struct
+import unittest
+from pathlib import Path
+
+from app.core.algorithms import ALGORITHM_CODES, ECDSA_P256_SHA256, ED25519PH
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from tests.support import WorkdirTestCase
+
+
+_ALGORITHM_CODE_OFFSET = 5
+
+
+def _part(data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + data
+
+
+class SignatureAlgorithmTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.ed25519 = CryptoService(default_algorithm=ED25519PH)
+
+    def _verify(self, source: Path, public_key: object) -> bool:
+        documents = DocumentService(crypto=self.crypto)
+        verified = documents.verify_document_file(source, documents.read_document_header(source), public_key)
+        self.assertEqual(documents.verify_document(documents.load_document(source), public_key), verified)
+        return verified
+
+    def test_ed25519_round_trip(self) -> None:
+        private_key = self.ed25519.generate_private_key()
+        self.assertEqual(self.crypto.algorithm_for_key(private_key), ED25519PH)
+        signature = self.crypto.sign(private_key, b"payload")
+        self.assertTrue(self.crypto.verify(private_key.public_key(), b"payload", signature, ED25519PH))
+        self.assertFalse(self.crypto.verify(private_key.public_key(), b"other", signature, ED25519PH))
+        restored = self.crypto.load_private_key(self.crypto.export_private_key_record(private_key))
+        self.assertEqual(self.crypto.export_public_key(restored), self.crypto.export_public_key(private_key))
+
+        for chunk_size in (None, 64):
+            with self.subTest(chunk_size=chunk_size):
+                source = self.workdir / "ed25519.sd"
+                DocumentService(crypto=self.ed25519, chunk_size=chunk_size).save_document(source, "alice", private_key, "text " * 100)
+                header = DocumentService(crypto=self.crypto).read_document_header(source)
+                self.assertEqual(header.algorithm, ED25519PH)
+                self.assertTrue(self._verify(source, private_key.public_key()))
+
+    def test_algorithm_mismatch_fails_cleanly(self) -> None:
+        ecdsa_key = self.crypto.generate_private_key()
+        ed25519_key = self.ed25519.generate_private_key()
+        self.assertFalse(self.crypto.verify(ecdsa_key.public_key(), b"payload", self.crypto.sign(ecdsa_key, b"payload"), ED25519PH))
+
+        for chunk_size in (None, 64):
+            with self.subTest(chunk_size=chunk_size):
+                source = self.workdir / "ecdsa.sd"
+                DocumentService(crypto=self.crypto, chunk_size=chunk_size).save_document(source, "alice", ecdsa_key, "text " * 100)
+                self.assertFalse(self._verify(source, ed25519_key.public_key()))
+
+                payload = bytearray(source.read_bytes())
+                self.assertEqual(payload[_ALGORITHM_CODE_OFFSET], ALGORITHM_CODES[ECDSA_P256_SHA256])
+                payload[_ALGORITHM_CODE_OFFSET] = ALGORITHM_CODES[ED25519PH]
+                source.write_bytes(bytes(payload))
+                self.assertFalse(self._verify(source, ecdsa_key.public_key()))
+
+    def test_legacy_ecdsa_document_still_verifies(self) -> None:
+        private_key = self.crypto.generate_private_key()
+        text = "старый документ\n" * 100
+        source = self.workdir / "legacy.sd"
+        source.write_bytes(_part(b"alice") + _part(self.crypto.sign(private_key, text.encode("utf-8"))) + text.encode("utf-8"))
+
+        documents = DocumentService(crypto=self.ed25519)
+        header = documents.read_document_header(source)
+        self.assertEqual((header.author, header.algorithm), ("alice", ECDSA_P256_SHA256))
+        self.assertEqual(documents.load_document(source).text, text)
+        self.assertTrue(self._verify(source, private_key.public_key()))
+
+
+if __name__ == "__main__":
+    unittest.main()
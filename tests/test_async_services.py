@@ -0,0 +1,34 @@
+import unittest
+
+from app.services.async_services import AsyncDocumentService
+from app.services.document_service import DocumentService
+from app.services.verification_cache import VerificationCache
+from tests.support import AsyncWorkdirTestCase
+
+
+class AsyncDocumentServiceTests(AsyncWorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.private_key = self.crypto.generate_private_key()
+        self.cache = VerificationCache(self.workdir / "cache.sqlite3")
+        self.documents = DocumentService(crypto=self.crypto, cache=self.cache)
+        self.source = self.workdir / "doc.sd"
+        self.documents.save_document(self.source, "alice", self.private_key, "text\n" * 1000)
+
+    async def _verify_in_pool(self, workers: int) -> None:
+        header = self.documents.read_document_header(self.source)
+        async with AsyncDocumentService(self.documents, self.crypto, workers=workers) as documents:
+            self.assertTrue(await documents.verify_document_file(self.source, header, self.private_key.public_key()))
+        hits = self.cache.stats().hits
+        self.assertTrue(self.documents.verify_document_file(self.source, header, self.private_key.public_key()))
+        self.assertEqual(self.cache.stats().hits, hits + 1)
+
+    async def test_thread_worker_fills_verification_cache(self) -> None:
+        await self._verify_in_pool(workers=0)
+
+    async def test_process_worker_fills_verification_cache(self) -> None:
+        await self._verify_in_pool(workers=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
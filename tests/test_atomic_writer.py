@@ -0,0 +1,114 @@
+import errno
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.core.exceptions import StorageError
+from app.services.atomic_writer import RENAMED, STALE_TEMPORARY_AGE, WRITE_STAGES, AtomicWriter, FaultHook
+from app.services.key_store import DirectoryKeyStore, SqliteKeyStore
+from tests.support import WorkdirTestCase
+from tools import crash_check
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def _interrupt_at(stage: str, occurrence: int) -> FaultHook:
+    seen = 0
+
+    def hook(current: str, _: Path) -> None:
+        nonlocal seen
+        if current == stage:
+            seen += 1
+            if seen == occurrence:
+                raise _Interrupted(stage)
+
+    return hook
+
+
+class AtomicWriterTests(WorkdirTestCase):
+    def _temporary(self, name: str, age: float) -> Path:
+        path = self.workdir / name
+        path.write_bytes(b"partial")
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_batch_fsyncs_every_file(self) -> None:
+        writer = AtomicWriter(sync_workers=4)
+        with mock.patch("os.fsync", wraps=os.fsync) as fsync:
+            with writer.batch() as batch:
+                for index in range(10):
+                    writer.write_bytes(self.workdir / f"file{index}", f"payload {index}".encode())
+        self.assertEqual(len(batch.written), 10)
+        self.assertEqual(fsync.call_count, 11)
+        self.assertEqual((self.workdir / "file7").read_bytes(), b"payload 7")
+        self.assertEqual(sorted(path.name for path in self.workdir.iterdir()), sorted(f"file{index}" for index in range(10)))
+
+    def test_sweep_removes_only_stale_temporary_files(self) -> None:
+        stale = self._temporary(".alice.spub.0a1b2c3d.tmp", STALE_TEMPORARY_AGE + 60)
+        fresh = self._temporary(".bob.spub.0a1b2c3d.tmp", 0)
+        other = self._temporary("notes.tmp", STALE_TEMPORARY_AGE + 60)
+        self.assertEqual(AtomicWriter.sweep(self.workdir), 1)
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+        self.assertTrue(other.exists())
+
+    def test_directory_store_sweeps_on_open(self) -> None:
+        stale = self._temporary(".alice.spub.0a1b2c3d.tmp", STALE_TEMPORARY_AGE + 60)
+        DirectoryKeyStore(self.workdir)
+        self.assertFalse(stale.exists())
+
+    def _write_batch(self, writer: AtomicWriter) -> None:
+        with writer.batch():
+            for index in range(4):
+                writer.write_bytes(self.workdir / f"file{index}", f"new {index}".encode())
+
+    def _contents(self) -> dict[str, bytes]:
+        return {path.name: path.read_bytes() for path in self.workdir.iterdir()}
+
+    def test_interrupted_rename_leaves_whole_files(self) -> None:
+        for index in range(4):
+            (self.workdir / f"file{index}").write_bytes(f"old {index}".encode())
+        with self.assertRaises(_Interrupted):
+            self._write_batch(AtomicWriter(fault_hook=_interrupt_at(RENAMED, 2)))
+        self.assertEqual(
+            self._contents(),
+            {"file0": b"new 0", "file1": b"new 1", "file2": b"old 2", "file3": b"old 3"},
+        )
+
+    def test_interrupted_fsync_keeps_old_files(self) -> None:
+        for index in range(4):
+            (self.workdir / f"file{index}").write_bytes(f"old {index}".encode())
+        with mock.patch("os.fsync", side_effect=OSError(errno.EIO, "I/O error")):
+            with self.assertRaises(StorageError):
+                self._write_batch(AtomicWriter(sync_workers=1))
+        self.assertEqual(self._contents(), {f"file{index}": f"old {index}".encode() for index in range(4)})
+
+    def test_crash_check_scenarios_survive_interruption(self) -> None:
+        for scenario in ("document", "compressed-document", "keyring", "private-keys"):
+            for stage in WRITE_STAGES:
+                with self.subTest(scenario=scenario, stage=stage), tempfile.TemporaryDirectory() as directory:
+                    workdir = Path(directory).resolve()
+                    crash_check._prepare(workdir)
+                    try:
+                        crash_check._run_scenario(scenario, workdir, AtomicWriter(fault_hook=_interrupt_at(stage, 1)))
+                    except _Interrupted:
+                        pass
+                    self.assertEqual(crash_check._check_scenario(scenario, workdir), [])
+            with self.subTest(scenario=scenario, stage="ordering"), tempfile.TemporaryDirectory() as directory:
+                workdir = Path(directory).resolve()
+                crash_check._prepare(workdir)
+                self.assertEqual(crash_check._ordering_run(scenario, workdir)["problems"], [])
+
+    def test_keyring_commits_with_full_sync(self) -> None:
+        store = SqliteKeyStore(self.workdir / "keyring.sqlite3")
+        self.assertEqual(store._connection.execute("PRAGMA synchronous").fetchone()[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.core.exceptions import CryptoError
+from app.core.models import VerificationStatus
+from app.services.batch_verify_service import BatchVerifyService
+from app.services.document_service import DocumentService
+from app.services.key_store import DirectoryKeyStore
+from app.services.public_key_service import PublicKeyService
+from tests.support import WorkdirTestCase
+
+
+class BatchVerifyTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.store = DirectoryKeyStore(self.workdir / "pk")
+        self.verifier = self.crypto.generate_private_key()
+        author = self.crypto.generate_private_key()
+        self.import_public_key(PublicKeyService(self.store, self.crypto), "alice", author, self.verifier)
+
+        self.documents_dir = self.workdir / "docs"
+        self.documents_dir.mkdir()
+        documents = DocumentService(crypto=self.crypto)
+        documents.save_document(self.documents_dir / "ok.sd", "alice", author, "hello world")
+        tampered = self.documents_dir / "tampered.sd"
+        documents.save_document(tampered, "alice", author, "hello world")
+        payload = bytearray(tampered.read_bytes())
+        payload[-1] ^= 0x20
+        tampered.write_bytes(bytes(payload))
+        documents.save_document(self.documents_dir / "stranger.sd", "bob", self.crypto.generate_private_key(), "text")
+        (self.documents_dir / "corrupt.sd").write_bytes(b"not a document")
+        truncated = self.documents_dir / "truncated.sd"
+        documents.save_document(truncated, "alice", author, "hello world")
+        truncated.write_bytes(truncated.read_bytes()[:20])
+
+    def _verify(self, workers: int) -> None:
+        batch = BatchVerifyService(store_path=self.store.path, crypto=self.crypto, workers=workers, chunk_size=1)
+        paths = BatchVerifyService.discover([self.documents_dir])
+        results = {Path(result.path).name: result for result in batch.verify(paths, self.verifier.public_key(), with_digest=True)}
+        self.assertEqual(
+            {name: result.status for name, result in results.items()},
+            {
+                "ok.sd": VerificationStatus.OK,
+                "tampered.sd": VerificationStatus.BAD_SIGNATURE,
+                "stranger.sd": VerificationStatus.UNKNOWN_AUTHOR,
+                "corrupt.sd": VerificationStatus.FORMAT_ERROR,
+                "truncated.sd": VerificationStatus.FORMAT_ERROR,
+            },
+        )
+        self.assertIsNotNone(results["ok.sd"].digest)
+        self.assertEqual(results["stranger.sd"].author, "bob")
+
+    def test_verify_in_process(self) -> None:
+        self._verify(workers=1)
+
+    def test_verify_in_worker_pool(self) -> None:
+        self._verify(workers=2)
+
+    def test_unexpected_error_is_reported_for_that_file(self) -> None:
+        batch = BatchVerifyService(store_path=self.store.path, crypto=self.crypto, workers=1)
+        failure = CryptoError("broken signature")
+        with mock.patch.object(DocumentService, "verify_document_file", side_effect=[True, failure]):
+            results = list(batch.verify([self.documents_dir / "ok.sd"] * 2, self.verifier.public_key()))
+        self.assertEqual([result.status for result in results], [VerificationStatus.OK, VerificationStatus.BAD_SIGNATURE])
+        self.assertEqual(results[1].message, "broken signature")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from app.core.exceptions import FormatError, ValidationError
+from app.core.models import VerificationStatus
+from app.services.bundle_service import BundleService
+from app.services.document_service import DocumentService
+from tests.support import WorkdirTestCase
+
+
+class BundleServiceTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.verifier = self.crypto.generate_private_key()
+        self.author = self.crypto.generate_private_key()
+        public_keys = self.public_key_service()
+        self.import_public_key(public_keys, "alice", self.author, self.verifier)
+        self.documents = DocumentService(crypto=self.crypto)
+        self.bundles = BundleService(self.documents, public_keys)
+        self.sources = [self.workdir / "docs" / "a" / "doc.sd", self.workdir / "docs" / "b" / "doc.sd"]
+        for index, source in enumerate(self.sources):
+            source.parent.mkdir(parents=True)
+            self.documents.save_document(source, "alice", self.author, f"text {index}")
+        self.bundle = self.workdir / "docs.sdb"
+        self.bundles.pack(self.sources, self.bundle)
+
+    def test_pack_names_entries_relative_to_common_root(self) -> None:
+        entries = self.bundles.entries(self.bundle)
+        self.assertEqual([entry.name for entry in entries], ["a/doc.sd", "b/doc.sd"])
+        self.assertEqual([entry.length for entry in entries], [source.stat().st_size for source in self.sources])
+        self.assertEqual(self.bundles.read_document(self.bundle, "b/doc.sd").text, "text 1")
+
+        single = self.workdir / "single.sdb"
+        self.bundles.pack(self.sources[:1], single)
+        self.assertEqual([entry.name for entry in self.bundles.entries(single)], ["doc.sd"])
+        with self.assertRaises(ValidationError):
+            self.bundles.pack([self.sources[0], self.sources[0]], single)
+
+    def test_extract_copies_document_bytes(self) -> None:
+        destination = self.workdir / "out.sd"
+        self.bundles.extract(self.bundle, "a/doc.sd", destination)
+        self.assertEqual(destination.read_bytes(), self.sources[0].read_bytes())
+        with self.assertRaises(ValidationError):
+            self.bundles.extract(self.bundle, "missing.sd", destination)
+
+    def test_verify_single_document(self) -> None:
+        result = self.bundles.verify(self.bundle, "b/doc.sd", self.verifier.public_key())
+        self.assertEqual((result.path, result.status, result.author), ("b/doc.sd", VerificationStatus.OK, "alice"))
+
+        [tampered] = [entry for entry in self.bundles.entries(self.bundle) if entry.name == "a/doc.sd"]
+        payload = bytearray(self.bundle.read_bytes())
+        payload[tampered.offset + tampered.length - 1] ^= 0x20
+        self.bundle.write_bytes(bytes(payload))
+        results = {result.path: result.status for result in self.bundles.verify_all(self.bundle, self.verifier.public_key())}
+        self.assertEqual(results, {"a/doc.sd": VerificationStatus.BAD_SIGNATURE, "b/doc.sd": VerificationStatus.OK})
+
+    def test_truncated_bundle_is_rejected(self) -> None:
+        payload = self.bundle.read_bytes()
+        for size in (len(payload) - 1, len(payload) // 2, 4, 0):
+            self.bundle.write_bytes(payload[:size])
+            with self.assertRaises(FormatError):
+                self.bundles.entries(self.bundle)
+            with self.assertRaises(FormatError):
+                list(self.bundles.verify_all(self.bundle, self.verifier.public_key()))
+
+
+if __name__ == "__main__":
+    unittest.main()
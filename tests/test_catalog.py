@@ -0,0 +1,58 @@
+import unittest
+
+from app.core.models import VerificationStatus
+from app.services.batch_verify_service import BatchVerifyService
+from app.services.catalog_service import CatalogService
+from app.services.document_service import DocumentService
+from app.services.key_store import DirectoryKeyStore
+from app.services.public_key_service import PublicKeyService
+from tests.support import WorkdirTestCase
+
+
+class CatalogRescanTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.store = DirectoryKeyStore(self.workdir / "pk")
+        self.public_keys = PublicKeyService(store=self.store, crypto=self.crypto)
+        self.verifier = self.crypto.generate_private_key()
+        self.author = self.crypto.generate_private_key()
+        self._import_author_key(self.author)
+
+        self.documents_dir = self.workdir / "docs"
+        self.documents_dir.mkdir()
+        DocumentService(crypto=self.crypto).save_document(self.documents_dir / "a.sd", "alice", self.author, "text")
+        batch = BatchVerifyService(store_path=self.store.path, crypto=self.crypto, workers=1)
+        self.catalog = CatalogService(self.workdir / "catalog.sqlite3", batch, self.public_keys, self.crypto)
+
+    def tearDown(self) -> None:
+        self.catalog.close()
+
+    def _import_author_key(self, author_key: object) -> None:
+        self.import_public_key(self.public_keys, "alice", author_key, self.verifier)
+
+    def _status(self) -> VerificationStatus:
+        [entry] = self.catalog.by_author("alice")
+        return entry.status
+
+    def test_unchanged_document_is_not_reverified(self) -> None:
+        self.catalog.rescan([self.documents_dir], self.verifier.public_key())
+        summary = self.catalog.rescan([self.documents_dir], self.verifier.public_key())
+        self.assertEqual(summary.updated, 0)
+        self.assertEqual(self._status(), VerificationStatus.OK)
+
+    def test_rescan_with_other_verifier_reverifies(self) -> None:
+        self.catalog.rescan([self.documents_dir], self.verifier.public_key())
+        summary = self.catalog.rescan([self.documents_dir], self.crypto.generate_private_key().public_key())
+        self.assertEqual(summary.updated, 1)
+        self.assertEqual(self._status(), VerificationStatus.UNKNOWN_AUTHOR)
+
+    def test_rescan_after_key_replacement_reverifies(self) -> None:
+        self.catalog.rescan([self.documents_dir], self.verifier.public_key())
+        self._import_author_key(self.crypto.generate_private_key())
+        summary = self.catalog.rescan([self.documents_dir], self.verifier.public_key())
+        self.assertEqual(summary.updated, 1)
+        self.assertEqual(self._status(), VerificationStatus.BAD_SIGNATURE)
+
+
+if __name__ == "__main__":
+    unittest.main()
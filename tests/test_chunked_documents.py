@@ -0,0 +1,84 @@
+import unittest
+from pathlib import Path
+
+from app.core.exceptions import ValidationError
+from app.core.merkle import MERKLE_HASH_SIZE
+from app.services.document_service import DocumentService
+from tests.support import WorkdirTestCase
+
+
+CHUNK_SIZE = 64
+
+
+class ChunkedDocumentTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.private_key = self.crypto.generate_private_key()
+        self.public_key = self.private_key.public_key()
+        self.documents = DocumentService(crypto=self.crypto, chunk_size=CHUNK_SIZE)
+
+    def _verify(self, source: Path) -> bool:
+        return DocumentService(crypto=self.crypto).verify_document_file(
+            source,
+            self.documents.read_document_header(source),
+            self.public_key,
+        )
+
+    def _plant_leaves(self, source: Path, text: str) -> None:
+        header = self.documents.read_document_header(source)
+        forged = self.workdir / "forged.sd"
+        self.documents.save_document(forged, "alice", self.crypto.generate_private_key(), text)
+        forged_header = self.documents.read_document_header(forged)
+        payload = bytearray(source.read_bytes())
+        leaves = forged.read_bytes()[forged_header.tree_offset :][: 4 * MERKLE_HASH_SIZE]
+        payload[header.tree_offset : header.tree_offset + len(leaves)] = leaves
+        source.write_bytes(bytes(payload))
+
+    def test_resave_ignores_tampered_leaves_on_disk(self) -> None:
+        document = self.workdir / "doc.sd"
+        text = "a" * (4 * CHUNK_SIZE)
+        self.documents.save_document(document, "alice", self.private_key, text)
+        self._plant_leaves(document, "b" * (4 * CHUNK_SIZE))
+
+        self.documents.save_document(document, "alice", self.private_key, text)
+
+        self.assertTrue(self._verify(document))
+        self.assertEqual(self.documents.load_document(document).text, text)
+
+    def test_resave_ignores_leaves_tampered_after_verification(self) -> None:
+        document = self.workdir / "doc.sd"
+        text = "a" * (4 * CHUNK_SIZE)
+        self.documents.save_document(document, "alice", self.private_key, text)
+        self.assertTrue(self.documents.verify_document_file(document, self.documents.read_document_header(document), self.public_key))
+        self._plant_leaves(document, "b" * (4 * CHUNK_SIZE))
+
+        self.documents.save_document(document, "alice", self.private_key, text[:-1] + "c")
+
+        self.assertTrue(self._verify(document))
+
+    def test_resave_after_verification_keeps_signature_valid(self) -> None:
+        document = self.workdir / "doc.sd"
+        text = "".join(chr(ord("a") + index % 26) for index in range(10 * CHUNK_SIZE + 7))
+        self.documents.save_document(document, "alice", self.private_key, text)
+        self.assertTrue(self.documents.verify_document_file(document, self.documents.read_document_header(document), self.public_key))
+
+        edited = text[:CHUNK_SIZE] + "X" + text[CHUNK_SIZE + 1 :]
+        self.documents.save_document(document, "alice", self.private_key, edited)
+
+        self.assertTrue(self._verify(document))
+        self.assertEqual(self.documents.load_document(document).text, edited)
+
+    def test_verify_range_at_end_of_document(self) -> None:
+        document = self.workdir / "doc.sd"
+        self.documents.save_document(document, "alice", self.private_key, "z" * CHUNK_SIZE)
+        header = self.documents.read_document_header(document)
+
+        self.assertEqual(self.documents.verify_document_range(document, header, self.public_key, CHUNK_SIZE, 0), b"")
+        self.assertEqual(self.documents.verify_document_range(document, header, self.public_key, 0, 0), b"")
+        self.assertEqual(self.documents.verify_document_range(document, header, self.public_key, 60, 4), b"zzzz")
+        with self.assertRaises(ValidationError):
+            self.documents.verify_document_range(document, header, self.public_key, CHUNK_SIZE, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
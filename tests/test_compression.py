@@ -0,0 +1,76 @@
+import os
+import struct
+import unittest
+
+from app.core.algorithms import ECDSA_P256_SHA256
+from app.core.compression import CODECS, iter_compressed, iter_decompressed
+from app.core.exceptions import FormatError
+from app.core.formats import decode_signed_document, decode_signed_document_header, encode_signed_document
+from app.core.models import SignedDocument
+
+
+_CODEC_FIELD_SIZE = struct.calcsize(">BQ")
+_PAYLOAD = os.urandom(1 << 16) + b"signed text\n" * 20_000
+
+
+def _compress(codec: str, payload: bytes) -> bytes:
+    return b"".join(iter_compressed(codec, [payload[start : start + 4096] for start in range(0, len(payload), 4096)]))
+
+
+def _decompress(codec: str, compressed: bytes, chunk_size: int = 1 << 16) -> bytes:
+    pieces = [compressed[start : start + 1000] for start in range(0, len(compressed), 1000)]
+    return b"".join(iter_decompressed(codec, pieces, chunk_size))
+
+
+class CompressionTests(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        for codec in CODECS:
+            with self.subTest(codec=codec):
+                compressed = _compress(codec, _PAYLOAD)
+                self.assertLess(len(compressed), len(_PAYLOAD))
+                self.assertEqual(_decompress(codec, compressed), _PAYLOAD)
+                self.assertEqual(_decompress(codec, compressed, chunk_size=100), _PAYLOAD)
+
+    def test_empty_payload(self) -> None:
+        for codec in CODECS:
+            with self.subTest(codec=codec):
+                compressed = _compress(codec, b"")
+                self.assertEqual(_decompress(codec, compressed), b"")
+                with self.assertRaises(FormatError):
+                    _decompress(codec, b"")
+
+    def test_corrupt_stream_raises_format_error(self) -> None:
+        for codec in CODECS:
+            compressed = _compress(codec, _PAYLOAD)
+            flipped = bytearray(compressed)
+            flipped[len(flipped) // 2] ^= 0xFF
+            damaged = {
+                "truncated": compressed[: len(compressed) // 2],
+                "missing end": compressed[:-1],
+                "flipped": bytes(flipped),
+                "trailing data": compressed + b"extra",
+                "garbage": b"not compressed data" * 10,
+            }
+            for damage, payload in damaged.items():
+                with self.subTest(codec=codec, damage=damage), self.assertRaises(FormatError):
+                    _decompress(codec, payload)
+
+    def test_unknown_codec(self) -> None:
+        with self.assertRaises(FormatError):
+            list(iter_compressed("zstd", [b"text"]))
+        with self.assertRaises(FormatError):
+            list(iter_decompressed("zstd", [b"text"]))
+
+        document = SignedDocument("alice", b"signature", "text", ECDSA_P256_SHA256, compression="zlib")
+        payload = bytearray(encode_signed_document(document))
+        self.assertEqual(decode_signed_document(bytes(payload)).text, "text")
+        header = decode_signed_document_header(bytes(payload))
+        payload[header.text_offset - _CODEC_FIELD_SIZE] = 0xEE
+        with self.assertRaises(FormatError):
+            decode_signed_document_header(bytes(payload))
+        with self.assertRaises(FormatError):
+            decode_signed_document(bytes(payload))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from app.core.exceptions import FormatError
+from app.services.document_service import DocumentService
+from tests.support import WorkdirTestCase
+
+
+LARGE_TEXT_SIZE = 24 << 20
+
+
+class DocumentFileVerifyTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.private_key = self.crypto.generate_private_key()
+        self.public_key = self.private_key.public_key()
+        self.variants = {
+            "plain": DocumentService(crypto=self.crypto),
+            "chunked": DocumentService(crypto=self.crypto, chunk_size=1 << 16),
+            "compressed": DocumentService(crypto=self.crypto, compression="zlib"),
+        }
+
+    def _save(self, variant: str, text: str) -> Path:
+        source = self.workdir / f"{variant}.sd"
+        self.variants[variant].save_document(source, "alice", self.private_key, text)
+        return source
+
+    def _verify(self, source: Path) -> bool:
+        documents = DocumentService(crypto=self.crypto)
+        return documents.verify_document_file(source, documents.read_document_header(source), self.public_key)
+
+    def test_large_file_is_verified_without_loading_it(self) -> None:
+        line = "строка подписанного текста\n"
+        text = line * (LARGE_TEXT_SIZE // len(line.encode("utf-8")))
+        for variant in self.variants:
+            with self.subTest(variant=variant):
+                source = self._save(variant, text)
+                tracemalloc.start()
+                try:
+                    self.assertTrue(self._verify(source))
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                self.assertLess(peak, LARGE_TEXT_SIZE // 4)
+
+    def test_truncated_file_is_rejected(self) -> None:
+        text = "abcdefgh" * 50_000
+        for variant in self.variants:
+            with self.subTest(variant=variant):
+                source = self._save(variant, text)
+                documents = DocumentService(crypto=self.crypto)
+                header = documents.read_document_header(source)
+                payload = source.read_bytes()
+                source.write_bytes(payload[: len(payload) - 100])
+                try:
+                    verified = documents.verify_document_file(source, header, self.public_key)
+                except FormatError:
+                    verified = False
+                self.assertFalse(verified)
+
+    def test_one_byte_tamper_in_the_middle_is_detected(self) -> None:
+        text = "abcdefgh" * 50_000
+        for variant in ("plain", "chunked"):
+            with self.subTest(variant=variant):
+                source = self._save(variant, text)
+                header = self.variants[variant].read_document_header(source)
+                payload = bytearray(source.read_bytes())
+                payload[header.text_offset + header.text_length // 2] ^= 0x01
+                source.write_bytes(bytes(payload))
+                self.assertFalse(self._verify(source))
+
+
+if __name__ == "__main__":
+    unittest.main()
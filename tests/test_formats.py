@@ -0,0 +1,50 @@
+import struct
+import unittest
+
+from app.core.algorithms import LEGACY_ALGORITHM
+from app.core.exceptions import FormatError
+from app.core.formats import (
+    DOCUMENT_MAGIC,
+    SIGNED_PUBLIC_KEY_MAGIC,
+    decode_signed_document,
+    decode_signed_public_key_blob,
+    encode_signed_document,
+    encode_signed_public_key_blob,
+)
+from app.core.models import SignedDocument, SignedPublicKeyBlob
+
+
+def _part(data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + data
+
+
+class FormatTests(unittest.TestCase):
+    def test_legacy_document_is_read(self) -> None:
+        payload = _part("алиса".encode()) + _part(b"signature") + "текст".encode()
+        document = decode_signed_document(payload)
+        self.assertEqual((document.author, document.signature, document.text), ("алиса", b"signature", "текст"))
+        self.assertEqual(document.algorithm, LEGACY_ALGORITHM)
+
+    def test_legacy_signed_public_key_is_read(self) -> None:
+        blob = decode_signed_public_key_blob(_part(b"alice") + _part(b"key") + b"signature")
+        self.assertEqual((blob.owner, blob.key_blob, blob.signature), ("alice", b"key", b"signature"))
+        self.assertEqual(blob.algorithm, LEGACY_ALGORITHM)
+
+    def test_current_formats_round_trip(self) -> None:
+        document = SignedDocument(author="alice", signature=b"signature", text="text", algorithm=LEGACY_ALGORITHM)
+        self.assertEqual(decode_signed_document(encode_signed_document(document)), document)
+        blob = SignedPublicKeyBlob(owner="alice", key_blob=b"key", signature=b"signature", algorithm=LEGACY_ALGORITHM)
+        self.assertEqual(decode_signed_public_key_blob(encode_signed_public_key_blob(blob)), blob)
+
+    def test_version_one_layout_is_rejected(self) -> None:
+        algorithm = _part(LEGACY_ALGORITHM.encode())
+        document = DOCUMENT_MAGIC + b"\x01" + algorithm + _part(b"alice") + _part(b"signature") + b"text"
+        public_key = SIGNED_PUBLIC_KEY_MAGIC + b"\x01" + algorithm + _part(b"alice") + _part(b"key") + b"signature"
+        with self.assertRaisesRegex(FormatError, "версия"):
+            decode_signed_document(document)
+        with self.assertRaisesRegex(FormatError, "версия"):
+            decode_signed_public_key_blob(public_key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from app.services import document_service, public_key_service
+from app.services.batch_verify_service import BatchVerifyService
+from app.services.document_service import DocumentService
+from app.services.instrumentation import MetricsRegistry, instrument_formats, instrument_services
+from tests.support import WorkdirTestCase
+
+
+class InstrumentationTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.private_key = self.crypto.generate_private_key()
+
+    def _stats(self, registry: MetricsRegistry) -> dict[str, tuple[int, int]]:
+        return {stats.operation: (stats.count, stats.bytes) for stats in registry.snapshot()}
+
+    def test_format_functions_are_restored(self) -> None:
+        decode = document_service.decode_signed_document
+        decode_blob = public_key_service.decode_public_key_blob
+        source = self.workdir / "doc.sd"
+        DocumentService(crypto=self.crypto).save_document(source, "alice", self.private_key, "text")
+        registry = MetricsRegistry()
+        with instrument_formats(registry):
+            self.assertIsNot(document_service.decode_signed_document, decode)
+            DocumentService(crypto=self.crypto).load_document(source)
+        self.assertIs(document_service.decode_signed_document, decode)
+        self.assertIs(public_key_service.decode_public_key_blob, decode_blob)
+        self.assertEqual(self._stats(registry)["formats.decode_signed_document"], (1, source.stat().st_size))
+        DocumentService(crypto=self.crypto).load_document(source)
+        self.assertEqual(self._stats(registry)["formats.decode_signed_document"][0], 1)
+
+    def test_format_functions_are_restored_after_error(self) -> None:
+        decode = document_service.decode_signed_document
+        with self.assertRaises(RuntimeError):
+            with instrument_formats(MetricsRegistry()):
+                raise RuntimeError
+        self.assertIs(document_service.decode_signed_document, decode)
+
+    def test_transcode_reports_text_bytes(self) -> None:
+        source = self.workdir / "doc.sd"
+        text = "строка текста\n" * 1000
+        documents = DocumentService(crypto=self.crypto)
+        documents.save_document(source, "alice", self.private_key, text)
+        registry = MetricsRegistry()
+        instrument_services(registry, documents=documents)
+        documents.transcode_document(source, self.workdir / "doc.zsd", "zlib")
+        self.assertEqual(self._stats(registry)["documents.transcode_document"], (1, len(text.encode("utf-8"))))
+
+    def test_batch_worker_timings_are_merged(self) -> None:
+        verifier = self.crypto.generate_private_key()
+        public_keys = self.public_key_service()
+        self.import_public_key(public_keys, "alice", self.private_key, verifier)
+        documents = DocumentService(crypto=self.crypto)
+        sources = [self.workdir / f"doc{index}.sd" for index in range(4)]
+        for source in sources:
+            documents.save_document(source, "alice", self.private_key, "text")
+
+        for workers in (1, 2):
+            registry = MetricsRegistry()
+            batch = BatchVerifyService(self.workdir / "pk", self.crypto, workers=workers, chunk_size=1, metrics=registry)
+            list(batch.verify(sources, verifier.public_key()))
+            [stats] = [stats for stats in registry.snapshot() if stats.operation == "documents.verify_document_file"]
+            self.assertEqual((stats.count, stats.bytes, stats.buckets["+Inf"]), (len(sources), 4 * len(sources), len(sources)))
+            self.assertIn("crypto.verify_digest", self._stats(registry))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from app.services.key_import_service import KeyImportService
+from tests.support import WorkdirTestCase
+
+
+class KeyImportTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.signer = self.crypto.generate_private_key()
+        self.public_keys = self.public_key_service()
+        self.source = self.workdir / "partner"
+        self.source.mkdir()
+        for owner in ("alice", "bob", "carol"):
+            key = self.crypto.generate_private_key()
+            self.public_keys.export_public_key(owner, key, self.source / f"{owner}.pub")
+        self.public_keys.export_public_key("dave", self.crypto.generate_private_key(), self.source / "mallory.pub")
+        (self.source / "broken.pub").write_bytes(b"not a key")
+
+    def _import(self, workers: int) -> None:
+        report = KeyImportService(self.public_keys, self.crypto, workers=workers).import_keys(self.source, self.signer)
+        self.assertEqual(sorted(report.imported), ["alice", "bob", "carol"])
+        self.assertEqual(report.owner_mismatches, ["mallory.pub"])
+        self.assertEqual(list(report.malformed), ["broken.pub"])
+        verifier = self.signer.public_key()
+        for owner in report.imported:
+            self.public_keys.load_and_verify_public_key(owner, verifier)
+        again = KeyImportService(self.public_keys, self.crypto, workers=workers).import_keys(self.source, self.signer)
+        self.assertEqual(again.imported, [])
+        self.assertEqual(sorted(again.duplicates), ["alice.pub", "bob.pub", "carol.pub"])
+
+    def test_import_in_process(self) -> None:
+        self._import(workers=1)
+
+    def test_import_in_worker_pool(self) -> None:
+        self._import(workers=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
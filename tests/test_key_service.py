@@ -0,0 +1,53 @@
+import unittest
+from pathlib import Path
+
+from app.services.atomic_writer import WRITTEN, AtomicWriter
+from app.services.key_service import BINARY_KEY_FORMAT, KeyService
+from app.services.provisioning_service import ProvisioningService
+from tests.support import WorkdirTestCase
+
+
+class KeyServiceTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.keys_dir = self.workdir / "keys"
+
+    def _public(self, key: object) -> bytes:
+        return self.crypto.export_public_key(key)
+
+    def test_concurrent_ensure_user_returns_the_stored_key(self) -> None:
+        winner = KeyService(self.keys_dir, self.crypto)
+        created = []
+
+        def race(stage: str, _: Path) -> None:
+            if stage == WRITTEN and not created:
+                created.append(winner.ensure_user("alice"))
+
+        loser = KeyService(self.keys_dir, self.crypto, writer=AtomicWriter(fault_hook=race))
+        key = loser.ensure_user("alice")
+        self.assertEqual(self._public(key), self._public(created[0]))
+        stored = KeyService(self.keys_dir, self.crypto, cache_size=0).load_private_key("alice")
+        self.assertEqual(self._public(stored), self._public(key))
+        self.assertEqual([path.name for path in (self.keys_dir / "alice").iterdir()], ["private.pem"])
+
+    def test_ensure_user_inside_batch_stores_key_before_returning(self) -> None:
+        writer = AtomicWriter()
+        keys = KeyService(self.keys_dir, self.crypto, writer=writer)
+        with writer.batch():
+            key = keys.ensure_user("alice")
+            self.assertTrue(keys.has_user("alice"))
+        stored = KeyService(self.keys_dir, self.crypto, cache_size=0).load_private_key("alice")
+        self.assertEqual(self._public(stored), self._public(key))
+
+    def test_provisioning_uses_configured_key_format(self) -> None:
+        keys = KeyService(self.keys_dir, self.crypto, key_format=BINARY_KEY_FORMAT)
+        public_keys = self.public_key_service()
+        report = ProvisioningService(keys, public_keys, self.crypto, workers=1).provision(["alice"])
+        self.assertEqual(report.created, ["alice"])
+        self.assertTrue((self.keys_dir / "alice" / "private.key").is_file())
+        self.assertFalse((self.keys_dir / "alice" / "private.pem").exists())
+        keys.load_private_key("alice")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import contextlib
+import io
+import unittest
+
+from app import cli
+from app.bootstrap import data_dirs, key_store_path, keyring_path
+from app.core.exceptions import StorageError
+from app.services.key_store import DirectoryKeyStore, SqliteKeyStore, migrate_directory_store
+from app.services.public_key_service import PublicKeyService
+from tests.support import WorkdirTestCase
+
+
+class SqliteKeyStoreTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.store = SqliteKeyStore(self.workdir / "keyring.sqlite3")
+        self.addCleanup(self.store.close)
+
+    def test_round_trip(self) -> None:
+        self.assertEqual(self.store.write_many([("alice", b"first"), ("bob", b"second")]), 2)
+        self.assertEqual(self.store.load("alice")[1], b"first")
+        self.assertEqual(self.store.load("bob")[1], b"second")
+        self.assertEqual(list(self.store.owners()), ["alice", "bob"])
+        self.assertIsNone(self.store.revision("carol"))
+        with self.assertRaises(StorageError):
+            self.store.load("carol")
+
+        reopened = SqliteKeyStore(self.store.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.load("alice"), self.store.load("alice"))
+
+    def test_revision_changes_after_write(self) -> None:
+        self.store.write("alice", b"first")
+        revision = self.store.revision("alice")
+        self.store.write("alice", b"second")
+        self.assertNotEqual(self.store.revision("alice"), revision)
+        self.assertEqual(self.store.load("alice"), (self.store.revision("alice"), b"second"))
+
+
+class KeyringMigrationTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        _, pk_dir = data_dirs(self.workdir)
+        self.signer = self.crypto.generate_private_key()
+        self.keys = {owner: self.crypto.generate_private_key() for owner in ("alice", "bob", "carol")}
+        public_keys = PublicKeyService(DirectoryKeyStore(pk_dir), self.crypto)
+        for owner, key in self.keys.items():
+            self.import_public_key(public_keys, owner, key, self.signer)
+        self.source = DirectoryKeyStore(pk_dir)
+
+    def _migrate(self) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(cli.main(["--base-dir", str(self.workdir), "migrate-keyring"]), 0)
+        return output.getvalue()
+
+    def _assert_migrated(self) -> None:
+        self.assertEqual(key_store_path(self.workdir), keyring_path(self.workdir))
+        keyring = SqliteKeyStore(keyring_path(self.workdir))
+        self.addCleanup(keyring.close)
+        self.assertEqual(list(keyring.owners()), sorted(self.keys))
+        for owner in self.keys:
+            self.assertEqual(keyring.load(owner)[1], self.source.load(owner)[1])
+        public_keys = PublicKeyService(keyring, self.crypto)
+        for owner, key in self.keys.items():
+            loaded = public_keys.load_and_verify_public_key(owner, self.signer.public_key())
+            self.assertEqual(self.crypto.export_public_key(loaded), self.crypto.export_public_key(key))
+
+    def test_migration_copies_directory_store(self) -> None:
+        self.assertEqual(self._migrate(), "Перенесено ключей: 3\n")
+        self._assert_migrated()
+
+    def test_migration_is_idempotent(self) -> None:
+        self._migrate()
+        self._migrate()
+        self._assert_migrated()
+
+        keyring = SqliteKeyStore(keyring_path(self.workdir))
+        self.addCleanup(keyring.close)
+        self.assertEqual(migrate_directory_store(self.source, keyring), 3)
+        self.assertEqual(list(keyring.owners()), sorted(self.keys))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from app.core.exceptions import OperationCancelledError
+from app.services.document_service import DocumentService
+from app.services.mapped_document import MappedDocument
+from tests.support import WorkdirTestCase
+
+
+WINDOW = 1 << 22
+
+
+class MappedDocumentTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.private_key = self.crypto.generate_private_key()
+
+    def _open(self, text: str, documents: DocumentService | None = None) -> MappedDocument:
+        documents = documents or DocumentService(crypto=self.crypto)
+        source = self.workdir / "doc.sd"
+        documents.save_document(source, "alice", self.private_key, text)
+        return documents.open_mapped_document(source)
+
+    def test_find_matches_across_search_windows(self) -> None:
+        text = "a" * (WINDOW - 2) + "needle" + "b" * WINDOW
+        with self._open(text) as document:
+            reported = []
+            self.assertEqual(document.find("needle", 0, lambda done, total: reported.append(done)), WINDOW - 2)
+            self.assertIsNone(document.find("needle", WINDOW))
+            self.assertEqual(reported, [])
+
+    def test_find_reports_progress_and_can_be_cancelled(self) -> None:
+        def cancel(done: int, total: int) -> None:
+            raise OperationCancelledError("cancelled")
+
+        with self._open("c" * (3 * WINDOW)) as document, self.assertRaises(OperationCancelledError):
+            document.find("missing", 0, cancel)
+
+    def test_verify_mapped_document_checks_displayed_text(self) -> None:
+        for documents in (
+            DocumentService(crypto=self.crypto),
+            DocumentService(crypto=self.crypto, compression="zlib"),
+            DocumentService(crypto=self.crypto, chunk_size=64),
+        ):
+            with self.subTest(compression=documents.compression, chunk_size=documents.chunk_size):
+                public_key = self.private_key.public_key()
+                with self._open("signed text " * 100, documents) as document:
+                    self.assertTrue(documents.verify_mapped_document(document, public_key))
+                source = self.workdir / "doc.sd"
+                if documents.compression is None:
+                    payload = bytearray(source.read_bytes())
+                    payload[-1] ^= 1
+                    source.write_bytes(bytes(payload))
+                    with documents.open_mapped_document(source) as document:
+                        self.assertFalse(documents.verify_mapped_document(document, public_key))
+
+
+if __name__ == "__main__":
+    unittest.main()
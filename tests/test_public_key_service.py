@@ -0,0 +1,70 @@
+import os
+import unittest
+
+from app.core.exceptions import StorageError
+from app.core.models import VerificationStatus
+from app.services.batch_verify_service import BatchVerifyService
+from app.services.bundle_service import BundleService
+from app.services.document_service import DocumentService
+from app.services.key_store import DirectoryKeyStore
+from app.services.public_key_service import PublicKeyService
+from tests.support import WorkdirTestCase
+
+
+class PublicKeyServiceTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.signer = self.crypto.generate_private_key()
+        self.store = DirectoryKeyStore(self.workdir / "pk")
+        self.public_keys = PublicKeyService(self.store, self.crypto)
+
+    def _import(self, owner: str, key: object) -> None:
+        self.import_public_key(self.public_keys, owner, key, self.signer)
+
+    def test_same_size_replace_with_same_mtime_is_reloaded(self) -> None:
+        first, second = self.crypto.generate_private_key(), self.crypto.generate_private_key()
+        self._import("alice", first)
+        path = self.store.path / "alice.spub"
+        stat = path.stat()
+        loaded = self.public_keys.load_and_verify_public_key("alice", self.signer.public_key())
+        self.assertEqual(self.crypto.export_public_key(loaded), self.crypto.export_public_key(first))
+
+        other = PublicKeyService(DirectoryKeyStore(self.workdir / "other"), self.crypto)
+        staged = self.workdir / "staged.spub"
+        other.export_public_key("alice", second, self.workdir / "alice.pub")
+        other.import_public_key(self.workdir / "alice.pub", self.signer)
+        staged.write_bytes((self.workdir / "other" / "alice.spub").read_bytes())
+        self.assertEqual(staged.stat().st_size, stat.st_size)
+        os.utime(staged, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        staged.replace(path)
+
+        loaded = self.public_keys.load_and_verify_public_key("alice", self.signer.public_key())
+        self.assertEqual(self.crypto.export_public_key(loaded), self.crypto.export_public_key(second))
+
+    def test_hostile_author_name_is_an_unknown_author(self) -> None:
+        author = self.crypto.generate_private_key()
+        self._import("alice", author)
+        documents = DocumentService(crypto=self.crypto)
+        good, hostile = self.workdir / "good.sd", self.workdir / "hostile.sd"
+        documents.save_document(good, "alice", author, "text")
+        documents.save_document(hostile, "al\x00ice", author, "text")
+        self.assertIsNone(self.store.revision("al\x00ice"))
+        with self.assertRaises(StorageError):
+            self.store.load("al\x00ice")
+
+        verifier = self.signer.public_key()
+        expected = {str(good): VerificationStatus.OK, str(hostile): VerificationStatus.UNKNOWN_AUTHOR}
+        for workers in (1, 2):
+            batch = BatchVerifyService(store_path=self.store.path, crypto=self.crypto, workers=workers)
+            results = {result.path: result.status for result in batch.verify([good, hostile], verifier)}
+            self.assertEqual(results, expected)
+
+        bundles = BundleService(documents, self.public_keys)
+        bundle = self.workdir / "docs.sdb"
+        bundles.pack([good, hostile], bundle)
+        results = {result.path: result.status for result in bundles.verify_all(bundle, verifier)}
+        self.assertEqual(results, {"good.sd": VerificationStatus.OK, "hostile.sd": VerificationStatus.UNKNOWN_AUTHOR})
+
+
+if __name__ == "__main__":
+    unittest.main()
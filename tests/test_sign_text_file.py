@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+
+from app.core.exceptions import FormatError
+from app.services.document_service import DocumentService
+from tests.support import WorkdirTestCase
+
+
+class SignTextFileTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.private_key = self.crypto.generate_private_key()
+        self.source = self.workdir / "notes.txt"
+        self.text = "строка исходного текста\n" * 20_000
+        self.source.write_text(self.text, encoding="utf-8")
+        self.variants = {
+            "plain": DocumentService(crypto=self.crypto),
+            "chunked": DocumentService(crypto=self.crypto, chunk_size=1 << 12),
+            "compressed": DocumentService(crypto=self.crypto, compression="zlib"),
+        }
+
+    def test_signed_file_verifies(self) -> None:
+        for variant, documents in self.variants.items():
+            with self.subTest(variant=variant):
+                destination = self.workdir / f"{variant}.sd"
+                documents.sign_text_file(self.source, destination, "alice", self.private_key)
+                header = documents.read_document_header(destination)
+                self.assertTrue(documents.verify_document_file(destination, header, self.private_key.public_key()))
+                self.assertEqual(documents.load_document(destination).text, self.text)
+
+    def test_source_changed_while_signing_is_rejected(self) -> None:
+        sign_digest = self.crypto.sign_digest
+
+        def change_source(*args: object) -> bytes:
+            with self.source.open("r+b") as stream:
+                stream.seek(len(self.text) // 2)
+                stream.write(b"X")
+            return sign_digest(*args)
+
+        for variant, documents in self.variants.items():
+            with self.subTest(variant=variant):
+                self.source.write_text(self.text, encoding="utf-8")
+                destination = self.workdir / f"{variant}.sd"
+                with mock.patch.object(self.crypto, "sign_digest", side_effect=change_source):
+                    with self.assertRaises(FormatError):
+                        documents.sign_text_file(self.source, destination, "alice", self.private_key)
+                self.assertFalse(destination.exists())
+                self.assertEqual([path.name for path in self.workdir.iterdir() if path.name.startswith(".")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+
+from app.core.exceptions import StorageError
+from app.core.formats import decode_signed_document
+from app.services.daemon_client import DaemonClient
+from app.services.document_service import DocumentService
+from app.services.key_service import KeyService
+from app.services.signing_daemon import SigningDaemon
+from tests.support import AsyncWorkdirTestCase
+
+
+class SigningDaemonKeyCacheTests(AsyncWorkdirTestCase):
+    async def asyncSetUp(self) -> None:
+        self.keys = KeyService(self.workdir / "keys", self.crypto)
+        public_keys = self.public_key_service()
+        self.documents = DocumentService(crypto=self.crypto)
+        self.daemon = SigningDaemon(
+            self.keys,
+            public_keys,
+            self.documents,
+            self.crypto,
+            self.workdir / "daemon.sock",
+            workers=0,
+            key_cache_size=2,
+        )
+        self.server = asyncio.create_task(self.daemon.serve())
+        while not self.daemon.socket_path.exists():
+            await asyncio.sleep(0.01)
+
+    async def asyncTearDown(self) -> None:
+        self.daemon.stop()
+        await self.server
+
+    async def _sign(self, user: str, text: str = "text") -> bytes:
+        def call() -> bytes:
+            with DaemonClient(self.daemon.socket_path) as client:
+                return client.sign(user, text)
+
+        return await asyncio.to_thread(call)
+
+    def _signed_by(self, payload: bytes, user: str) -> bool:
+        document = decode_signed_document(payload)
+        return self.documents.verify_document(document, self.keys.load_private_key(user).public_key())
+
+    async def test_rotated_key_is_used_without_reload(self) -> None:
+        self.keys.ensure_user("alice")
+        self.assertTrue(self._signed_by(await self._sign("alice"), "alice"))
+
+        self.keys.delete_user_keys("alice")
+        self.keys.ensure_user("alice")
+
+        self.assertTrue(self._signed_by(await self._sign("alice"), "alice"))
+
+    async def test_failed_load_is_not_cached(self) -> None:
+        with self.assertRaises(StorageError):
+            await self._sign("bob")
+        self.keys.ensure_user("bob")
+        self.assertTrue(self._signed_by(await self._sign("bob"), "bob"))
+
+    async def test_user_cache_is_bounded(self) -> None:
+        for user in ("u1", "u2", "u3"):
+            self.keys.ensure_user(user)
+            await self._sign(user)
+        self.assertEqual(list(self.daemon._users), ["u2", "u3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
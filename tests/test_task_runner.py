@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+from app.ui.task_runner import TaskRunner
+
+
+class _Widget:
+    def __init__(self) -> None:
+        self.scheduled: list = []
+
+    def after(self, _: int, callback) -> None:
+        self.scheduled.append(callback)
+
+    def run_pending(self) -> None:
+        scheduled, self.scheduled = self.scheduled, []
+        for callback in scheduled:
+            try:
+                callback()
+            except RuntimeError:
+                pass
+
+
+class TaskRunnerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.widget = _Widget()
+        self.runner = TaskRunner(self.widget, workers=1, poll_interval_ms=0)
+
+    def tearDown(self) -> None:
+        self.runner.shutdown()
+
+    def _drain(self) -> None:
+        while self.widget.scheduled:
+            self.widget.run_pending()
+
+    def test_failing_callback_does_not_stop_polling(self) -> None:
+        delivered = []
+        release = threading.Event()
+
+        def fail(_: object) -> None:
+            raise RuntimeError("callback failed")
+
+        self.runner.submit(lambda progress: 1, fail, delivered.append)
+        self.runner.submit(lambda progress: release.wait(5) and 2, delivered.append, delivered.append)
+        self.runner._tasks[0].future.result(5)
+        self.widget.run_pending()
+        release.set()
+        self._drain()
+        self.assertEqual(delivered, [2])
+
+        self.runner.submit(lambda progress: 3, delivered.append, delivered.append)
+        self.assertTrue(self.widget.scheduled)
+        self.runner._tasks[0].future.result(5)
+        self._drain()
+        self.assertEqual(delivered, [2, 3])
+
+    def test_failing_callback_is_reraised_after_rescheduling(self) -> None:
+        def fail(_: object) -> None:
+            raise RuntimeError("callback failed")
+
+        self.runner.submit(lambda progress: 1, fail, fail)
+        self.runner._tasks[0].future.result(5)
+        [poll] = self.widget.scheduled
+        self.widget.scheduled.clear()
+        with self.assertRaises(RuntimeError):
+            poll()
+        self.assertFalse(self.runner._polling)
+
+
+if __name__ == "__main__":
+    unittest.main()
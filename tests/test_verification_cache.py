@@ -0,0 +1,61 @@
+import itertools
+import unittest
+from unittest import mock
+
+from app.services.document_service import DocumentService
+from app.services.verification_cache import VerificationCache
+from tests.support import WorkdirTestCase
+
+
+class VerificationCacheTests(WorkdirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache = VerificationCache(self.workdir / "cache.sqlite3")
+        self.addCleanup(self.cache.close)
+        self.documents = DocumentService(crypto=self.crypto, cache=self.cache)
+        self.private_key = self.crypto.generate_private_key()
+        self.source = self.workdir / "doc.sd"
+        self.documents.save_document(self.source, "alice", self.private_key, "text\n" * 1000)
+
+    def _verify(self, public_key: object) -> bool:
+        return self.documents.verify_document_file(self.source, self.documents.read_document_header(self.source), public_key)
+
+    def _counts(self) -> tuple[int, int]:
+        stats = self.cache.stats()
+        return stats.hits, stats.misses
+
+    def test_repeated_verification_is_a_hit(self) -> None:
+        self.assertTrue(self._verify(self.private_key.public_key()))
+        self.assertEqual(self._counts(), (0, 1))
+        self.assertTrue(self._verify(self.private_key.public_key()))
+        self.assertEqual(self._counts(), (1, 1))
+
+    def test_changed_document_bytes_miss(self) -> None:
+        self.assertTrue(self._verify(self.private_key.public_key()))
+        payload = bytearray(self.source.read_bytes())
+        payload[-2] ^= 0x20
+        self.source.write_bytes(bytes(payload))
+        self.assertFalse(self._verify(self.private_key.public_key()))
+        self.assertEqual(self._counts(), (0, 2))
+
+    def test_changed_key_misses(self) -> None:
+        self.assertTrue(self._verify(self.private_key.public_key()))
+        self.assertFalse(self._verify(self.crypto.generate_private_key().public_key()))
+        self.assertEqual(self._counts(), (0, 2))
+        self.assertTrue(self._verify(self.private_key.public_key()))
+        self.assertEqual(self._counts(), (1, 2))
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        cache = VerificationCache(self.workdir / "small.sqlite3", max_entries=10)
+        self.addCleanup(cache.close)
+        keys = [VerificationCache.make_key(b"test", index.to_bytes(4, "big")) for index in range(256)]
+        with mock.patch("app.services.verification_cache.time.time", side_effect=itertools.count()):
+            for key in keys:
+                cache.put(key, True)
+        self.assertEqual(cache.stats().size, 10)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertTrue(cache.get(keys[-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+from app.core.exceptions import AppError
+from app.services.atomic_writer import DIRECTORY_SYNCED, RENAMED, SYNCED, WRITE_STAGES, AtomicWriter
+from app.services.crypto_service import CryptoService
+from app.services.document_service import DocumentService
+from app.services.key_service import KeyService
+from app.services.key_store import DirectoryKeyStore
+
+
+CRASH_EXIT_CODE = 75
+_OWNERS = 16
+_CRASH_AT = _OWNERS // 2
+_OLD_TEXT = "old revision\n" * 1000
+_NEW_TEXT = "new revision\n" * 200_000
+
+
+def _old_payload(owner: str) -> bytes:
+    return f"old:{owner}".encode() * 64
+
+
+def _new_payload(owner: str) -> bytes:
+    return f"new:{owner}".encode() * 512
+
+
+def _key_path(workdir: Path) -> Path:
+    return workdir / "author.pem"
+
+
+def _prepare(workdir: Path) -> None:
+    crypto = CryptoService()
+    private_key = crypto.generate_private_key()
+    _key_path(workdir).write_bytes(crypto.export_private_key(private_key))
+    DocumentService(crypto=crypto).save_document(workdir / "doc.sd", "author", private_key, _OLD_TEXT)
+    DocumentService(crypto=crypto, compression="zlib").save_document(workdir / "doc.zsd", "author", private_key, _OLD_TEXT)
+    store = DirectoryKeyStore(workdir / "pk")
+    store.write_many((f"owner{index:02d}", _old_payload(f"owner{index:02d}")) for index in range(0, _OWNERS, 2))
+    KeyService(workdir / "keys", crypto).store_private_keys(
+        (f"user{index:02d}", crypto.export_private_key(crypto.generate_private_key())) for index in range(0, _OWNERS, 2)
+    )
+
+
+def _run_scenario(scenario: str, workdir: Path, writer: AtomicWriter) -> None:
+    crypto = CryptoService()
+    private_key = crypto.load_private_key(_key_path(workdir).read_bytes())
+    if scenario == "document":
+        DocumentService(crypto=crypto, writer=writer).save_document(workdir / "doc.sd", "author", private_key, _NEW_TEXT)
+    elif scenario == "compressed-document":
+        documents = DocumentService(crypto=crypto, compression="zlib", writer=writer)
+        documents.save_document(workdir / "doc.zsd", "author", private_key, _NEW_TEXT)
+    elif scenario == "keyring":
+        store = DirectoryKeyStore(workdir / "pk", writer)
+        store.write_many((f"owner{index:02d}", _new_payload(f"owner{index:02d}")) for index in range(_OWNERS))
+    elif scenario == "private-keys":
+        keys = KeyService(workdir / "keys", crypto, writer=writer)
+        keys.store_private_keys(
+            (f"user{index:02d}", crypto.export_private_key(crypto.generate_private_key())) for index in range(_OWNERS)
+        )
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def _check_scenario(scenario: str, workdir: Path) -> list[str]:
+    crypto = CryptoService()
+    problems = []
+    if scenario in ("document", "compressed-document"):
+        source = workdir / ("doc.sd" if scenario == "document" else "doc.zsd")
+        documents = DocumentService(crypto=crypto)
+        try:
+            header = documents.read_document_header(source)
+            document = documents.load_document(source)
+            public_key = crypto.load_private_key(_key_path(workdir).read_bytes()).public_key()
+            if not documents.verify_document_file(source, header, public_key):
+                problems.append(f"{source.name}: signature does not verify")
+            if document.text not in (_OLD_TEXT, _NEW_TEXT):
+                problems.append(f"{source.name}: text is neither the old nor the new revision")
+        except (AppError, OSError) as error:
+            problems.append(f"{source.name}: {error}")
+    elif scenario == "keyring":
+        store = DirectoryKeyStore(workdir / "pk")
+        for index in range(_OWNERS):
+            owner = f"owner{index:02d}"
+            try:
+                _, payload = store.load(owner)
+            except AppError:
+                if index % 2 == 0:
+                    problems.append(f"{owner}: existing key disappeared")
+                continue
+            if payload not in (_old_payload(owner), _new_payload(owner)):
+                problems.append(f"{owner}: partial payload of {len(payload)} bytes")
+    elif scenario == "private-keys":
+        keys = KeyService(workdir / "keys", crypto, cache_size=0)
+        for index in range(_OWNERS):
+            username = f"user{index:02d}"
+            if not keys.has_user(username):
+                if index % 2 == 0:
+                    problems.append(f"{username}: existing key disappeared")
+                continue
+            try:
+                keys.load_private_key(username)
+            except AppError as error:
+                problems.append(f"{username}: {error}")
+    return problems
+
+
+def _crash_hook(stage: str, occurrence: int) -> Callable[[str, Path], None]:
+    seen = 0
+
+    def hook(current: str, _: Path) -> None:
+        nonlocal seen
+        if current != stage:
+            return
+        seen += 1
+        if seen == occurrence:
+            os._exit(CRASH_EXIT_CODE)
+
+    return hook
+
+
+def _crash_run(scenario: str, stage: str, workdir: Path) -> dict[str, object]:
+    command = [sys.executable, "-m", "tools.crash_check", "--child", scenario, stage, str(workdir)]
+    child = subprocess.run(command, capture_output=True, text=True)
+    problems = _check_scenario(scenario, workdir)
+    if child.returncode not in (0, CRASH_EXIT_CODE):
+        problems.append(f"child failed with code {child.returncode}: {child.stderr.strip()}")
+    return {
+        "scenario": scenario,
+        "stage": stage,
+        "crashed": child.returncode == CRASH_EXIT_CODE,
+        "problems": problems,
+    }
+
+
+def _ordering_run(scenario: str, workdir: Path) -> dict[str, object]:
+    events: list[tuple[str, str]] = []
+    fsync = os.fsync
+
+    def recording_fsync(descriptor: int) -> None:
+        events.append(("fsync", os.readlink(f"/proc/self/fd/{descriptor}")))
+        fsync(descriptor)
+
+    def hook(stage: str, path: Path) -> None:
+        events.append((stage, str(path.resolve())))
+
+    os.fsync = recording_fsync
+    try:
+        _run_scenario(scenario, workdir, AtomicWriter(fault_hook=hook))
+    finally:
+        os.fsync = fsync
+
+    problems = []
+    synced: set[str] = set()
+    renamed_dirs: dict[str, int] = {}
+    for position, (event, path) in enumerate(events):
+        if event == "fsync":
+            synced.add(path)
+        elif event == SYNCED and not any(Path(name).name.startswith(f".{Path(path).name}.") for name in synced):
+            problems.append(f"{path}: temporary file was not fsynced before {SYNCED}")
+        elif event == RENAMED:
+            renamed_dirs[str(Path(path).parent)] = position
+        elif event == DIRECTORY_SYNCED and path not in synced:
+            problems.append(f"{path}: directory was not fsynced")
+    for directory, last_rename in renamed_dirs.items():
+        if not any(event == DIRECTORY_SYNCED and path == directory for event, path in events[last_rename:]):
+            problems.append(f"{directory}: directory sync missing after the last rename")
+    return {"scenario": scenario, "stage": "ordering", "crashed": False, "problems": problems}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="tools.crash_check", description="Fault injection check for atomic writes")
+    parser.add_argument("--child", nargs=3, metavar=("SCENARIO", "STAGE", "WORKDIR"), help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=["document", "compressed-document", "keyring", "private-keys"],
+        help="Scenarios to run (default all)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.child:
+        scenario, stage, workdir = args.child
+        occurrence = 1 if scenario.endswith("document") or stage == DIRECTORY_SYNCED else _CRASH_AT
+        _run_scenario(scenario, Path(workdir), AtomicWriter(fault_hook=_crash_hook(stage, occurrence)))
+        return 0
+
+    failed = False
+    for scenario in args.scenario or ["document", "compressed-document", "keyring", "private-keys"]:
+        for stage in (*WRITE_STAGES, "ordering"):
+            with tempfile.TemporaryDirectory(prefix="crash-check-") as directory:
+                workdir = Path(directory).resolve()
+                _prepare(workdir)
+                report = _ordering_run(scenario, workdir) if stage == "ordering" else _crash_run(scenario, stage, workdir)
+            failed = failed or bool(report["problems"])
+            print(json.dumps(report, ensure_ascii=False), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())